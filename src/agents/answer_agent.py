@@ -1,16 +1,14 @@
 # src/agents/answer_agent.py
 
-import asyncio
-
 from google.adk.agents import LlmAgent
-from google.adk import Runner
-from google.adk.sessions import InMemorySessionService
-from google.genai import types
 
+from src.agents.runtime import get_agent_runtime
 from src.config import GEMINI_MODEL
 from src.models.agent_messages import FinalAnswer, EvidenceBatch
 from src.models.evidence import EvidenceItem
 
+ANSWER_APP_NAME = "kg-research-agent-answer"
+
 system_instruction = """
 You are a scientific answering assistant.
 
@@ -54,26 +52,8 @@ def create_answer_agent() -> LlmAgent:
     )
 
 
-async def _run_answer_agent_async(evidence: EvidenceBatch) -> FinalAnswer:
-    """Internal async helper using ADK Runner + session."""
-
-    agent = create_answer_agent()
-    app_name = "kg-research-agent-answer"
-    user_id = "local_user"
-    session_id = "answer-session-1"
-
-    session_service = InMemorySessionService()
-    runner = Runner(
-        app_name=app_name,
-        agent=agent,
-        session_service=session_service,
-    )
-
-    await session_service.create_session(
-        app_name=app_name,
-        user_id=user_id,
-        session_id=session_id,
-    )
+async def arun_answer_agent(evidence: EvidenceBatch) -> FinalAnswer:
+    """Compose the answer with the shared answer agent (AgentRuntime, fresh session per call)."""
 
     # Format evidence items for the prompt
     lines = []
@@ -95,24 +75,7 @@ Evidence items:
 Write the answer and evidence section as described in your instructions.
 """
 
-    new_message = types.Content(
-        role="user",
-        parts=[types.Part(text=prompt)],
-    )
-
-    events = runner.run(
-        user_id=user_id,
-        session_id=session_id,
-        new_message=new_message,
-    )
-
-    final_text = None
-    for event in events:
-        if event.is_final_response():
-            final_text = event.content.parts[0].text
-
-    if not final_text:
-        raise RuntimeError("Answer agent returned no final response.")
+    final_text = await get_agent_runtime().run_text(ANSWER_APP_NAME, create_answer_agent, prompt)
 
     # We keep citations as the full evidence items we passed in
     return FinalAnswer(
@@ -124,4 +87,4 @@ Write the answer and evidence section as described in your instructions.
 
 def run_answer_agent(evidence: EvidenceBatch) -> FinalAnswer:
     """Sync wrapper used by the pipeline."""
-    return asyncio.run(_run_answer_agent_async(evidence))
+    return get_agent_runtime().run_sync(arun_answer_agent(evidence))
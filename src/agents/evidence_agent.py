@@ -1,16 +1,36 @@
 # src/agents/evidence_agent.py
 
 import asyncio
+import hashlib
 import json
+import logging
+from typing import List, Optional
 
 from google.adk.agents import LlmAgent
-from google.adk import Runner
-from google.adk.sessions import InMemorySessionService
-from google.genai import types
 
-from src.config import GEMINI_MODEL
+from src.agents.runtime import get_agent_runtime
+from src.config import (
+    EVIDENCE_CACHE_ENABLED,
+    EVIDENCE_FANOUT_MIN_CHUNKS,
+    EVIDENCE_GROUP_SIZE,
+    EVIDENCE_MAX_CONCURRENCY,
+    EVIDENCE_MAX_ITEMS,
+    EVIDENCE_STRAGGLER_TIMEOUT,
+    GEMINI_MODEL,
+)
 from src.models.agent_messages import RetrievedContext, EvidenceBatch
-from src.models.evidence import EvidenceItem
+from src.models.evidence import EvidenceItem, EvidenceResponse
+from src.tools.context_expansion import chunk_id
+from src.utils.dedup_evidence import deduplicate_evidence
+from src.utils.embedding_cache import text_hash
+from src.utils.evidence_cache import EvidenceCache, evidence_key, get_evidence_cache
+
+logger = logging.getLogger(__name__)
+
+EVIDENCE_APP_NAME = "kg-research-agent-evidence"
+
+# Bump when the prompt below changes in a way the instruction hash doesn't capture
+EVIDENCE_PROMPT_VERSION = "1"
 
 system_instruction = """
 You are an evidence extraction assistant.
@@ -47,6 +67,16 @@ Guidelines:
 """
 
 
+def _prompt_version() -> str:
+    return f"{EVIDENCE_PROMPT_VERSION}-{hashlib.sha1(system_instruction.encode('utf-8')).hexdigest()[:12]}"
+
+
+def _chunk_keys(ctx: RetrievedContext) -> List[str]:
+    # Chunk id plus a hash of the text actually sent: ids alone would serve
+    # stale evidence after a paper is re-ingested (or a window widened)
+    return [f"{chunk_id(c.paper_id, c.chunk_index)}:{text_hash(c.chunk)[:16]}" for c in ctx.chunks]
+
+
 def create_evidence_agent() -> LlmAgent:
     return LlmAgent(
         model=GEMINI_MODEL,
@@ -57,26 +87,15 @@ def create_evidence_agent() -> LlmAgent:
     )
 
 
-async def _run_evidence_agent_async(ctx: RetrievedContext, question: str) -> EvidenceBatch:
-    """Internal async helper that uses ADK Runner + session service."""
-
-    agent = create_evidence_agent()
-    app_name = "kg-research-agent-evidence"
-    user_id = "local_user"
-    session_id = "evidence-session-1"
-
-    session_service = InMemorySessionService()
-    runner = Runner(
-        app_name=app_name,
-        agent=agent,
-        session_service=session_service,
-    )
-
-    await session_service.create_session(
-        app_name=app_name,
-        user_id=user_id,
-        session_id=session_id,
-    )
+async def _extract(ctx: RetrievedContext, question: str, cache: Optional[EvidenceCache]) -> EvidenceBatch:
+    """One evidence-agent call over all chunks of `ctx` (or a cache hit)."""
+    key = evidence_key(question, _chunk_keys(ctx), GEMINI_MODEL, _prompt_version())
+    if cache is not None:
+        # SQLite I/O: keep it off the event loop shared by concurrent groups and turns
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            batch = EvidenceBatch.model_validate_json(cached)
+            return EvidenceBatch(question=question, items=batch.items)
 
     # Build context string from retrieved chunks
     formatted_chunks = "\n\n".join(
@@ -94,25 +113,7 @@ You are given retrieved chunks of paper text:
 Extract claims and supporting evidence as per your JSON schema.
 """
 
-    new_message = types.Content(
-        role="user",
-        parts=[types.Part(text=prompt)],
-    )
-
-    events = runner.run(
-        user_id=user_id,
-        session_id=session_id,
-        new_message=new_message,
-    )
-
-    json_text = None
-    for event in events:
-        if event.is_final_response():
-            # Final LLM response
-            json_text = event.content.parts[0].text
-
-    if not json_text:
-        raise RuntimeError("Evidence agent returned no final response.")
+    json_text = await get_agent_runtime().run_text(EVIDENCE_APP_NAME, create_evidence_agent, prompt)
 
     # Strip ```json ... ``` if the model wrapped it
     cleaned = json_text.strip()
@@ -138,12 +139,97 @@ Extract claims and supporting evidence as per your JSON schema.
         for it in items_raw
     ]
 
-    return EvidenceBatch(
+    batch = EvidenceBatch(
         question=question,
         items=items,
     )
+    if cache is not None:
+        await asyncio.to_thread(cache.put, key, batch.model_dump_json())
+    return batch
+
+
+def _rank_items(ctx: RetrievedContext, items: List[EvidenceItem], limit: int) -> List[EvidenceItem]:
+    """The first `limit` items, ordered by the retrieval rank of the chunk they cite."""
+    rank = {}
+    for i, c in enumerate(ctx.chunks):
+        rank.setdefault((c.paper_id, c.chunk_index), i)
+    # sorted() is stable: items citing the same chunk keep the model's order
+    ordered = sorted(items, key=lambda it: rank.get((it.paper_id, it.chunk_index), len(rank)))
+    return ordered[:limit]
+
+
+async def _extract_fan_out(
+    ctx: RetrievedContext,
+    question: str,
+    cache: Optional[EvidenceCache],
+    group_size: int,
+    max_concurrency: int,
+    straggler_timeout: float,
+    max_items: int = EVIDENCE_MAX_ITEMS,
+) -> EvidenceBatch:
+    """
+    Extract evidence for small chunk groups concurrently and merge the results.
+
+    A group still running `straggler_timeout` seconds after it started (time
+    spent waiting for a concurrency slot doesn't count) is cancelled and
+    dropped; groups that fail are dropped too (unless every group failed).
+    Merged items go through deduplicate_evidence and are capped at
+    `max_items`, best-ranked chunks first.
+    """
+    size = max(1, group_size)
+    groups = [ctx.chunks[i:i + size] for i in range(0, len(ctx.chunks), size)]
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def extract_group(chunks) -> EvidenceBatch:
+        async with semaphore:
+            return await asyncio.wait_for(
+                _extract(RetrievedContext(query=ctx.query, chunks=chunks), question, cache),
+                timeout=straggler_timeout or None,
+            )
+
+    results = await asyncio.gather(*(extract_group(g) for g in groups), return_exceptions=True)
+
+    batches = [r for r in results if isinstance(r, EvidenceBatch)]
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if not batches and errors:
+        raise errors[0]
+    if errors:
+        logger.warning("dropped %d/%d evidence chunk group(s) (timeout or error)", len(errors), len(groups))
+
+    merged = EvidenceResponse(question=question, items=[item for b in batches for item in b.items])
+    items = _rank_items(ctx, deduplicate_evidence(merged).items, max_items)
+    return EvidenceBatch(question=question, items=items)
+
+
+async def arun_evidence_agent(
+    ctx: RetrievedContext,
+    question: str,
+    cache: Optional[EvidenceCache] = None,
+    fanout_min_chunks: int = EVIDENCE_FANOUT_MIN_CHUNKS,
+    group_size: int = EVIDENCE_GROUP_SIZE,
+    max_concurrency: int = EVIDENCE_MAX_CONCURRENCY,
+    straggler_timeout: float = EVIDENCE_STRAGGLER_TIMEOUT,
+) -> EvidenceBatch:
+    """
+    Extract evidence with the shared evidence agent (AgentRuntime, fresh session per call).
+
+    With at least `fanout_min_chunks` chunks (0, the default: never), chunks
+    are split into groups of `group_size` that are extracted concurrently, so
+    latency is about that of the slowest kept group rather than of one long
+    prompt; at most EVIDENCE_MAX_ITEMS merged items are returned. Otherwise
+    all chunks go into one prompt.
+
+    Results are cached persistently (EvidenceCache, or the default one when
+    EVIDENCE_CACHE_ENABLED), per prompt: the same question over the same
+    chunks with the same model and prompt is answered without an LLM call.
+    """
+    if cache is None and EVIDENCE_CACHE_ENABLED:
+        cache = get_evidence_cache()
+    if fanout_min_chunks and len(ctx.chunks) >= fanout_min_chunks:
+        return await _extract_fan_out(ctx, question, cache, group_size, max_concurrency, straggler_timeout)
+    return await _extract(ctx, question, cache)
 
 
 def run_evidence_agent(ctx: RetrievedContext, question: str) -> EvidenceBatch:
     """Sync wrapper so the rest of the code doesn't need to care about asyncio."""
-    return asyncio.run(_run_evidence_agent_async(ctx, question))
+    return get_agent_runtime().run_sync(arun_evidence_agent(ctx, question))
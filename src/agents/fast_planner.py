@@ -0,0 +1,61 @@
+# src/agents/fast_planner.py
+
+import re
+from typing import List, Optional
+
+from src.models.agent_messages import PlannerTask
+
+_WORD = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+
+# Words that point back at earlier turns ("what about its limitations?")
+_REFERRING_WORDS = {
+    "it", "its", "this", "that", "these", "those", "they", "them", "their",
+    "he", "she", "his", "her", "former", "latter", "above", "previous", "earlier",
+    "same", "again", "more", "else",
+}
+
+# Openers of follow-ups that only make sense with the previous answer
+_FOLLOW_UP_OPENERS = (
+    "and ", "also ", "but ", "so ", "what about", "how about", "why not",
+    "summarize", "summarise", "elaborate", "explain more", "tell me more",
+    "in one sentence", "shorter", "simplify", "rephrase", "continue", "go on",
+)
+
+# Restrictions the LLM planner turns into SearchFilters (paper ids, PDFs, dates)
+_FILTER_HINTS = re.compile(
+    r"\.pdf\b|\bpaper[_ ]?ids?\b|\b(?:19|20)\d{2}\b|\b(?:published|written)\s+(?:in|after|before|since)\b",
+    re.IGNORECASE,
+)
+
+MIN_QUESTION_WORDS = 3
+
+
+def llm_planner_reason(question: str, history_context: Optional[str] = None) -> Optional[str]:
+    """
+    Cheap classifier: why this question needs the LLM planner, or None if
+    the standard retrieval → evidence → answer plan fits.
+    """
+    text = question.strip().lower()
+    words = _WORD.findall(text)
+    if len(words) < MIN_QUESTION_WORDS:
+        return "too short to plan without the LLM"
+    if _FILTER_HINTS.search(question):
+        return "may restrict papers or dates (filters)"
+    if history_context:
+        if text.startswith(_FOLLOW_UP_OPENERS):
+            return "follow-up of an earlier turn"
+        if _REFERRING_WORDS.intersection(words):
+            return "refers back to earlier turns"
+    return None
+
+
+def standard_plan(question: str) -> List[PlannerTask]:
+    """The plan PLANNER_SYSTEM_PROMPT prescribes for most questions."""
+    return [PlannerTask(task_type=t, query=question) for t in ("retrieval", "evidence", "answer")]
+
+
+def fast_plan(question: str, history_context: Optional[str] = None) -> Optional[List[PlannerTask]]:
+    """The standard plan, instantly, when the classifier allows it; None means "ask the LLM"."""
+    if llm_planner_reason(question, history_context) is not None:
+        return None
+    return standard_plan(question.strip())
@@ -4,13 +4,14 @@ import json
 from typing import List, Optional
 
 from google.adk.agents import LlmAgent
-from google.adk import Runner
-from google.adk.sessions import InMemorySessionService
-from google.genai import types
 
-from src.config import GEMINI_MODEL
+from src.agents.fast_planner import fast_plan
+from src.agents.runtime import get_agent_runtime
+from src.config import FAST_PLANNER_ENABLED, GEMINI_MODEL
 from src.models.agent_messages import ResearchQuery, PlannerTask
 
+PLANNER_APP_NAME = "kg-research-agent-planner"
+
 
 PLANNER_SYSTEM_PROMPT = """
 You are a planning agent that decides how to answer research questions
@@ -29,6 +30,10 @@ Guidelines:
   2) then "evidence" with the same question,
   3) then "answer" with the same question.
 - If the question is clearly unanswerable or off-topic, respond with an empty list.
+- If the user restricts the question to specific papers (by paper id or PDF
+  filename) or to a date range, add a "filters" object to the "retrieval" task:
+  {"paper_ids": [...], "sources": [...], "date_from": "YYYY-MM-DD", "date_to": "YYYY-MM-DD"}
+  Include only the keys the user asked for; omit "filters" otherwise.
 - Do NOT include tools or implementation details, just tasks.
 
 Return STRICTLY valid JSON with this shape:
@@ -37,7 +42,8 @@ Return STRICTLY valid JSON with this shape:
   "tasks": [
     {
       "task_type": "<retrieval|evidence|answer>",
-      "query": "<string>"
+      "query": "<string>",
+      "filters": { ... }   // optional, retrieval tasks only
     },
     ...
   ]
@@ -56,34 +62,9 @@ def create_planner_agent() -> LlmAgent:
     )
 
 
-def plan_question(question: str, history_context: Optional[str] = None) -> List[PlannerTask]:
-    """
-    Run the planner agent once and parse the resulting JSON into PlannerTask objects.
-    Optionally include short session history as context.
-    """
-
+def _planner_prompt(question: str, history_context: Optional[str]) -> str:
     rq = ResearchQuery(question=question)
 
-    agent = create_planner_agent()
-    session_service = InMemorySessionService()
-    runner = Runner(
-        app_name="kg-research-agent-planner",
-        agent=agent,
-        session_service=session_service,
-    )
-
-    user_id = "local_user"
-    session_id = "planner-session-1"
-
-    import asyncio
-    asyncio.run(
-        session_service.create_session(
-            app_name="kg-research-agent-planner",
-            user_id=user_id,
-            session_id=session_id,
-        )
-    )
-
     history_block = ""
     if history_context:
         history_block = (
@@ -93,7 +74,7 @@ def plan_question(question: str, history_context: Optional[str] = None) -> List[
             "End of history.\n"
         )
 
-    prompt = (
+    return (
         "You will receive a research question.\n"
         "Decide which tasks to run, following your instructions.\n\n"
         f"{history_block}"
@@ -101,25 +82,8 @@ def plan_question(question: str, history_context: Optional[str] = None) -> List[
         "Return only JSON as specified."
     )
 
-    message = types.Content(
-        role="user",
-        parts=[types.Part(text=prompt)],
-    )
-
-    events = runner.run(
-        user_id=user_id,
-        session_id=session_id,
-        new_message=message,
-    )
-
-    json_text = None
-    for event in events:
-        if event.is_final_response():
-            json_text = event.content.parts[0].text
-
-    if not json_text:
-        raise RuntimeError("Planner agent returned no final response.")
 
+def _parse_tasks(json_text: str) -> List[PlannerTask]:
     # Handle ```json ... ``` wrappers if present
     cleaned = json_text.strip()
     if cleaned.startswith("```"):
@@ -133,3 +97,39 @@ def plan_question(question: str, history_context: Optional[str] = None) -> List[
         return tasks
     except Exception as e:
         raise RuntimeError(f"Failed to parse planner JSON: {e}\nRaw: {json_text}")
+
+
+async def aplan_question(
+    question: str,
+    history_context: Optional[str] = None,
+    use_fast_path: bool = FAST_PLANNER_ENABLED,
+) -> List[PlannerTask]:
+    """
+    Run the planner agent once and parse the resulting JSON into PlannerTask objects.
+    Optionally include short session history as context.
+
+    With `use_fast_path`, ordinary questions get the standard plan from the
+    rule-based fast planner without an LLM call; only follow-ups, filter-like
+    requests and ambiguous input reach the agent.
+
+    The agent and its runner live in the shared AgentRuntime; each call only
+    opens a fresh session.
+    """
+    if use_fast_path:
+        tasks = fast_plan(question, history_context)
+        if tasks is not None:
+            return tasks
+
+    json_text = await get_agent_runtime().run_text(
+        PLANNER_APP_NAME, create_planner_agent, _planner_prompt(question, history_context)
+    )
+    return _parse_tasks(json_text)
+
+
+def plan_question(
+    question: str,
+    history_context: Optional[str] = None,
+    use_fast_path: bool = FAST_PLANNER_ENABLED,
+) -> List[PlannerTask]:
+    """Sync wrapper around aplan_question (runs on the AgentRuntime's event loop)."""
+    return get_agent_runtime().run_sync(aplan_question(question, history_context, use_fast_path))
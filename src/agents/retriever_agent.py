@@ -1,23 +1,26 @@
 # src/agents/retriever_agent.py
 
-from typing import List
+import asyncio
+import json
+from typing import Dict, List, Optional
 
-from src.models.agent_messages import PlannerTask, RetrievedChunk, RetrievedContext
-from src.tools.vector_search import vector_search
+from src.config import CONTEXT_NEIGHBORS, RETRIEVAL_TIMEOUT
+from src.models.agent_messages import PlannerTask, RetrievalDecision, RetrievedChunk, RetrievedContext
+from src.tools.adaptive_k import adaptive_cut
+from src.tools.context_expansion import expand_hits
+from src.tools.vector_search import avector_search_batch, vector_search, vector_search_batch
 
 
-def run_retriever(task: PlannerTask, k: int = 5) -> RetrievedContext:
-    """
-    Run the retrieval step for a given PlannerTask.
-
-    - Expects task.task_type == "retrieval"
-    - Calls the existing vector_search() tool
-    - Wraps results into RetrievedContext (Pydantic model)
-    """
+def _check_retrieval_task(task: PlannerTask) -> None:
     if task.task_type != "retrieval":
         raise ValueError(f"run_retriever called with non-retrieval task_type={task.task_type!r}")
 
-    hits: List[dict] = vector_search(task.query, k=k)
+
+def _context_from_hits(query: str, hits: List[dict], adaptive: bool = False) -> RetrievedContext:
+    decisions: List[RetrievalDecision] = []
+    if adaptive:
+        hits, decision = adaptive_cut(hits)
+        decisions.append(RetrievalDecision(query=query, **decision))
 
     chunks: List[RetrievedChunk] = []
     for h in hits:
@@ -34,10 +37,129 @@ def run_retriever(task: PlannerTask, k: int = 5) -> RetrievedContext:
                 paper_id=h["paper_id"],
                 chunk_index=h["chunk_index"],
                 source=h["source"],
+                distance=h.get("distance"),
+                chunk_range=h.get("chunk_range"),
             )
         )
 
     return RetrievedContext(
-        query=task.query,
+        query=query,
         chunks=chunks,
+        decisions=decisions,
     )
+
+
+def _group_by_filters(tasks: List[PlannerTask]) -> List[List[int]]:
+    """Task positions grouped by identical filters (each group is searched together)."""
+    groups: Dict[str, List[int]] = {}
+    for i, task in enumerate(tasks):
+        key = json.dumps(task.filters.model_dump() if task.filters else None, sort_keys=True)
+        groups.setdefault(key, []).append(i)
+    return list(groups.values())
+
+
+def run_retriever(task: PlannerTask, k: int = 5, adaptive: bool = False) -> RetrievedContext:
+    """
+    Run the retrieval step for a given PlannerTask.
+
+    - Expects task.task_type == "retrieval"
+    - Calls the existing vector_search() tool (restricted by task.filters, if any)
+    - Wraps results into RetrievedContext (Pydantic model)
+
+    With `adaptive`, k is the maximum: k hits are fetched and weak ones cut
+    by adaptive_cut; the decision is recorded in `context.decisions`.
+    """
+    _check_retrieval_task(task)
+
+    hits: List[dict] = vector_search(task.query, k=k, filters=task.filters)
+    return _context_from_hits(task.query, hits, adaptive)
+
+
+def run_retrievers(tasks: List[PlannerTask], k: int = 5, adaptive: bool = False) -> List[RetrievedContext]:
+    """
+    Run several retrieval tasks; returns one RetrievedContext per task, in order.
+
+    With more than one task, all queries go through vector_search_batch
+    (one embedding batch + one index lookup per distinct filter) instead of
+    one call each. See run_retriever for `adaptive`.
+    """
+    for task in tasks:
+        _check_retrieval_task(task)
+
+    if len(tasks) == 1:
+        return [run_retriever(tasks[0], k=k, adaptive=adaptive)]
+
+    contexts: List[RetrievedContext] = [None] * len(tasks)
+    for indices in _group_by_filters(tasks):
+        filters = tasks[indices[0]].filters
+        hit_lists = vector_search_batch([tasks[i].query for i in indices], k=k, filters=filters)
+        for i, hits in zip(indices, hit_lists):
+            contexts[i] = _context_from_hits(tasks[i].query, hits, adaptive)
+    return contexts
+
+
+async def arun_retrievers(
+    tasks: List[PlannerTask],
+    k: int = 5,
+    timeout: Optional[float] = RETRIEVAL_TIMEOUT,
+    adaptive: bool = False,
+) -> List[RetrievedContext]:
+    """
+    Async run_retrievers: the filter groups are searched concurrently with
+    avector_search_batch, without blocking the event loop. Raises
+    TimeoutError if retrieval takes longer than `timeout` seconds. See
+    run_retriever for `adaptive`.
+    """
+    for task in tasks:
+        _check_retrieval_task(task)
+
+    groups = _group_by_filters(tasks)
+    hit_lists = await asyncio.gather(*(
+        avector_search_batch(
+            [tasks[i].query for i in indices], k=k, filters=tasks[indices[0]].filters, timeout=timeout
+        )
+        for indices in groups
+    ))
+
+    contexts: List[RetrievedContext] = [None] * len(tasks)
+    for indices, group_hits in zip(groups, hit_lists):
+        for i, hits in zip(indices, group_hits):
+            contexts[i] = _context_from_hits(tasks[i].query, hits, adaptive)
+    return contexts
+
+
+def merge_contexts(contexts: List[RetrievedContext]) -> RetrievedContext:
+    """Combine several contexts into one, dropping chunks already seen (first query wins)."""
+    seen = set()
+    chunks: List[RetrievedChunk] = []
+    for ctx in contexts:
+        for c in ctx.chunks:
+            key = (c.paper_id, c.chunk_index)
+            if key in seen:
+                continue
+            seen.add(key)
+            chunks.append(c)
+
+    decisions = [d for ctx in contexts for d in ctx.decisions]
+    return RetrievedContext(query=contexts[0].query, chunks=chunks, decisions=decisions)
+
+
+def expand_context(ctx: RetrievedContext, n: int = CONTEXT_NEIGHBORS) -> RetrievedContext:
+    """
+    Widen every chunk of `ctx` with its ±n neighbours (one batched fetch),
+    merging chunks that touch into contiguous windows. See expand_hits.
+    """
+    if n <= 0 or not ctx.chunks:
+        return ctx
+    hits = [
+        {
+            "text": c.chunk,
+            "paper_id": c.paper_id,
+            "chunk_index": c.chunk_index,
+            "source": c.source,
+            "distance": c.distance,
+        }
+        for c in ctx.chunks
+    ]
+    expanded = _context_from_hits(ctx.query, expand_hits(hits, n=n))
+    return RetrievedContext(query=ctx.query, chunks=expanded.chunks, decisions=ctx.decisions)
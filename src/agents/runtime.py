@@ -0,0 +1,107 @@
+# src/agents/runtime.py
+
+import asyncio
+import threading
+from typing import Callable, Coroutine, Dict, Optional, TypeVar
+
+from google.adk import Runner
+from google.adk.agents import BaseAgent
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+T = TypeVar("T")
+
+DEFAULT_USER_ID = "local_user"
+
+
+class AgentRuntime:
+    """
+    Long-lived home of the pipeline's ADK agents.
+
+    - Each agent and its Runner are built once (on first use) and reused, so
+      the model client and its HTTP connections survive between turns.
+    - All runners share one InMemorySessionService; every request gets its
+      own fresh session (random id), deleted again when the request is done.
+      Concurrent requests therefore never see each other's history.
+    - Sync callers go through `run_sync`, which runs coroutines on one
+      background event loop owned by the runtime instead of a new loop per
+      call (`asyncio.run`), so connections bound to that loop stay usable.
+    """
+
+    def __init__(self):
+        self.session_service = InMemorySessionService()
+        self._runners: Dict[str, Runner] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def runner(self, app_name: str, create_agent: Callable[[], BaseAgent]) -> Runner:
+        """The Runner for `app_name`, building it (and its agent) on first use."""
+        runner = self._runners.get(app_name)
+        if runner is None:
+            with self._lock:
+                runner = self._runners.get(app_name)
+                if runner is None:
+                    runner = Runner(
+                        app_name=app_name,
+                        agent=create_agent(),
+                        session_service=self.session_service,
+                    )
+                    self._runners[app_name] = runner
+        return runner
+
+    async def run_text(
+        self,
+        app_name: str,
+        create_agent: Callable[[], BaseAgent],
+        prompt: str,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> str:
+        """Send `prompt` to the agent in a throwaway session; returns the final response text."""
+        runner = self.runner(app_name, create_agent)
+        session = await self.session_service.create_session(app_name=app_name, user_id=user_id)
+        message = types.Content(role="user", parts=[types.Part(text=prompt)])
+
+        final_text = None
+        try:
+            async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+                if event.is_final_response() and event.content and event.content.parts:
+                    final_text = event.content.parts[0].text
+        finally:
+            await self.session_service.delete_session(app_name=app_name, user_id=user_id, session_id=session.id)
+
+        if not final_text:
+            raise RuntimeError(f"Agent {app_name!r} returned no final response.")
+        return final_text
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="agent-runtime", daemon=True).start()
+                self._loop = loop
+        return self._loop
+
+    def run_sync(self, coro: Coroutine[object, object, T]) -> T:
+        """Run `coro` on the runtime's event loop and wait for its result (for sync code)."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coro.close()
+            raise RuntimeError("run_sync() called from a running event loop; await the coroutine instead.")
+        return asyncio.run_coroutine_threadsafe(coro, self._background_loop()).result()
+
+
+_runtime: Optional[AgentRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_agent_runtime() -> AgentRuntime:
+    """Process-wide AgentRuntime, created on first use."""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = AgentRuntime()
+    return _runtime
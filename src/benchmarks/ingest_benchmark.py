@@ -0,0 +1,188 @@
+# src/benchmarks/ingest_benchmark.py
+"""
+Ingestion throughput benchmark.
+
+Generates a synthetic PDF corpus, then runs build_or_update_vector_store end
+to end once per mode, each in a fresh subprocess (isolated peak RSS, its own
+temporary Chroma/manifest/page store) with the offline FakeEmbeddingFunction.
+
+Modes:
+  serial    one text per embedding request, serial extraction (the old path)
+  batched   batched + concurrent embedding, serial extraction
+  parallel  batched embedding + process-pool extraction
+
+Usage:
+  python -m src.benchmarks.ingest_benchmark --papers 50 --pages 10
+  python -m src.benchmarks.ingest_benchmark --save bench.json
+  python -m src.benchmarks.ingest_benchmark --baseline bench.json --max-regression 0.2
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from src.benchmarks.synthetic_pdfs import generate_corpus
+
+MODES = ["serial", "batched", "parallel"]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux; include process-pool children
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+
+def run_one(mode: str, embed_latency: float, extract_workers: int) -> Dict:
+    """Run a single ingestion in this process. Paths come from the environment."""
+    # Imported here: src.config must see the benchmark's environment variables
+    from src.config import EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_WORKERS
+    from src.embeddings import FakeEmbeddingFunction
+    from src.tools.pdf_ingest import build_or_update_vector_store
+
+    if mode == "serial":
+        embedding_fn = FakeEmbeddingFunction(latency=embed_latency, batch_size=1, max_workers=1)
+        workers = 1
+    elif mode == "batched":
+        embedding_fn = FakeEmbeddingFunction(
+            latency=embed_latency, batch_size=EMBEDDING_BATCH_SIZE, max_workers=EMBEDDING_MAX_WORKERS
+        )
+        workers = 1
+    elif mode == "parallel":
+        embedding_fn = FakeEmbeddingFunction(
+            latency=embed_latency, batch_size=EMBEDDING_BATCH_SIZE, max_workers=EMBEDDING_MAX_WORKERS
+        )
+        workers = extract_workers
+    else:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {MODES}")
+
+    stats = build_or_update_vector_store(extract_workers=workers, embedding_fn=embedding_fn)
+
+    seconds = stats.total_seconds or 1e-9
+    return {
+        "mode": mode,
+        "papers": stats.papers,
+        "pages": stats.pages,
+        "chunks": stats.chunks,
+        "seconds": round(stats.total_seconds, 3),
+        "pages_per_sec": round(stats.pages / seconds, 1),
+        "chunks_per_sec": round(stats.chunks / seconds, 1),
+        "embedding_calls": embedding_fn.calls,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "extract_s": round(stats.extract_seconds, 3),
+        "chunk_s": round(stats.chunk_seconds, 3),
+        "dedup_s": round(stats.dedup_seconds, 3),
+        "embed_s": round(stats.embed_seconds, 3),
+        "write_s": round(stats.write_seconds, 3),
+    }
+
+
+def _run_in_subprocess(mode: str, corpus_dir: Path, args: argparse.Namespace) -> Dict:
+    with tempfile.TemporaryDirectory(prefix=f"ingest-bench-{mode}-") as tmp:
+        return _run_in_workdir(mode, corpus_dir, Path(tmp), args)
+
+
+def _run_in_workdir(mode: str, corpus_dir: Path, workdir: Path, args: argparse.Namespace) -> Dict:
+    env = dict(os.environ)
+    env.update(
+        {
+            "PDF_STORAGE": str(corpus_dir),
+            "CHROMA_DB_PATH": str(workdir / "chroma"),
+            "CHUNK_STORAGE": str(workdir / "chunks"),
+            "INGEST_MANIFEST_PATH": str(workdir / "manifest.json"),
+            "NEAR_DUP_INDEX_PATH": str(workdir / "near_dup.sqlite3"),
+            "BM25_INDEX_PATH": str(workdir / "bm25"),
+            "NUMPY_INDEX_PATH": str(workdir / "numpy_index"),
+            "EMBEDDING_CACHE_PATH": str(workdir / "embedding_cache.sqlite3"),
+            "LOG_DIR": str(workdir / "logs"),
+        }
+    )
+    cmd = [
+        sys.executable, "-m", "src.benchmarks.ingest_benchmark",
+        "--run-mode", mode,
+        "--embed-latency", str(args.embed_latency),
+        "--extract-workers", str(args.extract_workers),
+    ]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Benchmark mode {mode!r} failed:\n{proc.stderr}")
+    # The result is the last stdout line; everything before is ingestion progress
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def print_table(results: List[Dict]) -> None:
+    columns = [
+        "mode", "papers", "pages", "chunks", "seconds", "pages_per_sec", "chunks_per_sec",
+        "embedding_calls", "peak_rss_mb", "extract_s", "chunk_s", "dedup_s", "embed_s", "write_s",
+    ]
+    widths = {c: max(len(c), *(len(str(r[c])) for r in results)) for c in columns}
+    print("  ".join(c.rjust(widths[c]) for c in columns))
+    for r in results:
+        print("  ".join(str(r[c]).rjust(widths[c]) for c in columns))
+
+
+def check_regressions(results: List[Dict], baseline: List[Dict], max_regression: float) -> List[str]:
+    """Modes whose chunks/sec fell more than `max_regression` (fraction) below the baseline."""
+    by_mode = {r["mode"]: r for r in baseline}
+    failures = []
+    for r in results:
+        base = by_mode.get(r["mode"])
+        if not base or not base["chunks_per_sec"]:
+            continue
+        drop = 1 - r["chunks_per_sec"] / base["chunks_per_sec"]
+        if drop > max_regression:
+            failures.append(
+                f"{r['mode']}: {r['chunks_per_sec']} chunks/s vs baseline "
+                f"{base['chunks_per_sec']} ({drop:.0%} slower)"
+            )
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark PDF ingestion throughput.")
+    parser.add_argument("--papers", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=10, help="pages per paper")
+    parser.add_argument("--lines", type=int, default=60, help="text lines per page")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--embed-latency", type=float, default=0.02, help="simulated seconds per embedding request")
+    parser.add_argument("--extract-workers", type=int, default=min(8, os.cpu_count() or 1))
+    parser.add_argument("--save", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--run-mode", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        print(json.dumps(run_one(args.run_mode, args.embed_latency, args.extract_workers)))
+        return 0
+
+    with tempfile.TemporaryDirectory(prefix="ingest-bench-corpus-") as tmp:
+        corpus_dir = Path(tmp)
+        generate_corpus(corpus_dir, n_papers=args.papers, pages_per_paper=args.pages, lines_per_page=args.lines)
+        print(f"Generated {args.papers} synthetic PDF(s) × {args.pages} pages in {corpus_dir}\n")
+        results = [_run_in_subprocess(mode, corpus_dir, args) for mode in args.modes.split(",")]
+    print_table(results)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        failures = check_regressions(results, baseline, args.max_regression)
+        if failures:
+            print("\nThroughput regressions:")
+            for f in failures:
+                print(f"  {f}")
+            return 1
+        print("\nNo throughput regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# src/benchmarks/search_benchmark.py
+"""
+Vector search benchmark: Chroma (HNSW) vs. the memory-mapped NumPy index.
+
+Builds a temporary store of random unit vectors (with the same ids, texts and
+metadata in both backends), then times single-query lookups for:
+
+  chroma         collection.query(query_embeddings=...)
+  numpy-float32  NumpyVectorIndex, float32 matrix
+  numpy-float16  NumpyVectorIndex, float16 matrix
+
+Reported per backend: open time (cold start), p50/p95 latency, queries/s,
+on-disk vector bytes, and recall@k against exact float32 search.
+
+Usage:
+  python -m src.benchmarks.search_benchmark --chunks 100000 --dim 768
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import chromadb
+import numpy as np
+
+from src.utils.numpy_index import NumpyVectorIndex, normalize_rows
+
+BACKENDS = ["chroma", "numpy-float32", "numpy-float16"]
+
+
+def _percentile_ms(samples: List[float], q: float) -> float:
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def _time_queries(search: Callable[[List[float]], List[str]], queries: np.ndarray) -> Dict:
+    latencies = []
+    found = []
+    for q in queries:
+        t0 = time.perf_counter()
+        found.append(search(q.tolist()))
+        latencies.append(time.perf_counter() - t0)
+    return {
+        "p50_ms": _percentile_ms(latencies, 50),
+        "p95_ms": _percentile_ms(latencies, 95),
+        "qps": round(len(latencies) / sum(latencies), 1),
+        "found": found,
+    }
+
+
+def _recall(found: List[List[str]], truth: List[List[str]]) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    total = sum(len(t) for t in truth)
+    return round(hits / total, 4) if total else 1.0
+
+
+def _dir_bytes(path: Path, pattern: str) -> int:
+    return sum(p.stat().st_size for p in path.rglob(pattern))
+
+
+def run(n_chunks: int, dim: int, n_queries: int, k: int, seed: int, backends: List[str]) -> List[Dict]:
+    rng = np.random.default_rng(seed)
+    vectors = normalize_rows(rng.standard_normal((n_chunks, dim)).astype(np.float32))
+    queries = normalize_rows(rng.standard_normal((n_queries, dim)).astype(np.float32))
+    ids = [f"bench::chunk-{i:07d}" for i in range(n_chunks)]
+    documents = [f"synthetic chunk {i}" for i in range(n_chunks)]
+    metadatas = [{"paper_id": "bench", "chunk_index": i, "source": "bench.pdf"} for i in range(n_chunks)]
+
+    # Exact top-k as ground truth
+    truth_idx = np.argsort(-(vectors @ queries.T), axis=0)[:k].T
+    truth = [[ids[i] for i in row] for row in truth_idx]
+
+    workdir = Path(tempfile.mkdtemp(prefix="search-bench-"))
+    results = []
+    try:
+        if "chroma" in backends:
+            print(f"Loading {n_chunks} vectors into Chroma ...")
+            client = chromadb.PersistentClient(path=str(workdir / "chroma"))
+            collection = client.get_or_create_collection(name="bench", embedding_function=None)
+            step = client.get_max_batch_size()
+            for start in range(0, n_chunks, step):
+                end = start + step
+                collection.add(
+                    ids=ids[start:end],
+                    embeddings=vectors[start:end],
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end],
+                )
+            del client, collection
+
+            from chromadb.api.client import SharedSystemClient
+            SharedSystemClient.clear_system_cache()
+            t0 = time.perf_counter()
+            collection = chromadb.PersistentClient(path=str(workdir / "chroma")).get_collection(name="bench")
+            collection.query(query_embeddings=[queries[0].tolist()], n_results=k)
+            open_s = time.perf_counter() - t0
+
+            timed = _time_queries(
+                lambda q: collection.query(query_embeddings=[q], n_results=k)["ids"][0], queries
+            )
+            results.append({
+                "backend": "chroma",
+                "open_s": round(open_s, 3),
+                "vector_mb": round(_dir_bytes(workdir / "chroma", "data_level0.bin") / 2 ** 20, 1),
+                "recall": _recall(timed.pop("found"), truth),
+                **timed,
+            })
+
+        for backend in backends:
+            if not backend.startswith("numpy-"):
+                continue
+            dtype = backend.split("-", 1)[1]
+            root = workdir / backend
+            print(f"Building {backend} index ...")
+            NumpyVectorIndex(str(root), dtype=dtype).update(list(zip(ids, documents, metadatas, vectors)))
+
+            t0 = time.perf_counter()
+            index = NumpyVectorIndex(str(root), dtype=dtype)
+            index.search([queries[0]], k=k)
+            open_s = time.perf_counter() - t0
+
+            timed = _time_queries(lambda q: index.search([q], k=k)["ids"][0], queries)
+            results.append({
+                "backend": backend,
+                "open_s": round(open_s, 3),
+                "vector_mb": round(_dir_bytes(root, "vectors.npy") / 2 ** 20, 1),
+                "recall": _recall(timed.pop("found"), truth),
+                **timed,
+            })
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+def print_table(results: List[Dict]) -> None:
+    columns = ["backend", "open_s", "p50_ms", "p95_ms", "qps", "recall", "vector_mb"]
+    widths = {c: max(len(c), *(len(str(r[c])) for r in results)) for c in columns}
+    print("  ".join(c.rjust(widths[c]) for c in columns))
+    for r in results:
+        print("  ".join(str(r[c]).rjust(widths[c]) for c in columns))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Chroma vs. NumPy exact vector search.")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    args = parser.parse_args()
+
+    results = run(args.chunks, args.dim, args.queries, args.k, args.seed, args.backends.split(","))
+    print()
+    print_table(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
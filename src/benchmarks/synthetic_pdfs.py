@@ -0,0 +1,73 @@
+# src/benchmarks/synthetic_pdfs.py
+
+import random
+from pathlib import Path
+from typing import List
+
+# Plain ASCII vocabulary (no parentheses/backslashes, so no PDF string escaping needed)
+_VOCAB = (
+    "retrieval evidence claim graph knowledge paper model dataset benchmark query "
+    "embedding vector index chunk citation scholarly search ranking transformer "
+    "corpus annotation precision recall baseline experiment method result table "
+    "figure analysis attention encoder decoder training evaluation metric score"
+).split()
+
+
+def make_pdf(path: Path, pages: List[List[str]]) -> None:
+    """
+    Write a minimal, valid PDF with one Helvetica text line per string.
+    `pages` is a list of pages, each a list of lines.
+    """
+    n = len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(" ".join(f"{4 + 2 * i} 0 R" for i in range(n)), n),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(pages):
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        body = "BT /F1 9 Tf 40 760 Td 11 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{off:010d} 00000 n \n" for off in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    path.write_text(out, encoding="ascii")
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(_VOCAB, k=rng.randint(8, 18))
+    return " ".join(words).capitalize() + "."
+
+
+def generate_corpus(
+    out_dir: Path,
+    n_papers: int = 20,
+    pages_per_paper: int = 10,
+    lines_per_page: int = 60,
+    seed: int = 0,
+) -> List[Path]:
+    """Generate `n_papers` synthetic PDFs of random sentences; returns their paths."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for p in range(n_papers):
+        pages = []
+        for _ in range(pages_per_paper):
+            lines: List[str] = []
+            while len(lines) < lines_per_page:
+                lines.append(" ".join(_sentence(rng) for _ in range(2)))
+            pages.append(lines)
+        path = out_dir / f"synthetic-{p:04d}.pdf"
+        make_pdf(path, pages)
+        paths.append(path)
+    return paths
@@ -13,12 +13,110 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.0-pro-exp")
 
+# ==== Embeddings ====
+# Backend: "gemini" (API), "hashing" (local TF-IDF feature hashing) or "fake" (benchmarks)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "gemini")
+HASHING_EMBEDDING_DIM = int(os.getenv("HASHING_EMBEDDING_DIM", "1024"))
+HASHING_IDF_PATH = os.getenv("HASHING_IDF_PATH", str(BASE_DIR / "data" / "hashing_idf.npy"))
+# Texts per embedding request, concurrent requests in flight, and retries per batch
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+EMBEDDING_MAX_WORKERS = int(os.getenv("EMBEDDING_MAX_WORKERS", "4"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "3"))
+
+# On-disk embedding cache keyed by (model, text hash); set EMBEDDING_CACHE_ENABLED=0 to bypass
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "1") == "1"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(BASE_DIR / "data" / "embedding_cache.sqlite3"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+
 # ==== Vector DB (Chroma) ====
 CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", str(BASE_DIR / "data" / "chroma_db"))
+# Counter bumped by every ingestion that changes the collection; invalidates cached results
+COLLECTION_VERSION_PATH = os.getenv("COLLECTION_VERSION_PATH", str(Path(CHROMA_DB_PATH) / "collection_version"))
+
+# ==== Retrieval ====
+# Vector lookup backend: "chroma" (HNSW) or "numpy" (exact search over a
+# memory-mapped matrix of normalized embeddings, kept in sync by ingestion)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+NUMPY_INDEX_PATH = os.getenv("NUMPY_INDEX_PATH", str(BASE_DIR / "data" / "numpy_index"))
+# "float16" halves memory at a negligible cost in ranking precision
+NUMPY_INDEX_DTYPE = os.getenv("NUMPY_INDEX_DTYPE", "float32")
+# In-memory LRU caches for repeated questions: query text → embedding, and
+# (query embedding, k, filters) → results; set RETRIEVAL_CACHE_ENABLED=0 to bypass
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "1") == "1"
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+RETRIEVAL_RESULT_CACHE_SIZE = int(os.getenv("RETRIEVAL_RESULT_CACHE_SIZE", "1024"))
+# BM25 inverted index over chunk texts, kept in sync by ingestion
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", str(BASE_DIR / "data" / "bm25"))
+# "vector" (embeddings only), "hybrid" (BM25 + vector, reciprocal rank fusion),
+# "lexical" (BM25 only) or "auto" (lexical for short keyword queries, hybrid otherwise)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "auto")
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Each ranker contributes k × this many candidates to the fusion
+HYBRID_CANDIDATE_MULTIPLIER = int(os.getenv("HYBRID_CANDIDATE_MULTIPLIER", "4"))
+KEYWORD_QUERY_MAX_TERMS = int(os.getenv("KEYWORD_QUERY_MAX_TERMS", "4"))
+# Maximal marginal relevance re-ranking: 1.0 = pure relevance, lower = more diverse
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+# Candidates fetched per query for MMR to choose from: k × this
+MMR_CANDIDATE_MULTIPLIER = int(os.getenv("MMR_CANDIDATE_MULTIPLIER", "4"))
+# Async retrieval: threads for blocking index lookups, per-call timeout (s, 0 = none)
+RETRIEVAL_MAX_THREADS = int(os.getenv("RETRIEVAL_MAX_THREADS", "8"))
+RETRIEVAL_TIMEOUT = float(os.getenv("RETRIEVAL_TIMEOUT", "30"))
+# Adaptive k: fetch RETRIEVAL_MAX_K hits, keep at least RETRIEVAL_MIN_K, cut weak tails at
+# RETRIEVAL_MAX_DISTANCE (backend distance units, 0 = off) or a relative drop >= RETRIEVAL_MIN_GAP
+ADAPTIVE_K_ENABLED = os.getenv("ADAPTIVE_K_ENABLED", "1") == "1"
+RETRIEVAL_MIN_K = int(os.getenv("RETRIEVAL_MIN_K", "3"))
+RETRIEVAL_MAX_K = int(os.getenv("RETRIEVAL_MAX_K", "10"))
+RETRIEVAL_MAX_DISTANCE = float(os.getenv("RETRIEVAL_MAX_DISTANCE", "0"))
+RETRIEVAL_MIN_GAP = float(os.getenv("RETRIEVAL_MIN_GAP", "0.2"))
+# Context expansion: widen each retrieved chunk by ±N neighbouring chunks (0 = off)
+CONTEXT_NEIGHBORS = int(os.getenv("CONTEXT_NEIGHBORS", "0"))
+
+# ==== Pipeline ====
+# Rule-based planner for ordinary questions; the LLM planner only runs for follow-ups,
+# filter-like requests or ambiguous input
+FAST_PLANNER_ENABLED = os.getenv("FAST_PLANNER_ENABLED", "1") == "1"
+# Per-stage timeouts of one turn, in seconds (0 = none); retrieval uses RETRIEVAL_TIMEOUT
+PLANNER_TIMEOUT = float(os.getenv("PLANNER_TIMEOUT", "30"))
+EVIDENCE_TIMEOUT = float(os.getenv("EVIDENCE_TIMEOUT", "60"))
+ANSWER_TIMEOUT = float(os.getenv("ANSWER_TIMEOUT", "60"))
+
+# Persistent cache of evidence extraction results, keyed by (question, chunk set, model,
+# prompt version); TTL in seconds (0 = never expire). EVIDENCE_CACHE_ENABLED=0 bypasses it
+EVIDENCE_CACHE_ENABLED = os.getenv("EVIDENCE_CACHE_ENABLED", "1") == "1"
+EVIDENCE_CACHE_PATH = os.getenv("EVIDENCE_CACHE_PATH", str(BASE_DIR / "data" / "evidence_cache.sqlite3"))
+EVIDENCE_CACHE_MAX_ENTRIES = int(os.getenv("EVIDENCE_CACHE_MAX_ENTRIES", "10000"))
+EVIDENCE_CACHE_TTL = float(os.getenv("EVIDENCE_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Fan-out evidence extraction (opt-in): with at least EVIDENCE_FANOUT_MIN_CHUNKS chunks
+# (0 = never), groups of EVIDENCE_GROUP_SIZE chunks are extracted concurrently (at most
+# EVIDENCE_MAX_CONCURRENCY at once); a group still running EVIDENCE_STRAGGLER_TIMEOUT
+# seconds after it started is dropped (0 = no limit). At most EVIDENCE_MAX_ITEMS
+# merged items are kept, same as the single-prompt limit
+EVIDENCE_FANOUT_MIN_CHUNKS = int(os.getenv("EVIDENCE_FANOUT_MIN_CHUNKS", "0"))
+EVIDENCE_GROUP_SIZE = int(os.getenv("EVIDENCE_GROUP_SIZE", "3"))
+EVIDENCE_MAX_CONCURRENCY = int(os.getenv("EVIDENCE_MAX_CONCURRENCY", "8"))
+EVIDENCE_STRAGGLER_TIMEOUT = float(os.getenv("EVIDENCE_STRAGGLER_TIMEOUT", "30"))
+EVIDENCE_MAX_ITEMS = int(os.getenv("EVIDENCE_MAX_ITEMS", "5"))
 
 # ==== Data paths ====
 PDF_STORAGE = os.getenv("PDF_STORAGE", str(BASE_DIR / "data" / "papers"))
 CHUNK_STORAGE = os.getenv("CHUNK_STORAGE", str(BASE_DIR / "data" / "chunks"))
+# Chunking: token budget per chunk (~4 chars/token) and optional sentence overlap
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "300"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "0"))
+# Records hash/size/mtime/chunk ids of every ingested PDF for incremental re-ingestion
+INGEST_MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", str(BASE_DIR / "data" / "ingest_manifest.json"))
+# Near-duplicate chunk suppression (MinHash + LSH): "skip" drops duplicates,
+# "link" stores them with the canonical chunk's embedding and a duplicate_of id, "off" disables
+NEAR_DUP_MODE = os.getenv("NEAR_DUP_MODE", "skip")
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.85"))
+NEAR_DUP_INDEX_PATH = os.getenv("NEAR_DUP_INDEX_PATH", str(BASE_DIR / "data" / "near_dup.sqlite3"))
+# Chunks per Chroma upsert during streaming ingestion
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+# PDF text extraction: worker processes (1 = serial), pages per work unit, per-page timeout (s)
+INGEST_EXTRACT_WORKERS = int(os.getenv("INGEST_EXTRACT_WORKERS", "1"))
+INGEST_PAGES_PER_TASK = int(os.getenv("INGEST_PAGES_PER_TASK", "50"))
+INGEST_PAGE_TIMEOUT = float(os.getenv("INGEST_PAGE_TIMEOUT", "30"))
 
 # ==== Neo4j (not used yet, but ready) ====
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
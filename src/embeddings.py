@@ -1,19 +1,219 @@
 # src/embeddings.py
-from typing import List
+import asyncio
+import hashlib
+import random
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from chromadb.utils.embedding_functions import EmbeddingFunction
 
-from src.config import GOOGLE_API_KEY  # note: src.config import
+from src.config import (  # note: src.config import
+    GOOGLE_API_KEY,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MAX_WORKERS,
+    EMBEDDING_MAX_RETRIES,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_BACKEND,
+    HASHING_EMBEDDING_DIM,
+    HASHING_IDF_PATH,
+)
+from src.utils.embedding_cache import EmbeddingCache, get_embedding_cache
 
-if not GOOGLE_API_KEY:
-    raise RuntimeError("GOOGLE_API_KEY is not set in the environment.")
+EMBEDDING_MODEL = "models/text-embedding-004"  # you can tweak this later
 
-genai.configure(api_key=GOOGLE_API_KEY)
+_genai_configured = False
+_genai_lock = threading.Lock()
 
-EMBEDDING_MODEL = "models/text-embedding-004"  # you can tweak this later
 
+def _configure_genai() -> None:
+    """Configure the Gemini SDK on first use, so offline backends never need a key."""
+    global _genai_configured
+    with _genai_lock:
+        if _genai_configured:
+            return
+        if not GOOGLE_API_KEY:
+            raise RuntimeError("GOOGLE_API_KEY is not set in the environment.")
+        genai.configure(api_key=GOOGLE_API_KEY)
+        _genai_configured = True
 
-class GeminiEmbeddingFunction(EmbeddingFunction):
+
+class BatchedEmbeddingFunction(EmbeddingFunction):
+    """
+    Base class for embedding functions that talk to a backend in batches.
+
+    Subclasses only implement `_embed_batch` (one request for a list of texts).
+    `__call__` takes care of:
+    - splitting the input into `batch_size` slices,
+    - running up to `max_workers` slices concurrently,
+    - retrying transient errors with exponential backoff,
+    - returning embeddings in the same order as the input texts.
+
+    If a `cache` is given, texts already embedded by the same model are served
+    from it and only the misses are sent to the backend.
+
+    `aembed` is the asyncio counterpart of `__call__` (same batching, retries
+    and cache), for callers running on an event loop. Subclasses with an
+    async client override `_aembed_batch`; the default runs `_embed_batch`
+    in a worker thread so the loop is never blocked.
+    """
+
+    # Exceptions worth retrying; subclasses extend this with backend-specific ones
+    transient_errors: tuple = (ConnectionError, TimeoutError)
+
+    def __init__(
+        self,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_workers: int = EMBEDDING_MAX_WORKERS,
+        max_retries: int = EMBEDDING_MAX_RETRIES,
+        retry_base_delay: float = 0.5,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        self.batch_size = batch_size
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max(0, max_retries)
+        self.retry_base_delay = retry_base_delay
+        self.cache = cache
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def _embed_batch_with_retries(self, texts: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                embeddings = self._embed_batch(texts)
+            except self.transient_errors:
+                if attempt >= self.max_retries:
+                    raise
+                # Exponential backoff with a little jitter so workers don't retry in lockstep
+                delay = self.retry_base_delay * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay / 2))
+                attempt += 1
+                continue
+
+            if len(embeddings) != len(texts):
+                raise RuntimeError(
+                    f"Embedding backend returned {len(embeddings)} vectors for {len(texts)} texts."
+                )
+            return embeddings
+
+    def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        batches = [
+            texts[i:i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+
+        if len(batches) == 1 or self.max_workers == 1:
+            results = [self._embed_batch_with_retries(b) for b in batches]
+        else:
+            # pool.map yields results in submission order, so output order stays stable
+            workers = min(self.max_workers, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(self._embed_batch_with_retries, batches))
+
+        embeddings: List[List[float]] = []
+        for batch_embeddings in results:
+            embeddings.extend(batch_embeddings)
+        return embeddings
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self._embed_batch, texts)
+
+    async def _aembed_batch_with_retries(self, texts: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                embeddings = await self._aembed_batch(texts)
+            except self.transient_errors:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.retry_base_delay * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+                attempt += 1
+                continue
+
+            if len(embeddings) != len(texts):
+                raise RuntimeError(
+                    f"Embedding backend returned {len(embeddings)} vectors for {len(texts)} texts."
+                )
+            return embeddings
+
+    async def _aembed_uncached(self, texts: List[str]) -> List[List[float]]:
+        batches = [
+            texts[i:i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        # At most max_workers requests in flight, like the thread pool in the sync path
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def embed(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._aembed_batch_with_retries(batch)
+
+        results = await asyncio.gather(*(embed(b) for b in batches))
+        embeddings: List[List[float]] = []
+        for batch_embeddings in results:
+            embeddings.extend(batch_embeddings)
+        return embeddings
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """Async version of `__call__`; cancelling it cancels the pending requests."""
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return []
+
+        if self.cache is None:
+            return await self._aembed_uncached(list(texts))
+
+        # The SQLite cache is blocking I/O: keep it off the event loop
+        model = self.name()
+        cached = await asyncio.to_thread(self.cache.get_many, model, texts)
+        if len(cached) == len(texts):
+            return [cached[i] for i in range(len(texts))]
+
+        missing = list(dict.fromkeys(t for i, t in enumerate(texts) if i not in cached))
+        fresh = await self._aembed_uncached(missing)
+        await asyncio.to_thread(self.cache.put_many, model, missing, fresh)
+
+        by_text = dict(zip(missing, fresh))
+        return [cached[i] if i in cached else by_text[t] for i, t in enumerate(texts)]
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        # Chroma calls this to embed lists of strings
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts:
+            return []
+
+        if self.cache is None:
+            return self._embed_uncached(list(texts))
+
+        model = self.name()
+        cached = self.cache.get_many(model, texts)
+        if len(cached) == len(texts):
+            return [cached[i] for i in range(len(texts))]
+
+        # Embed each distinct missing text once
+        missing = list(dict.fromkeys(t for i, t in enumerate(texts) if i not in cached))
+        fresh = self._embed_uncached(missing)
+        self.cache.put_many(model, missing, fresh)
+
+        by_text = dict(zip(missing, fresh))
+        return [cached[i] if i in cached else by_text[t] for i, t in enumerate(texts)]
+
+
+class GeminiEmbeddingFunction(BatchedEmbeddingFunction):
     """
     Chroma-compatible embedding function that uses Gemini embeddings.
 
@@ -22,22 +222,41 @@ class GeminiEmbeddingFunction(EmbeddingFunction):
     - It makes future changes safer as Chroma evolves.
     """
 
-    def __init__(self, model: str = EMBEDDING_MODEL):
+    transient_errors = BatchedEmbeddingFunction.transient_errors + (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+    )
+
+    def __init__(
+        self,
+        model: str = EMBEDDING_MODEL,
+        use_cache: bool = EMBEDDING_CACHE_ENABLED,
+        **batch_kwargs,
+    ):
+        _configure_genai()
+        if use_cache and batch_kwargs.get("cache") is None:
+            batch_kwargs["cache"] = get_embedding_cache()
+        super().__init__(**batch_kwargs)
         self.model = model
 
-    def __call__(self, texts: List[str]) -> List[List[float]]:
-        # Chroma calls this to embed lists of strings
-        if isinstance(texts, str):
-            texts = [texts]
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        # A list `content` is sent as one batchEmbedContents request
+        result = genai.embed_content(
+            model=self.model,
+            content=texts,
+        )
+        return result["embedding"]
 
-        embeddings: List[List[float]] = []
-        for text in texts:
-            result = genai.embed_content(
-                model=self.model,
-                content=text,
-            )
-            embeddings.append(result["embedding"])
-        return embeddings
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        # Same request through the SDK's asyncio client (no thread per call)
+        result = await genai.embed_content_async(
+            model=self.model,
+            content=texts,
+        )
+        return result["embedding"]
 
     def name(self) -> str:
         """
@@ -47,3 +266,150 @@ class GeminiEmbeddingFunction(EmbeddingFunction):
         loaded with a different embedding configuration.
         """
         return f"gemini-{self.model}"
+
+
+class FakeEmbeddingFunction(BatchedEmbeddingFunction):
+    """
+    Offline stand-in for a remote embedding API.
+
+    Vectors are derived deterministically from a hash of each text, and every
+    batch sleeps for `latency` seconds to mimic a network round trip. This lets
+    us measure batching/concurrency throughput without calling Gemini.
+    Set `failure_rate` > 0 to exercise the retry path.
+    """
+
+    def __init__(
+        self,
+        dim: int = 768,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+        **batch_kwargs,
+    ):
+        super().__init__(**batch_kwargs)
+        self.dim = dim
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # Counters, handy for throughput reports and tests
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _vector_for(self, text: str) -> List[float]:
+        rng = random.Random(hashlib.sha1(text.encode("utf-8")).digest())
+        return [rng.uniform(-1.0, 1.0) for _ in range(self.dim)]
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.failure_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise ConnectionError("Simulated transient embedding failure.")
+        with self._lock:
+            self.texts_embedded += len(texts)
+        return [self._vector_for(t) for t in texts]
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.failure_rate
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if fail:
+            raise ConnectionError("Simulated transient embedding failure.")
+        with self._lock:
+            self.texts_embedded += len(texts)
+        return [self._vector_for(t) for t in texts]
+
+    def name(self) -> str:
+        return f"fake-{self.dim}"
+
+
+_HASH_TOKEN = re.compile(r"[a-z0-9]+(?:[-_][a-z0-9]+)*")
+
+
+class HashingEmbeddingFunction(BatchedEmbeddingFunction):
+    """
+    Fully local embedding: feature hashing + TF-IDF, no network, no model.
+
+    Unigrams and bigrams are hashed (crc32) into `dim` buckets; each batch is
+    turned into a dense (batch, dim) matrix with one np.add.at, weighted with
+    sublinear TF × IDF and L2-normalized. Good enough as a cheap first-stage
+    embedder and for benchmarking ingestion/retrieval without the API.
+
+    IDF weights come from `fit_idf()` and are stored at `idf_path`. Fit them
+    once on the corpus *before* ingesting and keep them fixed: documents and
+    queries must be embedded with the same weights. Without a fitted table
+    every bucket gets weight 1 (plain sublinear TF).
+    """
+
+    def __init__(self, dim: int = HASHING_EMBEDDING_DIM, idf_path: Optional[str] = HASHING_IDF_PATH, **batch_kwargs):
+        # Pure CPU work: one worker avoids thread overhead for tiny batches
+        batch_kwargs.setdefault("max_workers", 1)
+        super().__init__(**batch_kwargs)
+        self.dim = dim
+        self.idf_path = idf_path
+        self.idf = np.ones(dim, dtype=np.float32)
+        if idf_path and Path(idf_path).exists():
+            idf = np.load(idf_path)
+            if idf.shape == (dim,):
+                self.idf = idf.astype(np.float32)
+
+    def _bucket_ids(self, text: str) -> List[int]:
+        tokens = _HASH_TOKEN.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return [zlib.crc32(f.encode("utf-8")) % self.dim for f in features]
+
+    def _term_counts(self, texts: List[str]) -> np.ndarray:
+        rows: List[int] = []
+        cols: List[int] = []
+        for row, text in enumerate(texts):
+            ids = self._bucket_ids(text)
+            rows.extend([row] * len(ids))
+            cols.extend(ids)
+        counts = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(counts, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+        return counts
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        weights = np.log1p(self._term_counts(texts)) * self.idf
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        weights /= np.where(norms == 0, 1.0, norms)
+        return weights.tolist()
+
+    def fit_idf(self, texts: List[str], save: bool = True) -> np.ndarray:
+        """Compute smoothed IDF per bucket from `texts` (and save it to idf_path)."""
+        df = np.zeros(self.dim, dtype=np.float64)
+        for i in range(0, len(texts), self.batch_size):
+            df += (self._term_counts(texts[i:i + self.batch_size]) > 0).sum(axis=0)
+        n = len(texts)
+        self.idf = (np.log((1 + n) / (1 + df)) + 1.0).astype(np.float32)
+        if save and self.idf_path:
+            Path(self.idf_path).parent.mkdir(parents=True, exist_ok=True)
+            np.save(self.idf_path, self.idf)
+        return self.idf
+
+    def name(self) -> str:
+        return f"hashing-tfidf-{self.dim}"
+
+
+def get_embedding_function(backend: str = EMBEDDING_BACKEND) -> BatchedEmbeddingFunction:
+    """
+    Embedding function selected by EMBEDDING_BACKEND:
+    - "gemini":  Gemini API (needs GOOGLE_API_KEY), with the on-disk cache
+    - "hashing": local feature-hashing TF-IDF (offline, air-gapped runs)
+    - "fake":    deterministic random vectors (throughput testing only)
+
+    Note: a Chroma collection must always be queried with the backend it was
+    built with.
+    """
+    if backend == "gemini":
+        return GeminiEmbeddingFunction()
+    if backend == "hashing":
+        return HashingEmbeddingFunction()
+    if backend == "fake":
+        return FakeEmbeddingFunction()
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; expected 'gemini', 'hashing' or 'fake'.")
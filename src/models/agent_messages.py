@@ -1,5 +1,5 @@
 # src/models/agent_messages.py
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 
 from src.models.evidence import EvidenceItem  # reuse existing model
@@ -10,6 +10,23 @@ class ResearchQuery(BaseModel):
     question: str
 
 
+class SearchFilters(BaseModel):
+    """
+    Restricts retrieval to a subset of papers. All given conditions must hold.
+
+    paper_ids: only these paper ids (PDF file stems)
+    sources:   only these PDF filenames
+    date_from / date_to: inclusive ISO dates (YYYY-MM-DD) of the paper's date
+    """
+    paper_ids: List[str] = []
+    sources: List[str] = []
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return not (self.paper_ids or self.sources or self.date_from or self.date_to)
+
+
 class PlannerTask(BaseModel):
     """
     A single step the planner wants to execute.
@@ -19,9 +36,12 @@ class PlannerTask(BaseModel):
       - "evidence"   → run evidence extraction on given context
       - "answer"     → synthesize final answer
       - (future) "kg_query", "refine", etc.
+
+    filters: optional restriction of a "retrieval" task to some papers
     """
     task_type: str
     query: str
+    filters: Optional[SearchFilters] = None
 
 
 class RetrievedChunk(BaseModel):
@@ -30,12 +50,32 @@ class RetrievedChunk(BaseModel):
     paper_id: str
     chunk_index: int
     source: str
+    distance: Optional[float] = None
+    # [first, last] chunk index when neighbouring chunks were merged in
+    chunk_range: Optional[List[int]] = None
+
+
+class RetrievalDecision(BaseModel):
+    """
+    How many hits adaptive k kept for one query, and why.
+
+    reason: "all", "distance_cutoff", "largest_gap" or "min_k"
+    signal: what the cut looked at ("distance", "score" or None)
+    threshold: the distance/score of the cut, if any
+    """
+    query: str
+    fetched: int
+    kept: int
+    reason: str
+    signal: Optional[str] = None
+    threshold: Optional[float] = None
 
 
 class RetrievedContext(BaseModel):
     """What the retriever hands to the evidence agent."""
     query: str
     chunks: List[RetrievedChunk]
+    decisions: List[RetrievalDecision] = []
 
 
 class EvidenceBatch(BaseModel):
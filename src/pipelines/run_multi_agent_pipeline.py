@@ -1,37 +1,119 @@
 # src/pipelines/run_multi_agent_pipeline.py
 
-from src.agents.planner_agent import plan_question
-from src.agents.retriever_agent import run_retriever
-from src.agents.evidence_agent import run_evidence_agent
-from src.agents.answer_agent import run_answer_agent
+import asyncio
+import logging
+from typing import Awaitable, Dict, Optional, TypeVar
+
+from src.config import (
+    ADAPTIVE_K_ENABLED,
+    ANSWER_TIMEOUT,
+    CONTEXT_NEIGHBORS,
+    EVIDENCE_TIMEOUT,
+    PLANNER_TIMEOUT,
+    RETRIEVAL_MAX_K,
+    RETRIEVAL_TIMEOUT,
+)
+from src.agents.planner_agent import aplan_question
+from src.agents.retriever_agent import arun_retrievers, expand_context, merge_contexts
+from src.agents.evidence_agent import arun_evidence_agent
+from src.agents.answer_agent import arun_answer_agent
+from src.agents.runtime import get_agent_runtime
 from src.models.session_state import SessionState
-from src.models.agent_messages import FinalAnswer
-
-
-def handle_one_turn(question: str, session_state: SessionState) -> FinalAnswer:
-    """Run one full planner → retriever → evidence → answer cycle with session memory."""
+from src.models.agent_messages import FinalAnswer, RetrievedContext
+from src.tools.retrieval_service import get_retrieval_service
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Seconds each stage of a turn may take (0 or None: no limit)
+STAGE_TIMEOUTS: Dict[str, Optional[float]] = {
+    "planner": PLANNER_TIMEOUT,
+    "retrieval": RETRIEVAL_TIMEOUT,
+    "evidence": EVIDENCE_TIMEOUT,
+    "answer": ANSWER_TIMEOUT,
+}
+
+
+async def _stage(name: str, work: Awaitable[T], timeouts: Dict[str, Optional[float]]) -> T:
+    """
+    Await one stage; a stage running past its timeout is cancelled and reported by name.
+
+    Only this stage's own deadline is reported that way: a TimeoutError raised
+    inside the stage (e.g. a retrieval or evidence timeout) propagates unchanged.
+    """
+    timeout = timeouts.get(name) or None
+    if timeout is None:
+        return await work
+
+    task = asyncio.ensure_future(work)
+    try:
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+    finally:
+        # Also when we are cancelled ourselves
+        if not task.done():
+            task.cancel()
+    if task not in done:
+        # Let the stage finish its cancellation before reporting
+        await asyncio.wait({task})
+        raise TimeoutError(f"{name} stage timed out after {timeout:g}s")
+    return task.result()
+
+
+async def _retrieve(retrieval_tasks) -> RetrievedContext:
+    # Several planned queries are searched in one batch. Adaptive k fetches
+    # up to RETRIEVAL_MAX_K hits and drops the weak tail.
+    if ADAPTIVE_K_ENABLED:
+        contexts = await arun_retrievers(retrieval_tasks, k=RETRIEVAL_MAX_K, timeout=None, adaptive=True)
+    else:
+        contexts = await arun_retrievers(retrieval_tasks, k=5, timeout=None)
+    ctx = merge_contexts(contexts)
+    for d in ctx.decisions:
+        logger.debug("kept %d/%d chunks (%s) for: %s", d.kept, d.fetched, d.reason, d.query)
+
+    # Widen hits with their neighbouring chunks (one batched fetch), if enabled
+    if CONTEXT_NEIGHBORS > 0:
+        ctx = await get_retrieval_service().run_blocking(expand_context, ctx, CONTEXT_NEIGHBORS)
+    return ctx
+
+
+async def ahandle_one_turn(
+    question: str,
+    session_state: SessionState,
+    timeouts: Optional[Dict[str, Optional[float]]] = None,
+) -> FinalAnswer:
+    """
+    Run one full planner → retriever → evidence → answer cycle with session memory,
+    entirely on the caller's event loop.
+
+    Each stage is bounded by `timeouts` (defaults: STAGE_TIMEOUTS) and raises
+    TimeoutError naming the stage that ran out. Cancelling the awaiting task
+    cancels the running stage; session memory is only updated once the
+    answer is complete.
+    """
+    timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
 
     # 1) Build history context for the planner (short-term memory)
     history_context = session_state.build_history_context(max_turns=3)
 
     # 2) Plan with history
-    tasks = plan_question(question, history_context=history_context)
+    tasks = await _stage("planner", aplan_question(question, history_context=history_context), timeouts)
 
-    retrieval_task = next((t for t in tasks if t.task_type == "retrieval"), None)
+    retrieval_tasks = [t for t in tasks if t.task_type == "retrieval"]
     evidence_task = next((t for t in tasks if t.task_type == "evidence"), None)
     answer_task = next((t for t in tasks if t.task_type == "answer"), None)
 
-    if not retrieval_task or not evidence_task or not answer_task:
+    if not retrieval_tasks or not evidence_task or not answer_task:
         raise RuntimeError(f"Planner did not return the expected sequence. Tasks: {tasks}")
 
     # 3) Retrieval
-    ctx = run_retriever(retrieval_task, k=5)
+    ctx = await _stage("retrieval", _retrieve(retrieval_tasks), timeouts)
 
     # 4) Evidence extraction
-    evidence_batch = run_evidence_agent(ctx, question)
+    evidence_batch = await _stage("evidence", arun_evidence_agent(ctx, question), timeouts)
 
     # 5) Final answer
-    final: FinalAnswer = run_answer_agent(evidence_batch)
+    final: FinalAnswer = await _stage("answer", arun_answer_agent(evidence_batch), timeouts)
 
     # 6) Update session memory
     session_state.add_turn(question=question, answer=final.answer)
@@ -39,12 +121,20 @@ def handle_one_turn(question: str, session_state: SessionState) -> FinalAnswer:
     return final
 
 
+def handle_one_turn(question: str, session_state: SessionState) -> FinalAnswer:
+    """Sync facade for the CLI: runs ahandle_one_turn on the AgentRuntime's event loop."""
+    return get_agent_runtime().run_sync(ahandle_one_turn(question, session_state))
+
+
 def main():
     print("Multi-agent research assistant with session memory.")
     print("Type 'exit' to quit.\n")
 
     session_state = SessionState()
 
+    # Open the vector store once, before the first question
+    get_retrieval_service().warm_up()
+
     while True:
         question = input("You: ").strip()
         if not question:
@@ -0,0 +1,101 @@
+# src/tools/adaptive_k.py
+
+from typing import Dict, List, Optional, Tuple
+
+from src.config import RETRIEVAL_MAX_DISTANCE, RETRIEVAL_MIN_GAP, RETRIEVAL_MIN_K
+
+
+def _signal(hits: List[Dict]) -> Tuple[Optional[str], List[int], List[float]]:
+    """
+    The ranking signal to cut on: (signal, positions of the hits it covers,
+    their values).
+
+    "distance" (lower is better) if every hit has one, "score" (BM25, higher
+    is better) for lexical results. Hybrid hits carry RRF scores, which only
+    say how many rankings a chunk appeared in, so for them the gap test runs
+    over the vector distances alone and lexical-only hits are left alone.
+    """
+    if any(h.get("fused") for h in hits):
+        with_distance = [i for i, h in enumerate(hits) if h.get("distance") is not None]
+        if not with_distance:
+            return None, [], []
+        return "distance", with_distance, [float(hits[i]["distance"]) for i in with_distance]
+    if hits and all(h.get("distance") is not None for h in hits):
+        return "distance", list(range(len(hits))), [float(h["distance"]) for h in hits]
+    if hits and all(h.get("score") is not None for h in hits):
+        return "score", list(range(len(hits))), [float(h["score"]) for h in hits]
+    return None, [], []
+
+
+def _relative_drop(better: float, worse: float, signal: str) -> float:
+    """How much worse `worse` is than `better`, relative to the larger magnitude."""
+    if signal == "distance":
+        return (worse - better) / worse if worse > 0 else 0.0
+    return (better - worse) / better if better > 0 else 0.0
+
+
+def adaptive_cut(
+    hits: List[Dict],
+    min_k: int = RETRIEVAL_MIN_K,
+    max_k: Optional[int] = None,
+    max_distance: float = RETRIEVAL_MAX_DISTANCE,
+    min_gap: float = RETRIEVAL_MIN_GAP,
+) -> Tuple[List[Dict], Dict]:
+    """
+    Keep only the hits worth putting in a prompt, out of an over-fetched list.
+
+    1. Hits farther than `max_distance` are dropped (0 disables this; the
+       unit is the vector backend's distance).
+    2. If the largest relative drop between consecutive hits (sorted by
+       distance, or by score for lexical results) is at least `min_gap`,
+       everything after it is dropped. Only drops after the first `min_k`
+       hits count. Hybrid hits are judged by their vector distance only;
+       lexical-only hybrid hits are never cut by the gap test.
+    3. At least `min_k` and at most `max_k` hits are kept; hits keep their
+       original order.
+
+    Returns (kept hits, decision), where decision records what happened:
+    {"fetched", "kept", "reason", "signal", "threshold"} with reason one of
+    "all", "distance_cutoff", "largest_gap", "min_k".
+    """
+    candidates = list(hits[:max_k] if max_k else hits)
+    min_k = max(0, min(min_k, len(candidates)))
+    keep = list(range(len(candidates)))
+    reason = "all"
+    threshold: Optional[float] = None
+
+    if max_distance:
+        within = [i for i in keep if candidates[i].get("distance") is None or candidates[i]["distance"] <= max_distance]
+        if len(within) < len(keep):
+            keep, reason, threshold = within, "distance_cutoff", max_distance
+
+    signal, covered, values = _signal([candidates[i] for i in keep])
+    if signal and min_gap and len(values) > max(min_k, 1):
+        ordered = sorted(values, reverse=(signal == "score"))
+        start = max(min_k, 1) - 1
+        drops = [_relative_drop(ordered[j], ordered[j + 1], signal) for j in range(start, len(ordered) - 1)]
+        best = max(range(len(drops)), key=drops.__getitem__)
+        if drops[best] >= min_gap:
+            cut = ordered[start + best]
+            if signal == "distance":
+                dropped = {keep[c] for c, v in zip(covered, values) if v > cut}
+            else:
+                dropped = {keep[c] for c, v in zip(covered, values) if v < cut}
+            keep = [i for i in keep if i not in dropped]
+            reason, threshold = "largest_gap", cut
+
+    if len(keep) < min_k:
+        # Top up with the best-ranked hits that were cut
+        kept = set(keep)
+        extra = [i for i in range(len(candidates)) if i not in kept][:min_k - len(keep)]
+        keep = sorted(keep + extra)
+        reason = "min_k"
+
+    decision = {
+        "fetched": len(hits),
+        "kept": len(keep),
+        "reason": reason,
+        "signal": signal,
+        "threshold": threshold,
+    }
+    return [candidates[i] for i in keep], decision
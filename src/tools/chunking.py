@@ -0,0 +1,157 @@
+# src/tools/chunking.py
+
+import re
+from bisect import bisect_right
+from typing import Iterator, List, NamedTuple, Sequence, Tuple
+
+from src.config import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+
+# Whitespace after sentence-final punctuation (followed by something that can
+# start a sentence), or a blank line (paragraph break).
+_BOUNDARY = re.compile(r"\n[ \t]*\n\s*|(?<=[.!?])[\"')\]]?\s+(?=[\"'(\[A-Z])")
+_WORD = re.compile(r"\S+")
+
+# Abbreviations that end with a period but rarely end a sentence in papers
+_ABBREVIATIONS = {"al.", "e.g.", "i.e.", "fig.", "figs.", "eq.", "eqs.", "ref.", "sec.", "vs.", "cf.", "dr.", "no."}
+
+
+class TextChunk(NamedTuple):
+    """One chunk plus where it lives in the paper text ("\\n".join(pages))."""
+    text: str
+    start_char: int
+    end_char: int
+    page_start: int  # 1-based
+    page_end: int    # 1-based, inclusive
+
+
+def estimate_tokens(n_chars: int) -> int:
+    """Rough heuristic: ~4 chars ≈ 1 token."""
+    return (n_chars + 3) // 4
+
+
+def _iter_sentences(text: str) -> Iterator[Tuple[int, int, bool]]:
+    """Yield (start, end, ends_paragraph) spans of sentences in `text`."""
+    pos = 0
+    for m in _BOUNDARY.finditer(text):
+        is_paragraph = m.group().count("\n") >= 2
+        if not is_paragraph:
+            # Don't split after "et al." / "Fig." etc.
+            word_start = max(text.rfind(" ", pos, m.start()), text.rfind("\n", pos, m.start())) + 1
+            if text[word_start:m.start()].lower() in _ABBREVIATIONS:
+                continue
+        end = m.start()
+        # Keep a closing quote/bracket with its sentence
+        while end < m.end() and not text[end].isspace():
+            end += 1
+        if end > pos:
+            yield pos, end, is_paragraph
+        pos = m.end()
+    if pos < len(text):
+        yield pos, len(text), True
+
+
+def _split_long_span(text: str, start: int, end: int, max_tokens: int) -> Iterator[Tuple[int, int]]:
+    """Split a sentence that alone exceeds the budget at word boundaries."""
+    piece_start = None
+    piece_end = None
+    for m in _WORD.finditer(text, start, end):
+        if piece_start is None:
+            piece_start = m.start()
+        elif estimate_tokens(m.end() - piece_start) > max_tokens:
+            yield piece_start, piece_end
+            piece_start = m.start()
+        piece_end = m.end()
+    if piece_start is not None:
+        yield piece_start, piece_end
+
+
+def chunk_pages(
+    pages: Sequence[str],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+) -> List[TextChunk]:
+    """
+    Single-pass, structure-aware chunking of a paper's pages.
+
+    - Chunks are built from whole sentences up to `max_tokens` (estimated).
+    - A paragraph break closes the current chunk once it is at least half full.
+    - Sentences longer than the budget are split at word boundaries.
+    - Optionally, trailing sentences up to `overlap_tokens` are repeated at
+      the start of the next chunk (default: no overlap; neighbors can be
+      looked up by offset instead).
+
+    Offsets refer to "\\n".join(pages), the same text the page store keeps.
+    """
+    text = "\n".join(pages)
+
+    # Offset where each page starts in the joined text
+    page_starts: List[int] = []
+    offset = 0
+    for page in pages:
+        page_starts.append(offset)
+        offset += len(page) + 1
+
+    def page_of(char_offset: int) -> int:
+        return max(1, bisect_right(page_starts, char_offset))
+
+    chunks: List[TextChunk] = []
+    current: List[Tuple[int, int]] = []  # sentence spans in the open chunk
+    carried_count = 0  # leading spans of `current` that are overlap from the previous chunk
+
+    def flush() -> None:
+        nonlocal carried_count
+        if len(current) <= carried_count:
+            # Nothing new since the last chunk
+            current.clear()
+            carried_count = 0
+            return
+        start, end = current[0][0], current[-1][1]
+        chunks.append(TextChunk(text[start:end], start, end, page_of(start), page_of(end - 1)))
+
+        # Carry trailing sentences over as overlap
+        carried: List[Tuple[int, int]] = []
+        if overlap_tokens > 0:
+            for span in reversed(current[1:]):
+                if estimate_tokens(end - span[0]) > overlap_tokens:
+                    break
+                carried.insert(0, span)
+        current[:] = carried
+        carried_count = len(carried)
+
+    for start, end, ends_paragraph in _iter_sentences(text):
+        # Trim surrounding whitespace so offsets point at real text
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start == end:
+            continue
+
+        if estimate_tokens(end - start) > max_tokens:
+            flush()
+            current.clear()
+            carried_count = 0
+            for piece in _split_long_span(text, start, end, max_tokens):
+                current[:] = [piece]
+                carried_count = 0
+                flush()
+            current.clear()
+            carried_count = 0
+            continue
+
+        if current and estimate_tokens(end - current[0][0]) > max_tokens:
+            flush()
+            # Drop overlap that would not leave room for this sentence
+            while current and estimate_tokens(end - current[0][0]) > max_tokens:
+                current.pop(0)
+                carried_count -= 1
+
+        current.append((start, end))
+
+        if ends_paragraph and estimate_tokens(end - current[0][0]) >= max_tokens // 2:
+            flush()
+
+    # Whatever is left (flush() skips pure overlap)
+    flush()
+
+    return chunks
@@ -0,0 +1,118 @@
+# src/tools/context_expansion.py
+
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.config import CONTEXT_NEIGHBORS
+from src.tools.retrieval_service import get_retrieval_service
+
+# Shortest suffix/prefix match treated as real overlap when offsets are missing
+_MIN_TEXT_OVERLAP = 20
+
+
+def chunk_id(paper_id: str, chunk_index: int) -> str:
+    """Chroma id of a chunk, as written by ingestion."""
+    return f"{paper_id}::chunk-{chunk_index:04d}"
+
+
+def _text_overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right`."""
+    for size in range(min(len(left), len(right)), _MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def merge_chunk_texts(parts: List[Tuple[str, Dict]]) -> str:
+    """
+    Join consecutive chunks (text, metadata) into one passage, dropping any
+    text repeated between neighbours. Uses the start_char/end_char offsets
+    from ingestion when both sides have them, a suffix/prefix match otherwise.
+    """
+    text = ""
+    prev_end: Optional[int] = None
+    for part, meta in parts:
+        start, end = meta.get("start_char"), meta.get("end_char")
+        if not text:
+            text = part
+        elif prev_end is not None and start is not None:
+            overlap = max(0, prev_end - start)
+            text += part[overlap:] if overlap else " " + part
+        else:
+            overlap = _text_overlap(text, part)
+            text += part[overlap:] if overlap else " " + part
+        prev_end = end
+    return text
+
+
+def _runs(indices: Set[int]) -> List[Tuple[int, int]]:
+    """Sorted indices → inclusive (first, last) ranges of consecutive values."""
+    runs: List[Tuple[int, int]] = []
+    for i in sorted(indices):
+        if runs and i == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], i)
+        else:
+            runs.append((i, i))
+    return runs
+
+
+def expand_hits(hits: List[Dict], n: int = CONTEXT_NEIGHBORS, service=None) -> List[Dict]:
+    """
+    Widen each hit to its ±n neighbouring chunks and merge what touches.
+
+    All neighbour ids ({paper_id}::chunk-{idx:04d}) are fetched in one
+    `collection.get`. Hits whose windows overlap or are adjacent end up in
+    the same contiguous, de-overlapped window. Windows come out in the rank
+    of their best hit and keep that hit's fields (distance, score,
+    chunk_index), plus:
+      chunk_range: [first, last] chunk index covered by the window
+      hit_indices: chunk indices of the hits merged into it
+    Hits without paper_id/chunk_index are passed through unchanged.
+    """
+    if n <= 0 or not hits:
+        return hits
+    service = service or get_retrieval_service()
+
+    wanted: Dict[str, Set[int]] = {}
+    for h in hits:
+        if h.get("paper_id") is None or h.get("chunk_index") is None:
+            continue
+        idx = int(h["chunk_index"])
+        wanted.setdefault(h["paper_id"], set()).update(range(max(0, idx - n), idx + n + 1))
+
+    fetched = service.get_chunks([chunk_id(p, i) for p, indices in wanted.items() for i in sorted(indices)])
+
+    # Texts per (paper, index); a hit missing from the store keeps its own text
+    texts: Dict[Tuple[str, int], Tuple[str, Dict]] = {}
+    for paper_id, indices in wanted.items():
+        for i in indices:
+            if chunk_id(paper_id, i) in fetched:
+                texts[(paper_id, i)] = fetched[chunk_id(paper_id, i)]
+    for h in hits:
+        if h.get("paper_id") is not None and h.get("chunk_index") is not None:
+            texts.setdefault((h["paper_id"], int(h["chunk_index"])), (h["text"], {}))
+
+    run_of: Dict[Tuple[str, int], Tuple[int, int]] = {}
+    for paper_id in wanted:
+        for run in _runs({i for p, i in texts if p == paper_id}):
+            for i in range(run[0], run[1] + 1):
+                run_of[(paper_id, i)] = run
+
+    out: List[Dict] = []
+    windows: Dict[Tuple[str, Tuple[int, int]], Dict] = {}
+    for h in hits:
+        if h.get("paper_id") is None or h.get("chunk_index") is None:
+            out.append(h)
+            continue
+        paper_id, idx = h["paper_id"], int(h["chunk_index"])
+        run = run_of[(paper_id, idx)]
+        window = windows.get((paper_id, run))
+        if window is not None:
+            window["hit_indices"].append(idx)
+            continue
+        window = dict(h)
+        window["text"] = merge_chunk_texts([texts[(paper_id, i)] for i in range(run[0], run[1] + 1)])
+        window["chunk_range"] = [run[0], run[1]]
+        window["hit_indices"] = [idx]
+        windows[(paper_id, run)] = window
+        out.append(window)
+    return out
@@ -0,0 +1,83 @@
+# src/tools/ingest_manifest.py
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class ManifestEntry(BaseModel):
+    """What we remember about one ingested PDF."""
+    source: str          # PDF filename
+    sha256: str          # content hash of the file
+    size: int            # bytes
+    mtime: float         # modification time at ingestion
+    date: Optional[str] = None   # paper date (YYYY-MM-DD) from PDF metadata; "" if unknown
+    chunk_ids: List[str] = []
+
+
+class IngestManifest:
+    """
+    JSON manifest of ingested PDFs, keyed by paper_id.
+
+    Used by build_or_update_vector_store to decide which PDFs are new,
+    changed or removed since the last run, and which chunk ids to delete.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries: Dict[str, ManifestEntry] = {}
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.entries = {
+                paper_id: ManifestEntry(**entry)
+                for paper_id, entry in data.get("papers", {}).items()
+            }
+
+    def get(self, paper_id: str) -> Optional[ManifestEntry]:
+        return self.entries.get(paper_id)
+
+    def set(self, paper_id: str, entry: ManifestEntry) -> None:
+        self.entries[paper_id] = entry
+
+    def remove(self, paper_id: str) -> Optional[ManifestEntry]:
+        return self.entries.pop(paper_id, None)
+
+    def save(self) -> None:
+        """Atomically write the manifest (write temp file, then rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        payload = {
+            "papers": {
+                paper_id: entry.model_dump()
+                for paper_id, entry in sorted(self.entries.items())
+            }
+        }
+        tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def is_unchanged(entry: Optional[ManifestEntry], pdf_path: Path) -> bool:
+    """
+    Cheap check first (size + mtime); only hash the file when those differ,
+    so a touched-but-identical PDF is still recognized as unchanged.
+    """
+    if entry is None:
+        return False
+    stat = pdf_path.stat()
+    if entry.size == stat.st_size and entry.mtime == stat.st_mtime:
+        return True
+    if entry.size != stat.st_size:
+        return False
+    return entry.sha256 == file_sha256(pdf_path)
@@ -0,0 +1,47 @@
+# src/tools/page_store.py
+
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+from src.config import CHUNK_STORAGE
+
+
+class PageTextStore:
+    """
+    On-disk store of extracted page text, keyed by PDF content hash.
+
+    Layout: <root>/<sha[:2]>/<sha>.json.gz, each file holding the list of
+    page strings. Because the key is the content hash, renamed or re-copied
+    PDFs still hit, and any change to the PDF naturally misses.
+    """
+
+    def __init__(self, root: str = str(Path(CHUNK_STORAGE) / "pages")):
+        self.root = Path(root)
+
+    def _path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / f"{sha256}.json.gz"
+
+    def get(self, sha256: str) -> Optional[List[str]]:
+        path = self._path(sha256)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # Truncated/corrupt entry: treat as a miss, it will be rewritten
+            return None
+
+    def put(self, sha256: str, pages: List[str]) -> None:
+        path = self._path(sha256)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(pages, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def __contains__(self, sha256: str) -> bool:
+        return self._path(sha256).exists()
@@ -0,0 +1,58 @@
+# src/tools/paper_index.py
+
+from typing import Dict, List, Optional
+
+from src.config import INGEST_MANIFEST_PATH
+from src.models.agent_messages import SearchFilters
+from src.tools.ingest_manifest import IngestManifest
+
+
+def _date_bound(value: Optional[str], upper: bool) -> str:
+    """Pad a partial ISO date ("2023", "2023-05") to the first/last possible day."""
+    if not value:
+        return "9999-12-31" if upper else ""
+    padding = "-12-31" if upper else "-01-01"
+    return value + padding[len(value) - 4:] if len(value) < 10 else value
+
+
+class PaperIndex:
+    """
+    Precomputed paper → chunk-id lookups, built from the ingest manifest.
+
+    Turns SearchFilters into the exact list of chunk ids to search, so a
+    filter on one paper (or a few) only touches those chunks instead of
+    over-fetching a large k and dropping hits afterwards.
+    """
+
+    def __init__(self, manifest_path: str = INGEST_MANIFEST_PATH):
+        manifest = IngestManifest(manifest_path)
+        self.chunk_ids_by_paper: Dict[str, List[str]] = {}
+        self.paper_by_source: Dict[str, str] = {}
+        self.date_by_paper: Dict[str, str] = {}
+        for paper_id, entry in manifest.entries.items():
+            self.chunk_ids_by_paper[paper_id] = list(entry.chunk_ids)
+            self.paper_by_source[entry.source] = paper_id
+            if entry.date:
+                self.date_by_paper[paper_id] = entry.date
+
+    def papers(self, filters: SearchFilters) -> List[str]:
+        """Paper ids matching every condition in `filters`, sorted."""
+        candidates = set(self.chunk_ids_by_paper)
+        if filters.paper_ids:
+            candidates &= set(filters.paper_ids)
+        if filters.sources:
+            candidates &= {self.paper_by_source[s] for s in filters.sources if s in self.paper_by_source}
+        if filters.date_from or filters.date_to:
+            # ISO dates compare correctly as strings; papers without a date never match
+            low, high = _date_bound(filters.date_from, False), _date_bound(filters.date_to, True)
+            candidates = {
+                p for p in candidates
+                if p in self.date_by_paper and low <= self.date_by_paper[p] <= high
+            }
+        return sorted(candidates)
+
+    def chunk_ids(self, filters: Optional[SearchFilters]) -> Optional[List[str]]:
+        """Chunk ids to search for `filters`; None means "no restriction"."""
+        if filters is None or filters.is_empty():
+            return None
+        return [cid for paper_id in self.papers(filters) for cid in self.chunk_ids_by_paper[paper_id]]
@@ -0,0 +1,126 @@
+# src/tools/pdf_extract.py
+
+import signal
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, List, Tuple
+
+from pypdf import PdfReader
+
+from src.config import INGEST_EXTRACT_WORKERS, INGEST_PAGE_TIMEOUT, INGEST_PAGES_PER_TASK
+
+
+class PageTimeout(BaseException):
+    """
+    Raised inside a page extraction that ran longer than its budget.
+
+    A BaseException so pypdf's lenient `except Exception` handlers can't
+    swallow it and carry on parsing the hung page.
+    """
+
+
+def _on_alarm(signum, frame):
+    raise PageTimeout()
+
+
+def extract_page_text(page, timeout: float = INGEST_PAGE_TIMEOUT) -> str:
+    """
+    Extract the text of one pypdf page; errors and timeouts yield "".
+
+    The timeout uses SIGALRM, so it only applies on Unix and in the main
+    thread (which is where both the serial path and pool workers run).
+    """
+    use_alarm = (
+        timeout
+        and hasattr(signal, "SIGALRM")
+        and threading.current_thread() is threading.main_thread()
+    )
+    if not use_alarm:
+        try:
+            return page.extract_text() or ""
+        except Exception:
+            return ""
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return page.extract_text() or ""
+    except PageTimeout:
+        print(f"  Page extraction exceeded {timeout}s; skipping page.")
+        return ""
+    except Exception:
+        return ""
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_page_range(pdf_path: str, start: int, end: int, page_timeout: float) -> List[str]:
+    """Worker entry point: text of pages [start, end) of one PDF."""
+    reader = PdfReader(pdf_path)
+    return [extract_page_text(reader.pages[i], page_timeout) for i in range(start, end)]
+
+
+def _plan_tasks(pdf_paths: Iterable[Path], pages_per_task: int) -> Iterator[Tuple[Path, int, int, bool]]:
+    """
+    Split PDFs into (path, start_page, end_page, is_last_range) work units.
+    Small PDFs are one unit; large ones are split into page ranges.
+    """
+    for pdf_path in pdf_paths:
+        n_pages = len(PdfReader(str(pdf_path)).pages)
+        if n_pages == 0:
+            yield pdf_path, 0, 0, True
+            continue
+        for start in range(0, n_pages, pages_per_task):
+            end = min(start + pages_per_task, n_pages)
+            yield pdf_path, start, end, end == n_pages
+
+
+def iter_extracted_pdfs(
+    pdf_paths: List[Path],
+    max_workers: int = INGEST_EXTRACT_WORKERS,
+    pages_per_task: int = INGEST_PAGES_PER_TASK,
+    page_timeout: float = INGEST_PAGE_TIMEOUT,
+) -> Iterator[Tuple[Path, List[str]]]:
+    """
+    Yield (pdf_path, page_texts) for each PDF, in input order.
+
+    With max_workers > 1, page ranges are extracted on a process pool.
+    Only about 2 × max_workers ranges are in flight at a time, so memory
+    stays bounded even for large corpora.
+    """
+    if max_workers <= 1:
+        for pdf_path in pdf_paths:
+            reader = PdfReader(str(pdf_path))
+            yield pdf_path, [extract_page_text(page, page_timeout) for page in reader.pages]
+        return
+
+    tasks = _plan_tasks(pdf_paths, max(1, pages_per_task))
+    max_in_flight = 2 * max_workers
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        in_flight: Deque = deque()
+
+        def submit_next() -> bool:
+            task = next(tasks, None)
+            if task is None:
+                return False
+            pdf_path, start, end, is_last = task
+            future = pool.submit(extract_page_range, str(pdf_path), start, end, page_timeout)
+            in_flight.append((pdf_path, is_last, future))
+            return True
+
+        while len(in_flight) < max_in_flight and submit_next():
+            pass
+
+        pages: List[str] = []
+        while in_flight:
+            # Consume futures in submission order → deterministic output order
+            pdf_path, is_last, future = in_flight.popleft()
+            pages.extend(future.result())
+            submit_next()
+            if is_last:
+                yield pdf_path, pages
+                pages = []
@@ -1,113 +1,563 @@
 # src/tools/pdf_ingest.py
+import time
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict
-import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import chromadb
+from pydantic import BaseModel
 from pypdf import PdfReader
 
-from src.config import PDF_STORAGE, CHROMA_DB_PATH
-from src.embeddings import GeminiEmbeddingFunction
+from src.config import (
+    PDF_STORAGE,
+    CHROMA_DB_PATH,
+    INGEST_MANIFEST_PATH,
+    INGEST_BATCH_SIZE,
+    INGEST_EXTRACT_WORKERS,
+    CHUNK_MAX_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
+    NEAR_DUP_MODE,
+    VECTOR_BACKEND,
+)
+from src.embeddings import HashingEmbeddingFunction, get_embedding_function
+from src.tools.ingest_manifest import IngestManifest, ManifestEntry, file_sha256, is_unchanged
+from src.tools.chunking import chunk_pages
+from src.tools.pdf_extract import extract_page_text, iter_extracted_pdfs
+from src.tools.page_store import PageTextStore
+from src.tools.retrieval_service import reload_retrieval_service
+from src.utils.bm25_index import BM25Index
+from src.utils.numpy_index import NumpyVectorIndex, sync_from_collection
+from src.utils.retrieval_cache import bump_collection_version
+from src.utils.near_dup import NearDuplicateIndex, minhash_signature
 
+# (chunk_id, document, metadata) as written to Chroma
+ChunkRecord = Tuple[str, str, Dict]
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
+
+class IngestStats(BaseModel):
+    """Counters and per-stage wall-clock seconds for one ingestion run."""
+    papers: int = 0
+    pages: int = 0
+    chunks: int = 0
+    duplicates: int = 0
+    batches: int = 0
+    extract_seconds: float = 0.0   # PDF parsing (or page-store reads)
+    chunk_seconds: float = 0.0
+    dedup_seconds: float = 0.0     # MinHash + LSH lookups
+    embed_seconds: float = 0.0
+    write_seconds: float = 0.0     # Chroma upserts/deletes
+    total_seconds: float = 0.0
+
+
+def iter_pdf_pages(pdf_path: Path) -> Iterator[str]:
+    """Yield the text of each page; unreadable pages yield an empty string."""
     reader = PdfReader(str(pdf_path))
-    pages = []
     for page in reader.pages:
-        try:
-            pages.append(page.extract_text() or "")
-        except Exception:
-            pages.append("")
-    return "\n".join(pages)
+        yield extract_page_text(page)
+
+
+def paper_date(pdf_path: Path) -> str:
+    """Creation date from the PDF metadata as YYYY-MM-DD; "" if absent or unreadable."""
+    try:
+        created = PdfReader(str(pdf_path)).metadata.creation_date
+    except Exception:
+        return ""
+    return created.date().isoformat() if created else ""
+
+
+def extract_text_from_pdf(pdf_path: Path) -> str:
+    return "\n".join(iter_pdf_pages(pdf_path))
+
+
+def load_pdf_pages(pdf_path: Path, store: Optional[PageTextStore] = None) -> List[str]:
+    """
+    Page text of a PDF, served from the page store when this exact file
+    content was extracted before. Handy for chunking experiments.
+    """
+    store = store or PageTextStore()
+    sha = file_sha256(pdf_path)
+    pages = store.get(sha)
+    if pages is None:
+        pages = list(iter_pdf_pages(pdf_path))
+        store.put(sha, pages)
+    return pages
 
 
 def chunk_text(
     text: str,
-    chunk_size: int = 1200,
-    chunk_overlap: int = 200,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
 ) -> List[str]:
     """
-    Very simple character-based chunking with overlap.
-    Rough heuristic: ~4 chars ≈ 1 token, so 1200 chars ≈ 300 tokens.
+    Sentence/paragraph-aware chunking of a plain string (see chunk_pages).
+    Rough heuristic: ~4 chars ≈ 1 token, so 300 tokens ≈ 1200 chars.
+    """
+    return [c.text for c in chunk_pages([text], max_tokens, overlap_tokens)]
+
+
+def iter_paper_chunks(pdf_path: Path, pages: Optional[Iterable[str]] = None) -> Iterator[ChunkRecord]:
+    """
+    PDF → pages → chunks, yielding one Chroma record per chunk.
+    Pass `pages` if the page text was already extracted (e.g. by a worker pool).
+
+    Metadata records each chunk's character offsets into "\n".join(pages)
+    and the (1-based) pages it spans.
+    """
+    paper_id = pdf_path.stem  # filename without extension
+    if pages is None:
+        pages = iter_pdf_pages(pdf_path)
+
+    for idx, chunk in enumerate(chunk_pages(list(pages))):
+        chunk_id = f"{paper_id}::chunk-{idx:04d}"
+        yield (
+            chunk_id,
+            chunk.text,
+            {
+                "paper_id": paper_id,
+                "chunk_index": idx,
+                "source": str(pdf_path.name),
+                "start_char": chunk.start_char,
+                "end_char": chunk.end_char,
+                "page_start": chunk.page_start,
+                "page_end": chunk.page_end,
+            },
+        )
+
+
+def _batched(records: Iterable[ChunkRecord], batch_size: int) -> Iterator[List[ChunkRecord]]:
+    it = iter(records)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _iter_pages(
+    pdf_files: List[Path],
+    hashes: Dict[Path, str],
+    store: PageTextStore,
+    extract_workers: int,
+) -> Iterator[Tuple[Path, List[str]]]:
+    """
+    (pdf_path, pages) in input order: cached PDFs come from the page store,
+    the rest are extracted (possibly in parallel) and written to the store.
+
+    Stored pages are read lazily, one PDF at a time, so memory stays flat
+    even when every PDF is cached (e.g. --rechunk).
+    """
+    stored = {p for p in pdf_files if hashes[p] in store}
+    to_extract = [p for p in pdf_files if p not in stored]
+    if stored:
+        print(f"Reusing stored page text for {len(stored)} PDF(s).")
+
+    extracted = iter_extracted_pdfs(to_extract, max_workers=extract_workers)
+    for pdf_path in pdf_files:
+        if pdf_path in stored:
+            pages = store.get(hashes[pdf_path])
+            if pages is None:
+                # Corrupt store entry: re-extract this one PDF serially
+                _, pages = next(iter_extracted_pdfs([pdf_path], max_workers=1))
+                store.put(hashes[pdf_path], pages)
+        else:
+            # iter_extracted_pdfs keeps input order, so the next result is this PDF
+            _, pages = next(extracted)
+            store.put(hashes[pdf_path], pages)
+        yield pdf_path, pages
+        del pages
+
+
+def _iter_corpus_chunks(
+    pdf_files: List[Path],
+    manifest: IngestManifest,
+    finished: List[Tuple[str, ManifestEntry, List[str]]],
+    extract_workers: int = INGEST_EXTRACT_WORKERS,
+    rechunk: bool = False,
+    near_dups: Optional[NearDuplicateIndex] = None,
+    near_dup_mode: str = NEAR_DUP_MODE,
+    force_ids: Optional[Set[str]] = None,
+    stats: Optional[IngestStats] = None,
+) -> Iterator[ChunkRecord]:
+    """
+    Stream chunk records for every new or changed PDF (every PDF if `rechunk`,
+    plus any paper in `force_ids`).
+
+    When a paper has been fully consumed, (paper_id, manifest entry, stale ids)
+    is appended to `finished`; the writer commits it once its chunks are stored.
+
+    With a NearDuplicateIndex, each chunk is fingerprinted before it reaches
+    the embedder; near-duplicates of an already indexed chunk are dropped
+    ("skip") or tagged with `duplicate_of` ("link").
+    """
+    force_ids = force_ids or set()
+    changed: List[Path] = []
+    for pdf_path in pdf_files:
+        previous = manifest.get(pdf_path.stem)
+
+        if not rechunk and pdf_path.stem not in force_ids and is_unchanged(previous, pdf_path):
+            mtime = pdf_path.stat().st_mtime
+            if previous.mtime != mtime:
+                # Touched but identical content: just refresh the mtime
+                previous.mtime = mtime
+            if previous.date is None:
+                # Entry written before paper dates were recorded
+                previous.date = paper_date(pdf_path)
+            continue
+        changed.append(pdf_path)
+
+    if near_dups is not None and changed:
+        # Papers whose duplicates point into a re-processed paper lose their
+        # canonical chunks, so re-process them too (until nothing new is pulled in)
+        redo = {p.stem for p in changed}
+        while True:
+            extra = near_dups.dependents_of(redo) & {p.stem for p in pdf_files}
+            if not extra - redo:
+                break
+            redo |= extra
+        changed = [p for p in pdf_files if p.stem in redo]
+        # Forget old fingerprints up front so papers don't match their own stale chunks
+        for paper_id in redo:
+            near_dups.remove_paper(paper_id)
+        near_dups.commit()
+
+    skipped = len(pdf_files) - len(changed)
+    if skipped:
+        print(f"Skipped {skipped} unchanged PDF(s).")
+
+    hashes = {pdf_path: file_sha256(pdf_path) for pdf_path in changed}
+    stats = stats or IngestStats()
+
+    pages_iter = _iter_pages(changed, hashes, PageTextStore(), extract_workers)
+    while True:
+        t0 = time.perf_counter()
+        item = next(pages_iter, None)
+        stats.extract_seconds += time.perf_counter() - t0
+        if item is None:
+            break
+        pdf_path, pages = item
+
+        paper_id = pdf_path.stem
+        previous = manifest.get(paper_id)
+        stat = pdf_path.stat()
+
+        print(f"Processing {pdf_path.name} (paper_id={paper_id})")
+
+        t0 = time.perf_counter()
+        records = list(iter_paper_chunks(pdf_path, pages))
+        stats.chunk_seconds += time.perf_counter() - t0
+        stats.papers += 1
+        stats.pages += len(pages)
+
+        chunk_ids: List[str] = []
+        duplicates = 0
+        for record in records:
+            if near_dups is not None:
+                t0 = time.perf_counter()
+                chunk_id, document, meta = record
+                signature = minhash_signature(document)
+                # Chunks without words aren't fingerprinted (nothing to compare)
+                canonical = near_dups.find_canonical(signature) if signature is not None else None
+                if canonical is None:
+                    if signature is not None:
+                        near_dups.add(chunk_id, paper_id, signature)
+                else:
+                    near_dups.add_duplicate(chunk_id, paper_id, *canonical)
+                    duplicates += 1
+                stats.dedup_seconds += time.perf_counter() - t0
+                if canonical is not None:
+                    if near_dup_mode == "skip":
+                        continue
+                    record = (chunk_id, document, {**meta, "duplicate_of": canonical[0]})
+
+            chunk_ids.append(record[0])
+            yield record
+
+        stats.duplicates += duplicates
+        if near_dups is not None:
+            near_dups.commit()
+            if duplicates:
+                action = "skipped" if near_dup_mode == "skip" else "linked"
+                print(f"  {duplicates} near-duplicate chunk(s) {action}")
+
+        # A shorter new version leaves old trailing chunks behind: delete them
+        stale_ids: List[str] = []
+        if previous is not None:
+            kept = set(chunk_ids)
+            stale_ids = [cid for cid in previous.chunk_ids if cid not in kept]
+
+        entry = ManifestEntry(
+            source=pdf_path.name,
+            sha256=hashes[pdf_path],
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            date=paper_date(pdf_path),
+            chunk_ids=chunk_ids,
+        )
+        finished.append((paper_id, entry, stale_ids))
+
+
+def _upsert_embedded(collection, embedding_fn, records: List[ChunkRecord], stats: IngestStats) -> None:
+    ids, documents, metadatas = (list(col) for col in zip(*records))
+    t0 = time.perf_counter()
+    embeddings = embedding_fn(documents)
+    stats.embed_seconds += time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+    stats.write_seconds += time.perf_counter() - t0
+
+
+def _write_batch(collection, embedding_fn, batch: List[ChunkRecord], stats: IngestStats) -> None:
+    """
+    Embed and upsert one batch. Embedding is done here rather than inside
+    Chroma so the two stages can be timed separately. Chunks linked to a
+    canonical chunk ("link" mode) reuse its stored embedding.
     """
-    chunks = []
-    start = 0
-    text_length = len(text)
+    # Upsert merges metadata; None clears a duplicate_of left by an earlier run
+    originals = [(i, d, {**m, "duplicate_of": None}) for i, d, m in batch if "duplicate_of" not in m]
+    linked = [r for r in batch if "duplicate_of" in r[2]]
+
+    if originals:
+        _upsert_embedded(collection, embedding_fn, originals, stats)
+
+    if linked:
+        t0 = time.perf_counter()
+        # Canonicals are either in an earlier batch or in `originals` above
+        canonical_ids = list({r[2]["duplicate_of"] for r in linked})
+        stored = collection.get(ids=canonical_ids, include=["embeddings"])
+        embedding_by_id = dict(zip(stored["ids"], stored["embeddings"]))
 
-    while start < text_length:
-        end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk)
-        start += chunk_size - chunk_overlap
+        reuse = [r for r in linked if r[2]["duplicate_of"] in embedding_by_id]
+        if reuse:
+            ids, documents, metadatas = (list(col) for col in zip(*reuse))
+            collection.upsert(
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas,
+                embeddings=[embedding_by_id[m["duplicate_of"]] for m in metadatas],
+            )
+        stats.write_seconds += time.perf_counter() - t0
 
-    return chunks
+        missing = [r for r in linked if r[2]["duplicate_of"] not in embedding_by_id]
+        if missing:
+            _upsert_embedded(collection, embedding_fn, missing, stats)
 
 
-def build_or_update_vector_store():
+def _sync_lexical_index(lexical: BM25Index, collection, manifest: IngestManifest, batch_size: int) -> None:
+    """
+    Bring the BM25 index in line with the manifest before ingesting: indexes
+    stored chunks it is missing (first run, or a run interrupted before the
+    index was saved) and drops ids that are no longer stored.
     """
-    Walk over PDF_STORAGE, ingest all PDFs, and store chunks in Chroma.
-    This is idempotent-ish: we generate ids that include the filename
-    so you can later detect duplicates if you want.
+    expected = {cid for entry in manifest.entries.values() for cid in entry.chunk_ids}
+    indexed = lexical.ids()
+    lexical.remove(indexed - expected)
+
+    missing = sorted(expected - indexed)
+    if missing:
+        print(f"Indexing {len(missing)} stored chunk(s) for lexical search")
+    for i in range(0, len(missing), batch_size):
+        stored = collection.get(ids=missing[i:i + batch_size], include=["documents"])
+        lexical.add_many(stored["ids"], stored["documents"])
+
+
+def build_or_update_vector_store(
+    batch_size: int = INGEST_BATCH_SIZE,
+    extract_workers: int = INGEST_EXTRACT_WORKERS,
+    rechunk: bool = False,
+    near_dup_mode: str = NEAR_DUP_MODE,
+    embedding_fn=None,
+    stats: Optional[IngestStats] = None,
+) -> IngestStats:
+    """
+    Walk over PDF_STORAGE, ingest new or changed PDFs, and store chunks in Chroma.
+
+    Incremental: a manifest (INGEST_MANIFEST_PATH) remembers the hash, size,
+    mtime and chunk ids of every ingested PDF, so a rerun only re-chunks and
+    re-embeds PDFs that changed. Chunks are written with upsert, and chunks
+    belonging to removed or shrunken papers are deleted.
+
+    Streaming: PDFs flow through a generator pipeline
+    (PDF → pages → chunks → fixed-size batches → Chroma upsert), so memory
+    stays flat regardless of corpus size. A paper is recorded in the manifest
+    as soon as all of its chunks are written, so a crash only loses the
+    papers that were in flight.
+
+    With extract_workers > 1, PDF text extraction (the slowest stage for large
+    PDFs) runs on a process pool; large PDFs are split into page ranges.
+
+    Extracted page text is kept in a PageTextStore under CHUNK_STORAGE, keyed
+    by PDF content hash. Pass rechunk=True after changing chunking parameters:
+    every PDF is re-chunked from the stored text without re-parsing it.
+
+    Near-duplicate chunks (shared boilerplate, repeated preprint versions)
+    are detected with MinHash + LSH before embedding; `near_dup_mode` is
+    "skip" (don't store them), "link" (store with the canonical chunk's
+    embedding and a `duplicate_of` id) or "off".
+
+    The BM25 index used for lexical/hybrid retrieval is updated alongside
+    Chroma and saved at the end of the run. With VECTOR_BACKEND=numpy, the
+    memory-mapped NumpyVectorIndex is brought in line with Chroma as well.
+
+    `embedding_fn` defaults to the configured backend (get_embedding_function).
+    Returns an IngestStats with counters and per-stage timings.
     """
+    if near_dup_mode not in {"skip", "link", "off"}:
+        raise ValueError(f"near_dup_mode must be 'skip', 'link' or 'off', got {near_dup_mode!r}")
+
+    started = time.perf_counter()
+
     pdf_dir = Path(PDF_STORAGE)
-    pdf_files = list(pdf_dir.glob("*.pdf"))
+    pdf_files = sorted(pdf_dir.glob("*.pdf"))
+
+    manifest = IngestManifest(INGEST_MANIFEST_PATH)
+    stats = stats or IngestStats()
 
-    if not pdf_files:
+    if not pdf_files and not manifest.entries:
         print(f"No PDFs found in {pdf_dir}. Add at least one and rerun.")
-        return
+        return stats
 
     print(f"Found {len(pdf_files)} PDF(s) in {pdf_dir}")
 
     # Set up Chroma persistent client
     client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
-    embedding_fn = GeminiEmbeddingFunction()
+    embedding_fn = embedding_fn or get_embedding_function()
 
     collection = client.get_or_create_collection(
         name="research_papers",
         embedding_function=embedding_fn,
     )
 
-    all_documents: List[str] = []
-    all_metadatas: List[Dict] = []
-    all_ids: List[str] = []
-
-    for pdf_path in pdf_files:
-        paper_id = pdf_path.stem  # filename without extension
-        print(f"Processing {pdf_path.name} (paper_id={paper_id})")
+    # Chroma rejects writes above its max batch size
+    batch_size = max(1, min(batch_size, client.get_max_batch_size()))
 
-        text = extract_text_from_pdf(pdf_path)
-        chunks = chunk_text(text)
+    near_dups = NearDuplicateIndex() if near_dup_mode != "off" else None
+    lexical = BM25Index()
 
-        for idx, chunk in enumerate(chunks):
-            if not chunk.strip():
-                continue
+    # Papers whose PDF disappeared: drop all their chunks
+    present = {pdf_path.stem for pdf_path in pdf_files}
+    removed = sorted(set(manifest.entries) - present)
+    for paper_id in removed:
+        entry = manifest.remove(paper_id)
+        print(f"Removing {entry.source} (paper_id={paper_id}): PDF no longer present")
+        if entry.chunk_ids:
+            collection.delete(ids=entry.chunk_ids)
+    if removed:
+        manifest.save()
 
-            chunk_id = f"{paper_id}::chunk-{idx:04d}"
+    _sync_lexical_index(lexical, collection, manifest, batch_size)
 
-            all_documents.append(chunk)
-            all_metadatas.append(
-                {
-                    "paper_id": paper_id,
-                    "chunk_index": idx,
-                    "source": str(pdf_path.name),
-                }
-            )
-            all_ids.append(chunk_id)
+    # Papers that had duplicates of the removed ones must be re-ingested
+    force_ids: Set[str] = set()
+    if near_dups is not None and removed:
+        force_ids = near_dups.dependents_of(removed) & present
+        for paper_id in removed:
+            near_dups.remove_paper(paper_id)
+        near_dups.commit()
 
-    if not all_documents:
-        print("No non-empty chunks to add.")
-        return
+    finished: List[Tuple[str, ManifestEntry, List[str]]] = []
+    deleted_stale = False
 
-    print(f"Adding {len(all_documents)} chunks to Chroma collection 'research_papers'...")
+    def commit_finished() -> None:
+        nonlocal deleted_stale
+        # Every paper in `finished` has had all of its chunks written by now
+        if not finished:
+            return
+        for paper_id, entry, stale_ids in finished:
+            if stale_ids:
+                collection.delete(ids=stale_ids)
+                lexical.remove(stale_ids)
+                deleted_stale = True
+            manifest.set(paper_id, entry)
+        finished.clear()
+        manifest.save()
 
-    collection.add(
-        ids=all_ids,
-        documents=all_documents,
-        metadatas=all_metadatas,
+    records = _iter_corpus_chunks(
+        pdf_files,
+        manifest,
+        finished,
+        extract_workers,
+        rechunk,
+        near_dups=near_dups,
+        near_dup_mode=near_dup_mode,
+        force_ids=force_ids,
+        stats=stats,
     )
 
-    print("Ingestion complete.")
+    total = 0
+    written_ids: Set[str] = set()
+    for batch_no, batch in enumerate(_batched(records, batch_size), start=1):
+        _write_batch(collection, embedding_fn, batch, stats)
+        t0 = time.perf_counter()
+        lexical.add_many([r[0] for r in batch], [r[1] for r in batch])
+        written_ids.update(r[0] for r in batch)
+        stats.write_seconds += time.perf_counter() - t0
+        stats.batches += 1
+        total += len(batch)
+        elapsed = time.perf_counter() - started
+        print(
+            f"  [batch {batch_no}] upserted {len(batch)} chunks "
+            f"(total {total}, {total / elapsed if elapsed else 0.0:.1f} chunks/s)"
+        )
+        commit_finished()
+
+    # Papers that finished after the last full batch (or produced no chunks)
+    commit_finished()
+    # Persist refreshed mtimes of unchanged PDFs
+    manifest.save()
+    if near_dups is not None:
+        near_dups.close()
+
+    if not total:
+        print("No new or changed chunks to add.")
+
+    stats.chunks += total
+    indexes_changed = lexical.dirty
+    lexical.save()
+    if VECTOR_BACKEND == "numpy":
+        expected = {cid for entry in manifest.entries.values() for cid in entry.chunk_ids}
+        indexes_changed |= sync_from_collection(NumpyVectorIndex(), collection, expected, written_ids, batch_size)
+    if total or removed or deleted_stale or indexes_changed:
+        # Invalidates cached retrieval results in every process
+        bump_collection_version()
+    # Let a long-lived retrieval service in this process see the new chunks
+    reload_retrieval_service()
+    stats.total_seconds += time.perf_counter() - started
+    print(f"Ingestion complete. Upserted {total} chunks into 'research_papers'.")
+    return stats
+
+
+def fit_hashing_idf() -> None:
+    """
+    Fit the local hashing backend's IDF table on the chunks of every PDF.
+    Run before ingesting with EMBEDDING_BACKEND=hashing.
+    """
+    texts = [
+        record[1]
+        for pdf_path in sorted(Path(PDF_STORAGE).glob("*.pdf"))
+        for record in iter_paper_chunks(pdf_path, load_pdf_pages(pdf_path))
+    ]
+    embedding_fn = HashingEmbeddingFunction()
+    embedding_fn.fit_idf(texts)
+    print(f"Fitted IDF over {len(texts)} chunks → {embedding_fn.idf_path}")
 
 
 if __name__ == "__main__":
-    build_or_update_vector_store()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest PDFs from PDF_STORAGE into Chroma.")
+    parser.add_argument(
+        "--rechunk",
+        action="store_true",
+        help="re-chunk every PDF from stored page text (e.g. after changing chunking parameters)",
+    )
+    parser.add_argument(
+        "--fit-idf",
+        action="store_true",
+        help="fit the IDF table of the local hashing embedding backend, then exit",
+    )
+    args = parser.parse_args()
+    if args.fit_idf:
+        fit_hashing_idf()
+    else:
+        build_or_update_vector_store(rechunk=args.rechunk)
@@ -0,0 +1,391 @@
+# src/tools/retrieval_service.py
+
+import asyncio
+import functools
+import os
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import chromadb
+import numpy as np
+from chromadb.api.client import SharedSystemClient
+
+from src.config import (
+    BM25_INDEX_PATH,
+    CHROMA_DB_PATH,
+    COLLECTION_VERSION_PATH,
+    INGEST_MANIFEST_PATH,
+    NUMPY_INDEX_DTYPE,
+    NUMPY_INDEX_PATH,
+    QUERY_EMBEDDING_CACHE_SIZE,
+    RETRIEVAL_CACHE_ENABLED,
+    RETRIEVAL_MAX_THREADS,
+    RETRIEVAL_RESULT_CACHE_SIZE,
+    VECTOR_BACKEND,
+)
+from src.embeddings import get_embedding_function
+from src.models.agent_messages import SearchFilters
+from src.tools.paper_index import PaperIndex
+from src.utils.bm25_index import BM25Index
+from src.utils.embedding_cache import text_hash
+from src.utils.numpy_index import NumpyVectorIndex
+from src.utils.retrieval_cache import LRUCache, read_collection_version, result_key
+
+COLLECTION_NAME = "research_papers"
+
+_RESULT_FIELDS = ("ids", "documents", "metadatas", "distances")
+_INCLUDE = ["documents", "metadatas", "distances"]
+
+
+class RetrievalService:
+    """
+    Long-lived handle on the Chroma store used for retrieval.
+
+    Opening a PersistentClient, building the embedding function and calling
+    get_or_create_collection is done once, not per query. Queries read the
+    current collection without locking; `reload()` (e.g. after ingestion in
+    another process) swaps in a freshly opened client under a lock and stops
+    the old one once the queries still using it have finished.
+
+    Two in-memory caches make repeated questions cheap:
+      - query_embeddings: normalized query text → embedding
+      - results: (embedding hash, k, filters) → Chroma results
+    Ingestion bumps a collection version counter on disk; when it changes,
+    the result cache is dropped and the store re-opened before the next query.
+
+    The BM25 index (for lexical and hybrid retrieval) is loaded on first use
+    and re-loaded together with the store.
+
+    `vector_backend` picks where vector lookups run: "chroma" (HNSW) or
+    "numpy" (exact search over the memory-mapped NumpyVectorIndex). Chroma
+    stays the source of documents for lexical hits either way.
+
+    SearchFilters are resolved to chunk ids through a PaperIndex built from
+    the ingest manifest (re-read whenever the manifest file changes), and
+    only those chunks are searched.
+
+    For asyncio callers, `aembed_queries` uses the embedding function's async
+    client and `run_blocking` runs index lookups on a bounded thread pool
+    (RETRIEVAL_MAX_THREADS), so concurrent questions share one event loop.
+    """
+
+    def __init__(
+        self,
+        chroma_path: str = CHROMA_DB_PATH,
+        collection_name: str = COLLECTION_NAME,
+        embedding_fn=None,
+        cache_enabled: bool = RETRIEVAL_CACHE_ENABLED,
+        version_path: str = COLLECTION_VERSION_PATH,
+        bm25_path: str = BM25_INDEX_PATH,
+        vector_backend: str = VECTOR_BACKEND,
+        numpy_path: str = NUMPY_INDEX_PATH,
+        manifest_path: str = INGEST_MANIFEST_PATH,
+        max_threads: int = RETRIEVAL_MAX_THREADS,
+    ):
+        if vector_backend not in {"chroma", "numpy"}:
+            raise ValueError(f"vector_backend must be 'chroma' or 'numpy', got {vector_backend!r}")
+        self.chroma_path = chroma_path
+        self.collection_name = collection_name
+        self.embedding_fn = embedding_fn or get_embedding_function()
+        self.cache_enabled = cache_enabled
+        self.version_path = version_path
+        self.bm25_path = bm25_path
+        self._lexical: Optional[BM25Index] = None
+        self.vector_backend = vector_backend
+        self.numpy_path = numpy_path
+        self._numpy: Optional[NumpyVectorIndex] = None
+        self.manifest_path = manifest_path
+        self._paper_index: Optional[PaperIndex] = None
+        self._paper_index_mtime: Optional[int] = None
+        self.query_embeddings = LRUCache(QUERY_EMBEDDING_CACHE_SIZE)
+        self.results = LRUCache(RETRIEVAL_RESULT_CACHE_SIZE)
+        self._lock = threading.RLock()
+        self.max_threads = max(1, max_threads)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._client = None
+        self._collection = None
+        # Chroma calls in flight per client, so reload() knows when the old one is idle
+        self._readers: Dict[int, int] = {}
+        self._readers_done = threading.Condition()
+        self._version = read_collection_version(version_path)
+        self._client, self._collection = self._open()
+
+    def _open(self) -> Tuple[Any, Any]:
+        client = chromadb.PersistentClient(path=self.chroma_path)
+        collection = client.get_or_create_collection(
+            name=self.collection_name,
+            embedding_function=self.embedding_fn,
+        )
+        return client, collection
+
+    @property
+    def collection(self):
+        return self._collection
+
+    @contextmanager
+    def _reading(self) -> Iterator[Any]:
+        """The current collection, kept open (not stopped by reload) until the block exits."""
+        with self._readers_done:
+            client, collection = self._client, self._collection
+            self._readers[id(client)] = self._readers.get(id(client), 0) + 1
+        try:
+            yield collection
+        finally:
+            with self._readers_done:
+                self._readers[id(client)] -= 1
+                if not self._readers[id(client)]:
+                    del self._readers[id(client)]
+                    self._readers_done.notify_all()
+
+    @property
+    def lexical_index(self) -> BM25Index:
+        if self._lexical is None:
+            with self._lock:
+                if self._lexical is None:
+                    self._lexical = BM25Index(self.bm25_path)
+        return self._lexical
+
+    @property
+    def numpy_index(self) -> NumpyVectorIndex:
+        if self._numpy is None:
+            with self._lock:
+                if self._numpy is None:
+                    self._numpy = NumpyVectorIndex(self.numpy_path, dtype=NUMPY_INDEX_DTYPE)
+        return self._numpy
+
+    @property
+    def paper_index(self) -> PaperIndex:
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._paper_index is None or mtime != self._paper_index_mtime:
+            with self._lock:
+                self._paper_index = PaperIndex(self.manifest_path)
+                self._paper_index_mtime = mtime
+        return self._paper_index
+
+    def resolve_filters(self, filters: Optional[SearchFilters]) -> Optional[List[str]]:
+        """Chunk ids allowed by `filters` (None: no restriction)."""
+        if filters is None or filters.is_empty():
+            return None
+        return self.paper_index.chunk_ids(filters)
+
+    def warm_up(self) -> None:
+        """
+        Touch the index once so the first real query doesn't pay for loading
+        the HNSW segment (or the NumPy matrix) from disk. Uses a stored
+        embedding, so no API call.
+        """
+        if self.vector_backend == "numpy":
+            index = self.numpy_index
+            if len(index):
+                index.search([np.asarray(index.vectors[0], dtype=np.float32)], k=1)
+            return
+
+        with self._reading() as collection:
+            if collection.count() == 0:
+                return
+            peek = collection.peek(limit=1)
+            embeddings = peek.get("embeddings")
+            if embeddings is not None and len(embeddings):
+                collection.query(query_embeddings=[embeddings[0]], n_results=1)
+
+    def reload(self) -> None:
+        """Re-open the store so writes made by another process become visible."""
+        with self._lock:
+            self._version = read_collection_version(self.version_path)
+            self.results.clear()
+            self._lexical = None
+            self._numpy = None
+            old_client = self._client
+            old_system = old_client._system if old_client is not None else None
+            # Chroma shares one system per path; drop the cached ones so the
+            # new client re-reads the files. Open clients keep their own.
+            SharedSystemClient.clear_system_cache()
+            # Open outside the condition so queries aren't blocked meanwhile
+            client, collection = self._open()
+            with self._readers_done:
+                self._client, self._collection = client, collection
+            if old_system is not None:
+                with self._readers_done:
+                    self._readers_done.wait_for(lambda: id(old_client) not in self._readers)
+                old_system.stop()
+
+    def _check_version(self) -> None:
+        # One small file read per query; cheaper than any stale answer
+        if read_collection_version(self.version_path) != self._version:
+            self.reload()
+
+    def embed_queries(self, query_texts: List[str]) -> List[List[float]]:
+        """Query embeddings, computing only the ones missing from the LRU (in one batch)."""
+        keys = [text_hash(q) for q in query_texts]
+        embeddings: List[Optional[List[float]]] = [self.query_embeddings.get(key) for key in keys]
+
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+        if missing:
+            computed = self.embedding_fn([query_texts[i] for i in missing])
+            for i, emb in zip(missing, computed):
+                embeddings[i] = [float(x) for x in emb]
+                self.query_embeddings.put(keys[i], embeddings[i])
+        return embeddings
+
+    async def aembed_queries(self, query_texts: List[str]) -> List[List[float]]:
+        """Async `embed_queries`: LRU first, then one request on the async embedding client."""
+        keys = [text_hash(q) for q in query_texts]
+        embeddings: List[Optional[List[float]]] = [self.query_embeddings.get(key) for key in keys]
+
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+        if missing:
+            computed = await self.embedding_fn.aembed([query_texts[i] for i in missing])
+            for i, emb in zip(missing, computed):
+                embeddings[i] = [float(x) for x in emb]
+                self.query_embeddings.put(keys[i], embeddings[i])
+        return embeddings
+
+    async def run_blocking(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking call (Chroma / index lookup) on the service's thread pool.
+
+        If the awaiting task is cancelled or times out, a call that hasn't
+        started yet is dropped; one already running finishes in the background
+        and its result is discarded.
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_threads, thread_name_prefix="retrieval"
+                    )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def _lookup(
+        self,
+        embeddings: List[List[float]],
+        k: int,
+        allowed_ids: Optional[List[str]] = None,
+        include_embeddings: bool = False,
+    ) -> Dict:
+        """One vectorized top-k lookup for all `embeddings` on the configured backend."""
+        if self.vector_backend == "numpy":
+            return self.numpy_index.search(
+                embeddings, k=k, allowed_ids=allowed_ids, include_embeddings=include_embeddings
+            )
+        with self._reading() as collection:
+            return collection.query(
+                query_embeddings=embeddings,
+                n_results=k,
+                ids=allowed_ids,
+                include=_INCLUDE + ["embeddings"] if include_embeddings else _INCLUDE,
+            )
+
+    def query(
+        self,
+        query_texts: List[str],
+        k: int = 5,
+        filters: Optional[SearchFilters] = None,
+        embeddings: Optional[List[List[float]]] = None,
+        include_embeddings: bool = False,
+    ) -> Dict:
+        """
+        Chroma-shaped query results (ids/documents/metadatas/distances, one
+        list per query) for one or more query strings, optionally restricted
+        to the papers matching `filters`. Pass `embeddings` when the query
+        embeddings were already computed (e.g. by `aembed_queries`).
+        With `include_embeddings`, the hits' stored embeddings come back too
+        (as "embeddings"), in the same round trip.
+        """
+        fields = _RESULT_FIELDS + ("embeddings",) if include_embeddings else _RESULT_FIELDS
+        allowed_ids = self.resolve_filters(filters)
+        if allowed_ids is not None and not allowed_ids:
+            # Nothing matches the filters: no need to embed or search
+            return {field: [[] for _ in query_texts] for field in fields}
+
+        # Also with the cache off: a stale store would miss freshly ingested chunks
+        self._check_version()
+        if not self.cache_enabled:
+            if embeddings is not None:
+                return self._lookup(embeddings, k, allowed_ids, include_embeddings)
+            if self.vector_backend == "numpy":
+                return self._lookup(self.embedding_fn(query_texts), k, allowed_ids, include_embeddings)
+            with self._reading() as collection:
+                return collection.query(
+                    query_texts=query_texts,
+                    n_results=k,
+                    ids=allowed_ids,
+                    include=_INCLUDE + ["embeddings"] if include_embeddings else _INCLUDE,
+                )
+
+        if embeddings is None:
+            embeddings = self.embed_queries(query_texts)
+
+        filter_key = filters.model_dump() if filters is not None else None
+        keys = [result_key(emb, k, filter_key) + (include_embeddings,) for emb in embeddings]
+        per_query: List[Optional[Dict]] = [self.results.get(key) for key in keys]
+
+        missing = [i for i, r in enumerate(per_query) if r is None]
+        if missing:
+            raw = self._lookup([embeddings[i] for i in missing], k, allowed_ids, include_embeddings)
+            for j, i in enumerate(missing):
+                per_query[i] = {field: raw[field][j] for field in fields}
+                self.results.put(keys[i], per_query[i])
+
+        return {field: [list(r[field]) for r in per_query] for field in fields}
+
+    def lexical_search(
+        self,
+        query_texts: List[str],
+        k: int = 5,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[List[Tuple[str, float]]]:
+        """BM25 top-k (chunk_id, score) per query; no embedding call involved."""
+        self._check_version()
+        allowed_ids = self.resolve_filters(filters)
+        index = self.lexical_index
+        return [index.search(q, k=k, allowed_ids=allowed_ids) for q in query_texts]
+
+    def get_chunks(self, ids: List[str]) -> Dict[str, Tuple[str, Dict]]:
+        """{chunk_id: (document, metadata)} for the given ids, in one Chroma call."""
+        if not ids:
+            return {}
+        with self._reading() as collection:
+            got = collection.get(ids=list(dict.fromkeys(ids)), include=["documents", "metadatas"])
+        return {cid: (doc, meta) for cid, doc, meta in zip(got["ids"], got["documents"], got["metadatas"])}
+
+    def get_embeddings(self, ids: List[str]) -> Dict[str, List[float]]:
+        """{chunk_id: stored embedding} for the given ids, in one Chroma call."""
+        if not ids:
+            return {}
+        with self._reading() as collection:
+            got = collection.get(ids=list(dict.fromkeys(ids)), include=["embeddings"])
+        return dict(zip(got["ids"], got["embeddings"]))
+
+    def cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """Hit/miss counters of both caches, for sizing them."""
+        return {
+            "query_embeddings": self.query_embeddings.stats(),
+            "results": self.results.stats(),
+        }
+
+
+_service: Optional[RetrievalService] = None
+_service_lock = threading.Lock()
+
+
+def get_retrieval_service() -> RetrievalService:
+    """Process-wide RetrievalService, opened on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = RetrievalService()
+    return _service
+
+
+def reload_retrieval_service() -> None:
+    """Reload the shared service if it has been opened (no-op otherwise)."""
+    if _service is not None:
+        _service.reload()
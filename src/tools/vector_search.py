@@ -1,52 +1,368 @@
 # src/tools/vector_search.py
-from typing import List, Dict
+import asyncio
+from typing import Dict, List, Optional, Tuple, Union
 
-import chromadb
+import numpy as np
 
-from src.config import CHROMA_DB_PATH
-from src.embeddings import GeminiEmbeddingFunction
+from src.config import (
+    HYBRID_CANDIDATE_MULTIPLIER,
+    KEYWORD_QUERY_MAX_TERMS,
+    MMR_CANDIDATE_MULTIPLIER,
+    MMR_LAMBDA,
+    RETRIEVAL_MODE,
+    RETRIEVAL_TIMEOUT,
+    RRF_K,
+)
+from src.models.agent_messages import SearchFilters
+from src.tools.retrieval_service import get_retrieval_service
+from src.utils.bm25_index import tokenize
+from src.utils.mmr import mmr_select
 
+MODES = {"vector", "hybrid", "lexical", "auto"}
 
-def vector_search(query: str, k: int = 5) -> List[Dict]:
-    """
-    Query the 'research_papers' collection for the k most similar chunks.
-    Returns a list of dicts: {text, paper_id, chunk_index, source, distance}.
-    """
-    client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
-    embedding_fn = GeminiEmbeddingFunction()
+# Leading words that mark a natural-language question rather than a keyword lookup
+_QUESTION_WORDS = {
+    "what", "which", "who", "whom", "whose", "when", "where", "why", "how",
+    "is", "are", "was", "were", "do", "does", "did", "can", "could", "should",
+    "explain", "describe", "summarize", "compare", "list", "give", "tell",
+}
 
-    collection = client.get_or_create_collection(
-        name="research_papers",
-        embedding_function=embedding_fn,
-    )
 
-    results = collection.query(
-        query_texts=[query],
-        n_results=k,
-    )
+def _hit(doc: str, meta: Dict, distance: Optional[float], score: Optional[float] = None) -> Dict:
+    hit = {
+        "text": doc,
+        "distance": distance,
+        "paper_id": meta.get("paper_id"),
+        "chunk_index": meta.get("chunk_index"),
+        "source": meta.get("source"),
+    }
+    if score is not None:
+        hit["score"] = score
+    return hit
+
 
-    # Chroma returns lists per query; we have only one query.
-    documents = results.get("documents", [[]])[0]
-    metadatas = results.get("metadatas", [[]])[0]
-    distances = results.get("distances", [[]])[0]
+def _hits_from_results(results: Dict, i: int = 0) -> List[Dict]:
+    """Turn the i-th query's Chroma results into our hit dicts."""
+    documents = results.get("documents", [[]])[i]
+    metadatas = results.get("metadatas", [[]])[i]
+    distances = results.get("distances", [[]])[i]
 
     hits: List[Dict] = []
     for doc, meta, dist in zip(documents, metadatas, distances):
-        hit = {
-            "text": doc,
-            "distance": dist,
-            "paper_id": meta.get("paper_id"),
-            "chunk_index": meta.get("chunk_index"),
-            "source": meta.get("source"),
-        }
-        hits.append(hit)
+        hits.append(_hit(doc, meta, dist))
 
     return hits
 
 
+def _as_filters(filters: Union[SearchFilters, Dict, None]) -> Optional[SearchFilters]:
+    if filters is None or isinstance(filters, SearchFilters):
+        return filters
+    return SearchFilters(**filters)
+
+
+def is_keyword_query(query: str) -> bool:
+    """Short term lookups like "BM25 MS MARCO" (not phrased as a question)."""
+    tokens = tokenize(query)
+    if not tokens or len(tokens) > KEYWORD_QUERY_MAX_TERMS or "?" in query:
+        return False
+    return tokens[0] not in _QUESTION_WORDS
+
+
+def rrf_fuse(rankings: List[List[str]], k: int, rrf_k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Reciprocal rank fusion: score(id) = Σ 1 / (rrf_k + rank) over the rankings."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return fused[:k]
+
+
+def _check_mode(mode: str) -> None:
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {sorted(MODES)}, got {mode!r}")
+
+
+def _plan_modes(
+    queries: List[str],
+    mode: str,
+    lexical: List[List[Tuple[str, float]]],
+    has_lexical_index: bool,
+) -> List[str]:
+    plan = []
+    for query, lex_hits in zip(queries, lexical):
+        if mode == "auto":
+            if is_keyword_query(query) and lex_hits:
+                plan.append("lexical")
+            else:
+                plan.append("hybrid" if has_lexical_index else "vector")
+        elif mode == "hybrid" and not has_lexical_index:
+            # No BM25 index built yet: behave like plain vector search
+            plan.append("vector")
+        else:
+            plan.append(mode)
+    return plan
+
+
+def _mmr_rerank(
+    service,
+    plan: List[str],
+    ranked: List[List[Tuple[str, Dict]]],
+    k: int,
+    mmr_lambda: float,
+    query_embeddings: Dict[int, List[float]],
+    candidate_embeddings: Dict[str, List[float]],
+) -> List[List[Tuple[str, Dict]]]:
+    """
+    Re-order each non-lexical ranking with MMR over the candidates' stored
+    embeddings. `candidate_embeddings` are the ones the vector lookup already
+    returned; only hybrid candidates found by BM25 alone are fetched here.
+    """
+    todo = [i for i, m in enumerate(plan) if m != "lexical" and len(ranked[i]) > 1]
+    if not todo:
+        return ranked
+
+    # Query embeddings are the ones the vector lookup used
+    embeddings = dict(candidate_embeddings)
+    embeddings.update(service.get_embeddings([cid for i in todo for cid, _ in ranked[i] if cid not in embeddings]))
+
+    out = list(ranked)
+    for i in todo:
+        pool = [(cid, hit) for cid, hit in ranked[i] if cid in embeddings]
+        candidates = [embeddings[cid] for cid, _ in pool]
+        if plan[i] == "vector":
+            order = mmr_select(candidates, k, mmr_lambda, query_embedding=query_embeddings[i])
+        else:
+            # Fused RRF scores, scaled to [0, 1] like cosine similarities
+            scores = np.asarray([hit["score"] for _, hit in pool], dtype=np.float32)
+            order = mmr_select(candidates, k, mmr_lambda, relevance=scores / scores.max())
+        out[i] = [pool[j] for j in order]
+    return out
+
+
+class _BatchSearch:
+    """
+    One vector_search_batch call, split into the stages the sync and async
+    entry points share:
+
+      plan_modes()  BM25 lookups + per-query mode     (blocking, no embeddings)
+      finish()      vector lookup, fusion, MMR, hits  (blocking)
+
+    Embedding the queries that need vectors happens in between: at the start
+    of finish() for the sync path, on the async client for the async one.
+    Either way each query is embedded once, for both the lookup and MMR.
+    """
+
+    def __init__(self, queries: List[str], k: int, mode: str, filters, mmr_lambda: Optional[float]):
+        self.service = get_retrieval_service()
+        self.queries = list(queries)
+        self.k = k
+        self.mode = mode
+        self.filters = _as_filters(filters)
+        self.mmr_lambda = mmr_lambda
+
+        self.use_mmr = mmr_lambda is not None and mmr_lambda < 1.0
+        # Size of each query's final ranking before MMR trims it to k
+        self.pool = k * max(1, MMR_CANDIDATE_MULTIPLIER) if self.use_mmr else k
+        self.n_candidates = max(self.pool, k * max(1, HYBRID_CANDIDATE_MULTIPLIER))
+        self.lexical: List[List[Tuple[str, float]]] = [[] for _ in self.queries]
+        self.plan: List[str] = ["vector"] * len(self.queries)
+
+    @property
+    def vector_queries(self) -> List[int]:
+        """Positions of the queries that need a query embedding."""
+        return [i for i, m in enumerate(self.plan) if m != "lexical"]
+
+    def plan_modes(self) -> None:
+        if self.mode == "vector":
+            return
+        service = self.service
+        self.lexical = service.lexical_search(self.queries, k=self.n_candidates, filters=self.filters)
+        self.plan = _plan_modes(
+            self.queries, self.mode, self.lexical, has_lexical_index=len(service.lexical_index) > 0
+        )
+
+    def finish(self, query_embeddings: Optional[Dict[int, List[float]]] = None) -> List[List[Dict]]:
+        service, queries, plan, k, pool = self.service, self.queries, self.plan, self.k, self.pool
+        query_embeddings = dict(query_embeddings or {})
+
+        # One embedding batch + one index lookup for every query that needs vectors
+        vector_idx = self.vector_queries
+        missing = [i for i in vector_idx if i not in query_embeddings]
+        if missing:
+            query_embeddings.update(zip(missing, service.embed_queries([queries[i] for i in missing])))
+        vector_hits: Dict[int, List[Tuple[str, Dict]]] = {}
+        # Stored embeddings of the vector hits, for MMR (same round trip as the lookup)
+        candidate_embeddings: Dict[str, List[float]] = {}
+        if vector_idx:
+            n_vector = self.n_candidates if "hybrid" in plan else pool
+            results = service.query(
+                [queries[i] for i in vector_idx],
+                k=n_vector,
+                filters=self.filters,
+                embeddings=[query_embeddings[i] for i in vector_idx],
+                include_embeddings=self.use_mmr,
+            )
+            for j, i in enumerate(vector_idx):
+                vector_hits[i] = list(zip(results["ids"][j], _hits_from_results(results, j)))
+                if self.use_mmr:
+                    candidate_embeddings.update(zip(results["ids"][j], results["embeddings"][j]))
+
+        # Ranked (chunk_id, score) per query
+        ranked: List[List[Tuple[str, Optional[float]]]] = []
+        for i, m in enumerate(plan):
+            if m == "vector":
+                ranked.append([(cid, None) for cid, _ in vector_hits[i][:pool]])
+            elif m == "lexical":
+                ranked.append(self.lexical[i][:k])
+            else:
+                vector_ids = [cid for cid, _ in vector_hits[i]]
+                lexical_ids = [cid for cid, _ in self.lexical[i]]
+                ranked.append(rrf_fuse([vector_ids, lexical_ids], k=pool))
+
+        # Hits the vector ranking returned, per query (distances differ between queries)
+        known = [dict(vector_hits.get(i, [])) for i in range(len(queries))]
+        # Texts of chunks only the lexical ranking found come from one Chroma get
+        fetched = service.get_chunks([cid for i, r in enumerate(ranked) for cid, _ in r if cid not in known[i]])
+
+        out: List[List[Tuple[str, Dict]]] = []
+        for i, r in enumerate(ranked):
+            hits = []
+            for cid, score in r:
+                if cid in known[i]:
+                    hit = dict(known[i][cid])
+                    if score is not None:
+                        hit["score"] = score
+                    hits.append((cid, hit))
+                elif cid in fetched:
+                    doc, meta = fetched[cid]
+                    hits.append((cid, _hit(doc, meta, None, score)))
+                # else: deleted from Chroma after the BM25 index was loaded
+            if plan[i] == "hybrid":
+                # RRF scores: adaptive_cut must not treat them as relevance
+                for _, hit in hits:
+                    hit["fused"] = True
+            out.append(hits)
+
+        if self.use_mmr:
+            out = _mmr_rerank(
+                service, plan, out, k, self.mmr_lambda, query_embeddings, candidate_embeddings
+            )
+        return [[hit for _, hit in hits[:k]] for hits in out]
+
+
+def vector_search_batch(
+    queries: List[str],
+    k: int = 5,
+    mode: str = RETRIEVAL_MODE,
+    filters: Union[SearchFilters, Dict, None] = None,
+    mmr_lambda: Optional[float] = MMR_LAMBDA,
+) -> List[List[Dict]]:
+    """
+    Run several queries at once; returns one hit list per query, in order.
+
+    All query texts that need embeddings are embedded in one batch and looked
+    up with a single `collection.query` call, instead of one round trip per
+    question.
+
+    `mode` (see RETRIEVAL_MODE):
+      - "vector":  embedding similarity only
+      - "lexical": BM25 only (no embedding call)
+      - "hybrid":  BM25 and vector rankings fused with reciprocal rank fusion
+      - "auto":    lexical for short keyword-style queries with BM25 matches,
+                   hybrid for everything else
+    Lexical and hybrid hits carry an extra "score" (BM25 or RRF); their
+    "distance" is None for chunks the vector ranking didn't return. Hybrid
+    hits are also marked "fused": True.
+
+    `filters` (SearchFilters or an equivalent dict with paper_ids, sources,
+    date_from, date_to) restricts every query to the matching papers; only
+    their chunks are scanned.
+
+    `mmr_lambda` < 1 over-fetches k × MMR_CANDIDATE_MULTIPLIER candidates and
+    re-ranks them with maximal marginal relevance over their stored
+    embeddings, so overlapping windows of the same passage don't fill the
+    top-k. 1 (or None) keeps the plain ranking. Lexical-only results are
+    never re-ranked (that path avoids embeddings on purpose).
+    """
+    _check_mode(mode)
+    if not queries:
+        return []
+    search = _BatchSearch(queries, k, mode, filters, mmr_lambda)
+    search.plan_modes()
+    return search.finish()
+
+
+async def avector_search_batch(
+    queries: List[str],
+    k: int = 5,
+    mode: str = RETRIEVAL_MODE,
+    filters: Union[SearchFilters, Dict, None] = None,
+    mmr_lambda: Optional[float] = MMR_LAMBDA,
+    timeout: Optional[float] = RETRIEVAL_TIMEOUT,
+) -> List[List[Dict]]:
+    """
+    Async version of vector_search_batch, safe to await on a shared event loop.
+
+    Query embeddings go through the embedding function's async client; the
+    BM25 and vector index lookups run on the retrieval service's bounded
+    thread pool. The whole call is limited to `timeout` seconds (None or 0:
+    no limit) and raises TimeoutError past it. Cancelling the awaiting task
+    stops it at the next stage.
+    """
+    _check_mode(mode)
+    if not queries:
+        return []
+    search = _BatchSearch(queries, k, mode, filters, mmr_lambda)
+    service = search.service
+
+    async def run() -> List[List[Dict]]:
+        await service.run_blocking(search.plan_modes)
+        vector_idx = search.vector_queries
+        embeddings = await service.aembed_queries([search.queries[i] for i in vector_idx]) if vector_idx else []
+        return await service.run_blocking(search.finish, dict(zip(vector_idx, embeddings)))
+
+    return await asyncio.wait_for(run(), timeout=timeout or None)
+
+
+def vector_search(
+    query: str,
+    k: int = 5,
+    mode: str = RETRIEVAL_MODE,
+    filters: Optional[Dict] = None,
+    mmr_lambda: Optional[float] = MMR_LAMBDA,
+) -> List[Dict]:
+    """
+    Query the 'research_papers' collection for the k most relevant chunks.
+    Returns a list of dicts: {text, paper_id, chunk_index, source, distance}.
+
+    Optional `filters`: {"paper_ids": [...], "sources": [...],
+    "date_from": "YYYY-MM-DD", "date_to": "YYYY-MM-DD"}.
+
+    Uses the process-wide RetrievalService, so the store is opened once and
+    each call costs only the query embedding plus the index lookup. See
+    vector_search_batch for the retrieval modes and MMR re-ranking.
+    """
+    return vector_search_batch([query], k=k, mode=mode, filters=filters, mmr_lambda=mmr_lambda)[0]
+
+
+async def avector_search(
+    query: str,
+    k: int = 5,
+    mode: str = RETRIEVAL_MODE,
+    filters: Optional[Dict] = None,
+    mmr_lambda: Optional[float] = MMR_LAMBDA,
+    timeout: Optional[float] = RETRIEVAL_TIMEOUT,
+) -> List[Dict]:
+    """Async vector_search; see avector_search_batch for timeouts and cancellation."""
+    hits = await avector_search_batch(
+        [query], k=k, mode=mode, filters=filters, mmr_lambda=mmr_lambda, timeout=timeout
+    )
+    return hits[0]
+
+
 if __name__ == "__main__":
     # quick manual test
     from pprint import pprint
     q = "What is a major challange in scholarly information retrieval?"
     pprint(vector_search(q, k=3))
-
@@ -0,0 +1,225 @@
+# src/utils/bm25_index.py
+
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.config import BM25_INDEX_PATH
+from src.utils.generations import current_generation, generation_dir, publish_generation
+
+# Words, numbers and identifiers like "bert", "f1", "2023", "ms_marco"
+_TOKEN = re.compile(r"\w+")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_ARRAYS = ("offsets", "doc_nos", "tfs", "doc_lens")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens (no stemming: exact technical terms matter here)."""
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    On-disk BM25 inverted index over chunk texts.
+
+    Layout of one generation directory (CSR-style postings):
+      terms.json     vocabulary, term number = position
+      doc_ids.json   chunk ids, doc number = position
+      offsets.npy    int64 [n_terms + 1]; postings of term t are [offsets[t], offsets[t+1])
+      doc_nos.npy    int32 doc number per posting (sorted within a term)
+      tfs.npy        int32 term frequency per posting
+      doc_lens.npy   int32 token count per document
+
+    Arrays are memory-mapped on load. Updates (add/remove) are buffered in
+    memory and merged into a new generation on save(); `CURRENT` names the
+    live generation and is swapped atomically, so readers never see a
+    half-written index.
+    """
+
+    def __init__(self, root: str = BM25_INDEX_PATH):
+        self.root = Path(root)
+        self._generation = 0
+        self._load()
+
+    # ----- Loading / saving -----
+
+    def _load(self) -> None:
+        self.terms: List[str] = []
+        self.doc_ids: List[str] = []
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.doc_nos = np.zeros(0, dtype=np.int32)
+        self.tfs = np.zeros(0, dtype=np.int32)
+        self.doc_lens = np.zeros(0, dtype=np.int32)
+
+        generation = current_generation(self.root)
+        if generation is not None:
+            self._generation = generation
+            gen_dir = generation_dir(self.root, generation)
+            self.terms = json.loads((gen_dir / "terms.json").read_text(encoding="utf-8"))
+            self.doc_ids = json.loads((gen_dir / "doc_ids.json").read_text(encoding="utf-8"))
+            for name in _ARRAYS:
+                setattr(self, name, np.load(gen_dir / f"{name}.npy", mmap_mode="r"))
+
+        self._term_no: Dict[str, int] = {t: i for i, t in enumerate(self.terms)}
+        self._doc_no: Dict[str, int] = {cid: i for i, cid in enumerate(self.doc_ids)}
+        self._reset_pending()
+
+    def _reset_pending(self) -> None:
+        self._dead: Set[int] = set()
+        # New documents: (chunk_id, Counter of term numbers, length)
+        self._pending: List[Tuple[str, Counter, int]] = []
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dead or self._pending)
+
+    def save(self) -> None:
+        """Merge buffered updates and write them as a new generation."""
+        if not self.dirty:
+            return
+        self._merge()
+
+        self._generation += 1
+        gen_dir = generation_dir(self.root, self._generation)
+        gen_dir.mkdir(parents=True, exist_ok=True)
+        (gen_dir / "terms.json").write_text(json.dumps(self.terms), encoding="utf-8")
+        (gen_dir / "doc_ids.json").write_text(json.dumps(self.doc_ids), encoding="utf-8")
+        for name in _ARRAYS:
+            np.save(gen_dir / f"{name}.npy", getattr(self, name))
+        publish_generation(self.root, self._generation)
+
+    # ----- Updates -----
+
+    def __len__(self) -> int:
+        return len(self._doc_no)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._doc_no
+
+    def ids(self) -> Set[str]:
+        return set(self._doc_no)
+
+    def add_many(self, chunk_ids: Sequence[str], texts: Sequence[str]) -> None:
+        """Index (or re-index) chunks; replaces any earlier text of the same id."""
+        self.remove(chunk_ids)
+        for chunk_id, text in zip(chunk_ids, texts):
+            tokens = tokenize(text)
+            counts: Counter = Counter()
+            for token in tokens:
+                term_no = self._term_no.get(token)
+                if term_no is None:
+                    term_no = len(self.terms)
+                    self.terms.append(token)
+                    self._term_no[token] = term_no
+                counts[term_no] += 1
+            self._doc_no[chunk_id] = len(self.doc_ids) + len(self._pending)
+            self._pending.append((chunk_id, counts, len(tokens)))
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        for chunk_id in chunk_ids:
+            doc_no = self._doc_no.pop(chunk_id, None)
+            if doc_no is not None:
+                self._dead.add(doc_no)
+
+    def _merge(self) -> None:
+        """Fold pending documents and deletions into fresh CSR arrays (vectorized)."""
+        n_base = len(self.doc_ids)
+        n_total = n_base + len(self._pending)
+        n_terms = len(self.terms)
+
+        # Base postings as flat (term, doc, tf) columns
+        base_terms = np.repeat(np.arange(len(self.offsets) - 1, dtype=np.int64), np.diff(self.offsets))
+        base_docs = np.asarray(self.doc_nos, dtype=np.int64)
+        base_tfs = np.asarray(self.tfs, dtype=np.int32)
+
+        # Pending postings
+        new_terms: List[int] = []
+        new_docs: List[int] = []
+        new_tfs: List[int] = []
+        for offset, (_, counts, _) in enumerate(self._pending):
+            doc_no = n_base + offset
+            new_terms.extend(counts.keys())
+            new_docs.extend([doc_no] * len(counts))
+            new_tfs.extend(counts.values())
+
+        terms = np.concatenate([base_terms, np.asarray(new_terms, dtype=np.int64)])
+        docs = np.concatenate([base_docs, np.asarray(new_docs, dtype=np.int64)])
+        tfs = np.concatenate([base_tfs, np.asarray(new_tfs, dtype=np.int32)])
+        lens = np.concatenate([
+            np.asarray(self.doc_lens, dtype=np.int32),
+            np.asarray([length for _, _, length in self._pending], dtype=np.int32),
+        ])
+        all_ids = self.doc_ids + [cid for cid, _, _ in self._pending]
+
+        # Drop deleted documents and renumber the survivors densely
+        live = np.ones(n_total, dtype=bool)
+        if self._dead:
+            live[np.fromiter(self._dead, dtype=np.int64)] = False
+        remap = np.cumsum(live) - 1
+        keep = live[docs]
+        terms, docs, tfs = terms[keep], remap[docs[keep]], tfs[keep]
+
+        order = np.lexsort((docs, terms))
+        terms, docs, tfs = terms[order], docs[order], tfs[order]
+
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(terms, minlength=n_terms))]).astype(np.int64)
+        self.doc_nos = docs.astype(np.int32)
+        self.tfs = tfs
+        self.doc_lens = lens[live]
+        self.doc_ids = [cid for cid, alive in zip(all_ids, live) if alive]
+        self._doc_no = {cid: i for i, cid in enumerate(self.doc_ids)}
+        self._reset_pending()
+
+    # ----- Search -----
+
+    def search(self, query: str, k: int = 5, allowed_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k (chunk_id, BM25 score) for `query`; only chunks matching a query
+        term. With `allowed_ids`, only those chunks are ranked.
+        """
+        if self.dirty:
+            self._merge()
+        n_docs = len(self.doc_ids)
+        if not n_docs or k <= 0:
+            return []
+
+        avg_len = float(np.mean(self.doc_lens)) or 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * np.asarray(self.doc_lens, dtype=np.float32) / avg_len)
+        scores = np.zeros(n_docs, dtype=np.float32)
+
+        for token in set(tokenize(query)):
+            term_no = self._term_no.get(token)
+            if term_no is None:
+                continue
+            start, end = int(self.offsets[term_no]), int(self.offsets[term_no + 1])
+            if start == end:
+                continue
+            docs = np.asarray(self.doc_nos[start:end])
+            tf = np.asarray(self.tfs[start:end], dtype=np.float32)
+            df = end - start
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            # doc numbers are unique within one term's postings, so += is safe
+            scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + norm[docs])
+
+        if allowed_ids is not None:
+            allowed = np.fromiter(
+                (self._doc_no[cid] for cid in allowed_ids if cid in self._doc_no), dtype=np.int64
+            )
+            matched = allowed[scores[allowed] > 0]
+        else:
+            matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        if k < len(matched):
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self.doc_ids[i], float(scores[i])) for i in matched]
+
@@ -0,0 +1,153 @@
+# src/utils/evidence_cache.py
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from src.config import EVIDENCE_CACHE_MAX_ENTRIES, EVIDENCE_CACHE_PATH, EVIDENCE_CACHE_TTL
+from src.utils.dedup_evidence import _question_hash  # reuse helper
+
+
+def evidence_key(question: str, chunk_ids: Iterable[str], model: str, prompt_version: str) -> str:
+    """
+    Cache key of one evidence extraction: normalized question hash, the
+    sorted chunk ids (order of retrieval doesn't matter), model and prompt version.
+    """
+    identity = [_question_hash(question), sorted(set(chunk_ids)), model, prompt_version]
+    return hashlib.sha256(json.dumps(identity).encode("utf-8")).hexdigest()
+
+
+class EvidenceCache:
+    """
+    Persistent cache of parsed evidence-extraction results, backed by SQLite.
+
+    Key:   evidence_key(question, chunk ids, model, prompt version)
+    Value: the EvidenceBatch as JSON.
+
+    Entries older than `ttl_seconds` (0: never) count as misses and are
+    deleted; past `max_entries` the least recently used rows are evicted.
+    Hit/miss/expiry counters are kept for sizing. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        path: str = EVIDENCE_CACHE_PATH,
+        max_entries: int = EVIDENCE_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = EVIDENCE_CACHE_TTL,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS evidence (
+                key        TEXT PRIMARY KEY,
+                value      TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used  REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_evidence_last_used ON evidence(last_used)")
+        self._conn.commit()
+
+    # ----- Public API -----
+
+    def get(self, key: str) -> Optional[str]:
+        """The cached JSON for `key`, or None (missing or expired)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM evidence WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM evidence WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expired += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE evidence SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """Store `value` under `key`, then drop expired rows and evict if over capacity."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO evidence (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.ttl_seconds:
+                self._conn.execute("DELETE FROM evidence WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._evict_locked()
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM evidence").fetchone()[0]
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM evidence")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ----- Internal helpers -----
+
+    def _evict_locked(self) -> None:
+        if not self.max_entries or self.max_entries <= 0:
+            return
+        count = self._conn.execute("SELECT COUNT(*) FROM evidence").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        # Evict the least recently used rows
+        self._conn.execute(
+            "DELETE FROM evidence WHERE rowid IN ("
+            "  SELECT rowid FROM evidence ORDER BY last_used ASC LIMIT ?"
+            ")",
+            (excess,),
+        )
+
+
+_default_cache: Optional[EvidenceCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_evidence_cache() -> EvidenceCache:
+    """Process-wide cache at EVIDENCE_CACHE_PATH, opened on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EvidenceCache()
+        return _default_cache
@@ -0,0 +1,39 @@
+# src/utils/generations.py
+
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+
+def current_generation(root: Path) -> Optional[int]:
+    """Number of the live generation under `root`, or None if nothing was published."""
+    current = root / "CURRENT"
+    if not current.exists():
+        return None
+    return int(current.read_text(encoding="utf-8").strip())
+
+
+def generation_dir(root: Path, generation: int) -> Path:
+    return root / f"gen-{generation:06d}"
+
+
+def publish_generation(root: Path, generation: int) -> None:
+    """
+    Point CURRENT at `generation` (atomic replace), then delete generation
+    directories older than the one it replaced. The replaced generation is
+    kept until the next publish: a reader may have read CURRENT just before
+    the swap and not opened its files yet. Readers that already
+    memory-mapped a deleted generation keep working until they close it.
+    """
+    previous = current_generation(root)
+    tmp = root / "CURRENT.tmp"
+    tmp.write_text(str(generation), encoding="utf-8")
+    os.replace(tmp, root / "CURRENT")
+
+    keep = {generation_dir(root, generation)}
+    if previous is not None:
+        keep.add(generation_dir(root, previous))
+    for old in root.glob("gen-*"):
+        if old not in keep:
+            shutil.rmtree(old, ignore_errors=True)
@@ -0,0 +1,56 @@
+# src/utils/mmr.py
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def mmr_select(
+    candidates: Sequence[Sequence[float]],
+    k: int,
+    lambda_: float = 0.7,
+    query_embedding: Optional[Sequence[float]] = None,
+    relevance: Optional[Sequence[float]] = None,
+) -> List[int]:
+    """
+    Maximal marginal relevance: pick k candidate positions, each time taking
+
+        argmax  λ · relevance(d) − (1 − λ) · max_{s ∈ selected} cos(d, s)
+
+    `relevance` defaults to the cosine similarity with `query_embedding`.
+    λ = 1 is plain relevance ranking; lower values favour diversity.
+
+    All pairwise similarities come from one matrix product; each greedy step
+    is a vectorized update of the running max-similarity array.
+    """
+    if not len(candidates) or k <= 0:
+        return []
+    cand = _unit_rows(np.asarray(candidates, dtype=np.float32))
+    if relevance is None:
+        if query_embedding is None:
+            raise ValueError("mmr_select needs either query_embedding or relevance")
+        query = _unit_rows(np.asarray(query_embedding, dtype=np.float32))
+        rel = cand @ query
+    else:
+        rel = np.asarray(relevance, dtype=np.float32)
+
+    sim = cand @ cand.T
+    n = len(cand)
+    max_sim = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected: List[int] = []
+
+    for _ in range(min(k, n)):
+        scores = lambda_ * rel - (1.0 - lambda_) * max_sim
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        max_sim = sim[best] if len(selected) == 1 else np.maximum(max_sim, sim[best])
+    return selected
@@ -0,0 +1,190 @@
+# src/utils/near_dup.py
+
+import hashlib
+import re
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.config import NEAR_DUP_INDEX_PATH, NEAR_DUP_THRESHOLD
+
+NUM_PERM = 64
+BANDS = 16           # 16 bands × 4 rows → candidates from ~0.5 Jaccard, near-certain above 0.8
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5     # word 5-grams
+
+_PRIME = np.uint64(4294967311)  # smallest prime > 2**32
+_rng = np.random.RandomState(1)
+# a, b < 2**31 keeps a*h + b below 2**64 for 32-bit shingle hashes
+_A = _rng.randint(1, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    tokens = _TOKEN.findall(text.lower())
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = {" ".join(tokens)}
+    else:
+        shingles = {
+            " ".join(tokens[i:i + SHINGLE_SIZE])
+            for i in range(len(tokens) - SHINGLE_SIZE + 1)
+        }
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """
+    MinHash signature (NUM_PERM uint32 values) over word shingles of `text`;
+    None if it has no words (empty or punctuation-only text), since all such
+    chunks would otherwise share one signature and match each other.
+    """
+    hashes = _shingle_hashes(text)
+    if not len(hashes):
+        return None
+    # One vectorized pass: (NUM_PERM, n_shingles) permuted hashes, min per row
+    permuted = (np.outer(_A, hashes) + _B[:, None]) % _PRIME
+    return (permuted.min(axis=1) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def signature_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return float(np.mean(a == b))
+
+
+def _band_keys(signature: np.ndarray) -> List[Tuple[int, int]]:
+    keys = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest()
+        keys.append((band, int.from_bytes(digest, "little", signed=True)))
+    return keys
+
+
+class NearDuplicateIndex:
+    """
+    Persistent MinHash + LSH index of ingested chunks.
+
+    Each chunk's signature is split into BANDS bands; chunks sharing any band
+    bucket become candidates, and only candidates are compared. Lookup cost
+    therefore stays flat as the corpus grows (no pairwise comparisons).
+
+    Tables:
+      fingerprints(chunk_id, paper_id, signature)   canonical chunks
+      bands(band, bucket, chunk_id)                 LSH buckets
+      duplicates(chunk_id, paper_id, canonical_id, canonical_paper_id)
+    """
+
+    def __init__(self, path: str = NEAR_DUP_INDEX_PATH, threshold: float = NEAR_DUP_THRESHOLD):
+        self.threshold = threshold
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                chunk_id  TEXT PRIMARY KEY,
+                paper_id  TEXT NOT NULL,
+                signature BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_fingerprints_paper ON fingerprints(paper_id);
+            CREATE TABLE IF NOT EXISTS bands (
+                band     INTEGER NOT NULL,
+                bucket   INTEGER NOT NULL,
+                chunk_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_bands_bucket ON bands(band, bucket);
+            CREATE INDEX IF NOT EXISTS idx_bands_chunk ON bands(chunk_id);
+            CREATE TABLE IF NOT EXISTS duplicates (
+                chunk_id           TEXT PRIMARY KEY,
+                paper_id           TEXT NOT NULL,
+                canonical_id       TEXT NOT NULL,
+                canonical_paper_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_duplicates_paper ON duplicates(paper_id);
+            CREATE INDEX IF NOT EXISTS idx_duplicates_canonical_paper ON duplicates(canonical_paper_id);
+            """
+        )
+        self._conn.commit()
+
+    # ----- Public API -----
+
+    def find_canonical(self, signature: np.ndarray) -> Optional[Tuple[str, str]]:
+        """Return (chunk_id, paper_id) of the most similar indexed chunk above threshold."""
+        candidates: Set[str] = set()
+        for band, bucket in _band_keys(signature):
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM bands WHERE band = ? AND bucket = ?",
+                (band, bucket),
+            ).fetchall()
+            candidates.update(r[0] for r in rows)
+        if not candidates:
+            return None
+
+        best: Optional[Tuple[str, str]] = None
+        best_score = self.threshold
+        placeholders = ",".join("?" * len(candidates))
+        rows = self._conn.execute(
+            f"SELECT chunk_id, paper_id, signature FROM fingerprints WHERE chunk_id IN ({placeholders})",
+            list(candidates),
+        ).fetchall()
+        for chunk_id, paper_id, blob in rows:
+            score = signature_similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if score >= best_score:
+                best, best_score = (chunk_id, paper_id), score
+        return best
+
+    def add(self, chunk_id: str, paper_id: str, signature: np.ndarray) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO fingerprints (chunk_id, paper_id, signature) VALUES (?, ?, ?)",
+            (chunk_id, paper_id, signature.tobytes()),
+        )
+        self._conn.execute("DELETE FROM bands WHERE chunk_id = ?", (chunk_id,))
+        self._conn.executemany(
+            "INSERT INTO bands (band, bucket, chunk_id) VALUES (?, ?, ?)",
+            [(band, bucket, chunk_id) for band, bucket in _band_keys(signature)],
+        )
+
+    def add_duplicate(self, chunk_id: str, paper_id: str, canonical_id: str, canonical_paper_id: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO duplicates (chunk_id, paper_id, canonical_id, canonical_paper_id) "
+            "VALUES (?, ?, ?, ?)",
+            (chunk_id, paper_id, canonical_id, canonical_paper_id),
+        )
+
+    def dependents_of(self, paper_ids: Iterable[str]) -> Set[str]:
+        """Other papers with chunks recorded as duplicates of chunks in `paper_ids`."""
+        paper_ids = list(paper_ids)
+        if not paper_ids:
+            return set()
+        placeholders = ",".join("?" * len(paper_ids))
+        rows = self._conn.execute(
+            f"SELECT DISTINCT paper_id FROM duplicates WHERE canonical_paper_id IN ({placeholders})",
+            paper_ids,
+        ).fetchall()
+        return {r[0] for r in rows} - set(paper_ids)
+
+    def remove_paper(self, paper_id: str) -> None:
+        """Forget all fingerprints and duplicate links of a paper (before re-ingesting or deleting it)."""
+        self._conn.execute(
+            "DELETE FROM bands WHERE chunk_id IN (SELECT chunk_id FROM fingerprints WHERE paper_id = ?)",
+            (paper_id,),
+        )
+        self._conn.execute("DELETE FROM fingerprints WHERE paper_id = ?", (paper_id,))
+        self._conn.execute("DELETE FROM duplicates WHERE paper_id = ?", (paper_id,))
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
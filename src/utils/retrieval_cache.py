@@ -0,0 +1,92 @@
+# src/utils/retrieval_cache.py
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Sequence
+
+import numpy as np
+
+from src.config import COLLECTION_VERSION_PATH
+
+
+class LRUCache:
+    """
+    Small thread-safe in-memory LRU map with hit/miss counters.
+    `max_entries <= 0` disables caching (every lookup is a miss).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self),
+        }
+
+
+def embedding_key(embedding: Sequence[float]) -> str:
+    """Stable hash of a query embedding (its float32 bytes)."""
+    return hashlib.sha1(np.asarray(embedding, dtype=np.float32).tobytes()).hexdigest()
+
+
+def result_key(embedding: Sequence[float], k: int, filters: Optional[Dict] = None) -> tuple:
+    """Result-cache key: (embedding hash, k, canonical JSON of the filters)."""
+    return embedding_key(embedding), k, json.dumps(filters, sort_keys=True, default=str)
+
+
+# ----- Collection version counter -----
+
+def read_collection_version(path: str = COLLECTION_VERSION_PATH) -> int:
+    """Current collection version (0 if ingestion never bumped it)."""
+    try:
+        return int(Path(path).read_text(encoding="utf-8").strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_collection_version(path: str = COLLECTION_VERSION_PATH) -> int:
+    """Increment the collection version (atomic replace) and return the new value."""
+    version = read_collection_version(path) + 1
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(".tmp")
+    tmp.write_text(str(version), encoding="utf-8")
+    os.replace(tmp, target)
+    return version
@@ -9,3 +9,37 @@ ROOT = Path(__file__).resolve().parents[1]
 # Add project root to sys.path if not already there
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+import pytest
+
+import src.tools.retrieval_service as retrieval_service
+from src.embeddings import FakeEmbeddingFunction
+
+
+@pytest.fixture
+def retrieval_store(tmp_path, monkeypatch):
+    """
+    Factory for a RetrievalService over a throwaway Chroma store with a
+    FakeEmbeddingFunction, installed as the process-wide service.
+
+    make(docs, ids=None, metadatas=None, dim=16, **service_kwargs): ids and
+    metadatas default to chunks 0..n-1 of paper "p".
+    """
+
+    def make(docs, ids=None, metadatas=None, dim=16, **service_kwargs):
+        service = retrieval_service.RetrievalService(
+            chroma_path=str(tmp_path / "chroma"),
+            embedding_fn=FakeEmbeddingFunction(dim=dim),
+            version_path=str(tmp_path / "collection_version"),
+            bm25_path=str(tmp_path / "bm25"),
+            **service_kwargs,
+        )
+        service.collection.add(
+            ids=ids or [f"p::chunk-{i:04d}" for i in range(len(docs))],
+            documents=docs,
+            metadatas=metadatas or [{"paper_id": "p", "chunk_index": i, "source": "p.pdf"} for i in range(len(docs))],
+        )
+        monkeypatch.setattr(retrieval_service, "_service", service)
+        return service
+
+    return make
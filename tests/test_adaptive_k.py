@@ -0,0 +1,58 @@
+# tests/test_adaptive_k.py
+
+from src.tools.adaptive_k import adaptive_cut
+
+
+def _hits(distances):
+    return [{"text": f"chunk {i}", "distance": d} for i, d in enumerate(distances)]
+
+
+def test_cuts_at_largest_gap():
+    kept, decision = adaptive_cut(_hits([0.30, 0.32, 0.35, 0.36, 0.80, 0.82]), min_k=2, min_gap=0.2)
+    assert [h["distance"] for h in kept] == [0.30, 0.32, 0.35, 0.36]
+    assert decision["reason"] == "largest_gap"
+    assert decision["fetched"] == 6 and decision["kept"] == 4
+    assert decision["threshold"] == 0.36
+
+
+def test_no_cut_without_a_clear_gap():
+    kept, decision = adaptive_cut(_hits([0.30, 0.31, 0.33, 0.34, 0.36]), min_k=2, min_gap=0.2)
+    assert len(kept) == 5
+    assert decision["reason"] == "all"
+
+
+def test_distance_cutoff_respects_min_k():
+    kept, decision = adaptive_cut(_hits([0.5, 0.9, 0.95, 1.0]), min_k=2, max_distance=0.6, min_gap=0)
+    assert [h["distance"] for h in kept] == [0.5, 0.9]
+    assert decision["reason"] == "min_k"
+
+    kept, decision = adaptive_cut(_hits([0.5, 0.55, 0.9]), min_k=1, max_distance=0.6, min_gap=0)
+    assert len(kept) == 2
+    assert decision["reason"] == "distance_cutoff"
+
+
+def test_max_k_and_lexical_scores():
+    hits = [{"text": str(i), "distance": None, "score": s} for i, s in enumerate([9.0, 8.5, 8.0, 2.0, 1.5])]
+    kept, decision = adaptive_cut(hits, min_k=1, max_k=4, min_gap=0.3)
+    assert [h["score"] for h in kept] == [9.0, 8.5, 8.0]
+    assert decision["signal"] == "score"
+    assert decision["fetched"] == 5
+
+
+def test_hybrid_cut_ignores_rrf_scores():
+    # Chunks found by both rankings score ~2/61, lexical-only ones ~1/61:
+    # that step is list membership, not relevance, and must not be cut on.
+    both = [{"text": f"b{i}", "distance": d, "score": 2 / 61 - i * 1e-4, "fused": True}
+            for i, d in enumerate([0.30, 0.31, 0.33])]
+    lexical_only = [{"text": f"l{i}", "distance": None, "score": 1 / 61 - i * 1e-4, "fused": True}
+                    for i in range(3)]
+    kept, decision = adaptive_cut(both + lexical_only, min_k=2, min_gap=0.2)
+    assert len(kept) == 6
+    assert decision["reason"] == "all"
+
+    # A real gap in the vector distances still cuts, lexical-only hits stay
+    far = {"text": "far", "distance": 0.9, "score": 1 / 62, "fused": True}
+    kept, decision = adaptive_cut(both + [far] + lexical_only, min_k=2, min_gap=0.2)
+    assert [h["text"] for h in kept] == ["b0", "b1", "b2", "l0", "l1", "l2"]
+    assert decision["reason"] == "largest_gap"
+    assert decision["signal"] == "distance"
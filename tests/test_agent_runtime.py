@@ -0,0 +1,55 @@
+# tests/test_agent_runtime.py
+
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.agents import BaseAgent
+from google.adk.events import Event
+from google.genai import types
+
+from src.agents.runtime import AgentRuntime
+
+
+class EchoAgent(BaseAgent):
+    """Answers with the user's message plus how many events its session already had."""
+
+    async def _run_async_impl(self, ctx) -> AsyncGenerator[Event, None]:
+        await asyncio.sleep(0.01)
+        text = ctx.user_content.parts[0].text
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            content=types.Content(role="model", parts=[types.Part(text=f"{text}|{len(ctx.session.events)}")]),
+        )
+
+
+def test_agent_built_once_and_sessions_isolated():
+    runtime = AgentRuntime()
+    built = []
+
+    def create_echo_agent():
+        built.append(1)
+        return EchoAgent(name="echo")
+
+    async def ask_many():
+        return await asyncio.gather(*(runtime.run_text("echo-app", create_echo_agent, f"q{i}") for i in range(5)))
+
+    answers = runtime.run_sync(ask_many())
+    answers += [runtime.run_sync(runtime.run_text("echo-app", create_echo_agent, "again"))]
+
+    assert len(built) == 1
+    # Every request saw only its own message: a fresh session each time
+    assert answers == [f"q{i}|1" for i in range(5)] + ["again|1"]
+    sessions = runtime.run_sync(runtime.session_service.list_sessions(app_name="echo-app", user_id="local_user"))
+    assert sessions.sessions == []
+
+
+def test_run_sync_refuses_running_loop():
+    runtime = AgentRuntime()
+
+    async def inside_loop():
+        with pytest.raises(RuntimeError):
+            runtime.run_sync(asyncio.sleep(0))
+
+    asyncio.run(inside_loop())
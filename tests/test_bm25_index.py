@@ -0,0 +1,55 @@
+# tests/test_bm25_index.py
+
+from src.tools.vector_search import is_keyword_query, rrf_fuse
+from src.utils.bm25_index import BM25Index
+
+
+def test_exact_terms_rank_first_and_survive_reload(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25"))
+    index.add_many(
+        ["a::chunk-0000", "a::chunk-0001", "b::chunk-0000"],
+        [
+            "We evaluate on MS MARCO and report MRR@10.",
+            "Dense retrieval with dual encoders.",
+            "BM25 remains a strong baseline on MS MARCO passages.",
+        ],
+    )
+    index.save()
+
+    reloaded = BM25Index(str(tmp_path / "bm25"))
+    hits = reloaded.search("BM25 MARCO", k=5)
+    assert [cid for cid, _ in hits] == ["b::chunk-0000", "a::chunk-0000"]
+    assert reloaded.search("unrelated words", k=5) == []
+
+
+def test_updates_and_deletes_are_merged(tmp_path):
+    root = str(tmp_path / "bm25")
+    index = BM25Index(root)
+    index.add_many(["p::chunk-0000", "p::chunk-0001"], ["alpha beta", "gamma"])
+    index.save()
+
+    index = BM25Index(root)
+    index.add_many(["p::chunk-0000"], ["delta"])   # re-ingested with new text
+    index.remove(["p::chunk-0001"])
+    index.add_many(["q::chunk-0000"], ["gamma alpha"])
+    index.save()
+
+    index = BM25Index(root)
+    assert index.ids() == {"p::chunk-0000", "q::chunk-0000"}
+    assert [cid for cid, _ in index.search("alpha", k=5)] == ["q::chunk-0000"]
+    assert [cid for cid, _ in index.search("delta", k=5)] == ["p::chunk-0000"]
+    assert index.search("gamma", k=5)[0][0] == "q::chunk-0000"
+    # The live generation and the one it replaced are kept on disk
+    assert sorted(p.name for p in (tmp_path / "bm25").glob("gen-*")) == ["gen-000001", "gen-000002"]
+    index.add_many(["r::chunk-0000"], ["epsilon"])
+    index.save()
+    assert sorted(p.name for p in (tmp_path / "bm25").glob("gen-*")) == ["gen-000002", "gen-000003"]
+
+
+def test_rrf_and_keyword_detection():
+    fused = rrf_fuse([["a", "b", "c"], ["c", "a"]], k=2)
+    assert [cid for cid, _ in fused] == ["a", "c"]
+
+    assert is_keyword_query("BM25 MS MARCO")
+    assert not is_keyword_query("What is a major challenge in retrieval?")
+    assert not is_keyword_query("dense retrieval models trained with hard negatives")
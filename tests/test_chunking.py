@@ -0,0 +1,59 @@
+# tests/test_chunking.py
+
+from src.tools.chunking import chunk_pages, estimate_tokens
+
+
+PAGES = [
+    "Scholarly search is hard. Smith et al. showed that recall drops on long PDFs. "
+    "See Fig. 2 for details.\n\nA second paragraph starts here. It has two sentences.",
+    "Page two begins mid-document. Retrieval quality depends on chunking.",
+    "Final page. The end.",
+]
+
+
+def test_offsets_point_into_joined_text():
+    text = "\n".join(PAGES)
+    chunks = chunk_pages(PAGES, max_tokens=30)
+
+    assert chunks
+    for c in chunks:
+        assert text[c.start_char:c.end_char] == c.text
+        assert c.text == c.text.strip()
+
+
+def test_chunks_end_on_sentence_boundaries():
+    chunks = chunk_pages(PAGES, max_tokens=30)
+
+    for c in chunks:
+        assert c.text[-1] in ".!?"
+        assert estimate_tokens(len(c.text)) <= 30
+    # "et al." and "Fig." must not be treated as sentence ends
+    assert not any(c.text.endswith("et al.") or c.text.endswith("Fig.") for c in chunks)
+
+
+def test_page_numbers_are_recorded():
+    chunks = chunk_pages(PAGES, max_tokens=30)
+
+    assert chunks[0].page_start == 1
+    assert chunks[-1].page_end == 3
+    assert any(c.page_start == 2 for c in chunks)
+
+
+def test_long_sentence_is_split_at_word_boundaries():
+    long_sentence = " ".join(["token"] * 200) + "."
+    chunks = chunk_pages([long_sentence], max_tokens=50)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(len(c.text)) <= 50 for c in chunks)
+    assert all(set(c.text.rstrip(".").split()) == {"token"} for c in chunks)
+
+
+def test_no_overlap_by_default_and_overlap_when_requested():
+    pages = [" ".join(f"Sentence number {i} is here." for i in range(40))]
+
+    plain = chunk_pages(pages, max_tokens=40, overlap_tokens=0)
+    for a, b in zip(plain, plain[1:]):
+        assert a.end_char <= b.start_char
+
+    overlapping = chunk_pages(pages, max_tokens=40, overlap_tokens=10)
+    assert any(b.start_char < a.end_char for a, b in zip(overlapping, overlapping[1:]))
@@ -0,0 +1,60 @@
+# tests/test_context_expansion.py
+
+from src.tools.context_expansion import expand_hits, merge_chunk_texts
+
+PAPER = "alpha beta gamma delta epsilon zeta eta theta iota kappa"
+
+
+def _service_with_paper(retrieval_store):
+    """One paper split into overlapping 3-word chunks, with character offsets."""
+    words = PAPER.split()
+    ids, docs, metas = [], [], []
+    for idx, first in enumerate(range(0, len(words), 2)):
+        start = len(" ".join(words[:first])) + (1 if first else 0)
+        text = " ".join(words[first:first + 3])
+        ids.append(f"p::chunk-{idx:04d}")
+        docs.append(text)
+        metas.append({
+            "paper_id": "p", "chunk_index": idx, "source": "p.pdf",
+            "start_char": start, "end_char": start + len(text),
+        })
+    return retrieval_store(docs, ids=ids, metadatas=metas, dim=8), docs
+
+
+def _hit(docs, idx, distance):
+    return {"text": docs[idx], "paper_id": "p", "chunk_index": idx, "source": "p.pdf", "distance": distance}
+
+
+def test_neighbours_are_merged_without_repeats(retrieval_store):
+    service, docs = _service_with_paper(retrieval_store)
+    calls = []
+    get_chunks = service.get_chunks
+    service.get_chunks = lambda ids: calls.append(ids) or get_chunks(ids)
+
+    windows = expand_hits([_hit(docs, 2, 0.1)], n=1, service=service)
+    assert len(calls) == 1
+    assert len(windows) == 1
+    assert windows[0]["text"] == "gamma delta epsilon zeta eta theta iota"
+    assert windows[0]["chunk_range"] == [1, 3]
+    assert windows[0]["distance"] == 0.1
+
+
+def test_touching_windows_are_merged_in_rank_order(retrieval_store):
+    service, docs = _service_with_paper(retrieval_store)
+    hits = [_hit(docs, 3, 0.1), _hit(docs, 0, 0.2), {"text": "no metadata"}]
+
+    windows = expand_hits(hits, n=1, service=service)
+    # 0±1 and 3±1 cover chunks 0..4 without a gap: one window, ranked by chunk 3
+    assert windows[0]["chunk_range"] == [0, 4]
+    assert windows[0]["text"] == PAPER
+    assert windows[0]["chunk_index"] == 3 and windows[0]["hit_indices"] == [3, 0]
+    assert windows[1] == {"text": "no metadata"}
+
+
+def test_merge_falls_back_to_text_overlap():
+    parts = [
+        ("The model is trained on a large corpus of scientific text.", {}),
+        ("a large corpus of scientific text. It is evaluated on QA.", {}),
+    ]
+    merged = merge_chunk_texts(parts)
+    assert merged == "The model is trained on a large corpus of scientific text. It is evaluated on QA."
@@ -0,0 +1,127 @@
+# tests/test_embeddings_batching.py
+
+import pytest
+
+from src.embeddings import FakeEmbeddingFunction
+
+
+def test_batched_output_matches_serial_order():
+    texts = [f"chunk number {i}" for i in range(23)]
+
+    serial = FakeEmbeddingFunction(dim=8, batch_size=100, max_workers=1)
+    batched = FakeEmbeddingFunction(dim=8, batch_size=5, max_workers=4)
+
+    expected = serial(texts)
+    got = batched(texts)
+
+    assert len(got) == len(texts)
+    assert [list(v) for v in got] == [list(v) for v in expected]
+    # 23 texts in slices of 5 → 5 requests instead of 23
+    assert batched.calls == 5
+    assert batched.texts_embedded == 23
+
+
+def test_transient_errors_are_retried():
+    fn = FakeEmbeddingFunction(
+        dim=4,
+        failure_rate=0.5,
+        batch_size=2,
+        max_workers=2,
+        max_retries=20,
+        retry_base_delay=0.0,
+        seed=1,
+    )
+    texts = [f"t{i}" for i in range(10)]
+
+    out = fn(texts)
+
+    assert len(out) == 10
+    assert fn.texts_embedded == 10
+    assert fn.calls > 5  # some batches needed more than one attempt
+
+
+def test_retries_exhausted_raises():
+    fn = FakeEmbeddingFunction(
+        dim=4,
+        failure_rate=1.0,
+        max_retries=2,
+        retry_base_delay=0.0,
+    )
+
+    with pytest.raises(ConnectionError):
+        fn(["always fails"])
+    assert fn.calls == 3  # first attempt + 2 retries
+
+
+def test_cache_serves_repeated_texts(tmp_path):
+    from src.utils.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite3"))
+    fn = FakeEmbeddingFunction(dim=8, batch_size=10, cache=cache)
+
+    first = fn(["alpha", "beta", "alpha"])
+    assert fn.texts_embedded == 2  # duplicate text embedded once
+
+    # Whitespace-only differences map to the same cache entry
+    second = fn(["alpha", "  beta \n", "gamma"])
+    assert fn.texts_embedded == 3  # only "gamma" was new
+    assert list(second[0]) == pytest.approx(list(first[0]), abs=1e-6)
+    assert list(second[1]) == pytest.approx(list(first[1]), abs=1e-6)
+
+
+def test_async_cache_lookups_run_off_the_event_loop(tmp_path):
+    import asyncio
+    import threading
+
+    from src.utils.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite3"))
+    threads = set()
+    for name in ("get_many", "put_many"):
+        method = getattr(cache, name)
+        setattr(cache, name, lambda *a, _m=method: threads.add(threading.current_thread()) or _m(*a))
+    fn = FakeEmbeddingFunction(dim=8, cache=cache)
+
+    first = asyncio.run(fn.aembed(["alpha", "beta"]))
+    second = asyncio.run(fn.aembed(["alpha", "beta"]))
+    assert fn.texts_embedded == 2
+    assert list(second[1]) == pytest.approx(list(first[1]), abs=1e-6)
+    assert threads and threading.main_thread() not in threads
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    from src.utils.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put_many("m", ["a"], [[1.0, 2.0]])
+    cache.put_many("m", ["b"], [[3.0, 4.0]])
+    cache.get_many("m", ["a"])  # touch "a" so "b" is the oldest
+    cache.put_many("m", ["c"], [[5.0, 6.0]])
+
+    assert len(cache) == 2
+    assert set(cache.get_many("m", ["a", "b", "c"])) == {0, 2}
+
+
+def test_hashing_backend_is_offline_and_normalized(tmp_path):
+    import numpy as np
+    from src.embeddings import HashingEmbeddingFunction
+
+    fn = HashingEmbeddingFunction(dim=256, idf_path=str(tmp_path / "idf.npy"))
+    corpus = [
+        "BM25 is a lexical ranking function used in information retrieval.",
+        "Dense retrieval embeds queries and documents into vectors.",
+        "Knowledge graphs store entities and relations.",
+    ]
+    fn.fit_idf(corpus)
+    assert (tmp_path / "idf.npy").exists()
+
+    docs = np.asarray(fn(corpus))
+    query = np.asarray(fn(["lexical ranking with BM25"]))[0]
+
+    assert docs.shape == (3, 256)
+    assert np.allclose(np.linalg.norm(docs, axis=1), 1.0, atol=1e-5)
+    assert int(np.argmax(docs @ query)) == 0
+
+    # A fresh instance picks up the saved IDF table and embeds identically
+    again = HashingEmbeddingFunction(dim=256, idf_path=str(tmp_path / "idf.npy"))
+    assert np.allclose(np.asarray(again(corpus)), docs, atol=1e-6)
@@ -0,0 +1,85 @@
+# tests/test_evidence_cache.py
+
+import asyncio
+import json
+
+import src.agents.evidence_agent as evidence_agent
+from src.models.agent_messages import RetrievedChunk, RetrievedContext
+from src.utils.evidence_cache import EvidenceCache, evidence_key
+
+
+def test_key_ignores_chunk_order_and_question_spacing():
+    a = evidence_key("What is BM25?", ["p::chunk-0002", "p::chunk-0001"], "m", "1")
+    b = evidence_key("  what is   bm25? ", ["p::chunk-0001", "p::chunk-0002"], "m", "1")
+    assert a == b
+    assert a != evidence_key("What is BM25?", ["p::chunk-0001"], "m", "1")
+    assert a != evidence_key("What is BM25?", ["p::chunk-0002", "p::chunk-0001"], "m", "2")
+
+
+def test_ttl_and_lru_eviction(tmp_path, monkeypatch):
+    cache = EvidenceCache(path=str(tmp_path / "evidence.sqlite3"), max_entries=2, ttl_seconds=100)
+    clock = [1000.0]
+    monkeypatch.setattr("src.utils.evidence_cache.time.time", lambda: clock[0])
+
+    for key in ("a", "b"):
+        cache.put(key, key.upper())
+        clock[0] += 1
+    assert cache.get("a") == "A"  # "b" is now least recently used
+    clock[0] += 1
+    cache.put("c", "C")
+    assert cache.get("b") is None and len(cache) == 2
+
+    clock[0] += 100
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["expired"] == 1
+
+
+class _FakeRuntime:
+    def __init__(self):
+        self.calls = 0
+
+    async def run_text(self, app_name, create_agent, prompt):
+        self.calls += 1
+        item = {"claim": "c", "evidence_sentence": "s", "paper_id": "p", "chunk_index": 1, "source": "p.pdf"}
+        return "```json\n" + json.dumps({"items": [item]}) + "\n```"
+
+
+def test_repeated_question_skips_the_llm(tmp_path, monkeypatch):
+    runtime = _FakeRuntime()
+    monkeypatch.setattr(evidence_agent, "get_agent_runtime", lambda: runtime)
+    cache = EvidenceCache(path=str(tmp_path / "evidence.sqlite3"))
+    ctx = RetrievedContext(
+        query="q",
+        chunks=[RetrievedChunk(chunk="BM25 ranks documents.", paper_id="p", chunk_index=1, source="p.pdf")],
+    )
+
+    first = asyncio.run(evidence_agent.arun_evidence_agent(ctx, "What is BM25?", cache=cache))
+    second = asyncio.run(evidence_agent.arun_evidence_agent(ctx, "what is  BM25?", cache=cache))
+    assert runtime.calls == 1
+    assert second.items == first.items
+    assert second.question == "what is  BM25?"
+
+    # Same chunk id with different text (re-ingested paper) is a different entry
+    ctx.chunks[0].chunk = "BM25 is a ranking function."
+    asyncio.run(evidence_agent.arun_evidence_agent(ctx, "What is BM25?", cache=cache))
+    assert runtime.calls == 2
+
+
+def test_cache_io_runs_off_the_event_loop(tmp_path, monkeypatch):
+    import threading
+
+    monkeypatch.setattr(evidence_agent, "get_agent_runtime", lambda: _FakeRuntime())
+    cache = EvidenceCache(path=str(tmp_path / "evidence.sqlite3"))
+    threads = set()
+    for name in ("get", "put"):
+        method = getattr(cache, name)
+        setattr(cache, name, lambda *a, _m=method: threads.add(threading.current_thread()) or _m(*a))
+    ctx = RetrievedContext(
+        query="q",
+        chunks=[RetrievedChunk(chunk="BM25 ranks documents.", paper_id="p", chunk_index=1, source="p.pdf")],
+    )
+
+    for _ in range(2):
+        asyncio.run(evidence_agent.arun_evidence_agent(ctx, "What is BM25?", cache=cache))
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,90 @@
+# tests/test_evidence_fanout.py
+
+import asyncio
+import json
+import re
+import time
+
+import pytest
+
+import src.agents.evidence_agent as evidence_agent
+from src.models.agent_messages import RetrievedChunk, RetrievedContext
+
+
+class _SlowRuntime:
+    """Fake evidence LLM: one item per chunk in the prompt, `delays[chunk_index]` seconds per call."""
+
+    def __init__(self, delays, fail=()):
+        self.delays = delays
+        self.fail = set(fail)
+        self.calls = 0
+
+    async def run_text(self, app_name, create_agent, prompt):
+        self.calls += 1
+        indices = [int(i) for i in re.findall(r"chunk_index=(\d+)", prompt)]
+        await asyncio.sleep(max(self.delays[i] for i in indices))
+        if self.fail & set(indices):
+            return "not json"
+        items = []
+        for i in indices:
+            # Two paraphrases of the same claim: deduplicate_evidence keeps one
+            for claim in (f"Claim about chunk {i}.", f"Claim about chunk {i}"):
+                items.append({"claim": claim, "evidence_sentence": "s", "paper_id": "p",
+                              "chunk_index": i, "source": "p.pdf"})
+        return json.dumps({"items": items})
+
+
+def _ctx(n):
+    chunks = [RetrievedChunk(chunk=f"text {i}", paper_id="p", chunk_index=i, source="p.pdf") for i in range(n)]
+    return RetrievedContext(query="q", chunks=chunks)
+
+
+def _run(runtime, monkeypatch, ctx, **kwargs):
+    monkeypatch.setattr(evidence_agent, "get_agent_runtime", lambda: runtime)
+    monkeypatch.setattr(evidence_agent, "EVIDENCE_CACHE_ENABLED", False)
+    return asyncio.run(evidence_agent.arun_evidence_agent(ctx, "question?", fanout_min_chunks=5, **kwargs))
+
+
+def test_chunks_are_extracted_concurrently_and_merged(monkeypatch):
+    runtime = _SlowRuntime(delays=[0.2] * 5)
+    t0 = time.perf_counter()
+    batch = _run(runtime, monkeypatch, _ctx(5), group_size=2, straggler_timeout=0)
+    assert time.perf_counter() - t0 < 0.5
+    assert runtime.calls == 3
+    assert sorted(item.chunk_index for item in batch.items) == list(range(5))
+
+
+def test_merged_items_are_ranked_and_capped(monkeypatch):
+    # Later chunks answer first; the answer still gets the best-ranked chunks
+    runtime = _SlowRuntime(delays=[0.1 - i * 0.01 for i in range(8)])
+    batch = _run(runtime, monkeypatch, _ctx(8), group_size=1, straggler_timeout=0)
+    assert runtime.calls == 8
+    assert [item.chunk_index for item in batch.items] == [0, 1, 2, 3, 4]
+
+
+def test_queued_groups_get_their_own_deadline(monkeypatch):
+    # One slot: groups run back to back, each well within its own deadline
+    runtime = _SlowRuntime(delays=[0.1] * 5)
+    batch = _run(runtime, monkeypatch, _ctx(5), group_size=1, max_concurrency=1, straggler_timeout=0.3)
+    assert runtime.calls == 5
+    assert sorted(item.chunk_index for item in batch.items) == list(range(5))
+
+
+def test_stragglers_and_failures_are_dropped(monkeypatch):
+    runtime = _SlowRuntime(delays=[0.0, 0.0, 0.0, 0.0, 5.0], fail={1})
+    t0 = time.perf_counter()
+    batch = _run(runtime, monkeypatch, _ctx(5), group_size=1, straggler_timeout=0.2)
+    assert time.perf_counter() - t0 < 1.0
+    assert sorted(item.chunk_index for item in batch.items) == [0, 2, 3]
+
+
+def test_small_contexts_use_one_prompt(monkeypatch):
+    runtime = _SlowRuntime(delays=[0.0] * 3)
+    _run(runtime, monkeypatch, _ctx(3))
+    assert runtime.calls == 1
+
+
+def test_all_groups_failing_raises(monkeypatch):
+    runtime = _SlowRuntime(delays=[0.0] * 5, fail=range(5))
+    with pytest.raises(RuntimeError, match="evidence JSON"):
+        _run(runtime, monkeypatch, _ctx(5))
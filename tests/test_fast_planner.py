@@ -0,0 +1,26 @@
+# tests/test_fast_planner.py
+
+from src.agents.fast_planner import fast_plan, llm_planner_reason
+
+
+def test_ordinary_question_gets_standard_plan():
+    tasks = fast_plan("  What are the main challenges in scholarly information retrieval? ")
+    assert [t.task_type for t in tasks] == ["retrieval", "evidence", "answer"]
+    assert {t.query for t in tasks} == {"What are the main challenges in scholarly information retrieval?"}
+    assert all(t.filters is None for t in tasks)
+
+
+def test_follow_ups_go_to_the_llm_only_with_history():
+    history = "[Turn 1]\nQ: What is dense retrieval?\nA: ..."
+    assert llm_planner_reason("Summarize in one sentence.", history) is not None
+    assert llm_planner_reason("What are its main limitations?", history) is not None
+    # The same words without any history: nothing to rewrite against
+    assert llm_planner_reason("What are its main limitations?") is None
+    # A self-contained new question after earlier turns still takes the fast path
+    assert fast_plan("How is BM25 scored in practice?", history) is not None
+
+
+def test_ambiguous_or_filtered_questions_go_to_the_llm():
+    assert fast_plan("BM25?") is None
+    assert fast_plan("What does smith2021.pdf say about reranking?") is None
+    assert fast_plan("Which papers published after 2020 use contrastive learning?") is None
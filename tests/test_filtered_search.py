@@ -0,0 +1,55 @@
+# tests/test_filtered_search.py
+
+from src.models.agent_messages import SearchFilters
+from src.tools.ingest_manifest import IngestManifest, ManifestEntry
+from src.tools.paper_index import PaperIndex
+from src.tools.vector_search import vector_search
+
+PAPERS = {
+    "alpha": ("alpha.pdf", "2021-03-01"),
+    "beta": ("beta.pdf", "2023-07-15"),
+    "gamma": ("gamma.pdf", ""),
+}
+
+
+def _write_manifest(path):
+    manifest = IngestManifest(str(path))
+    for paper_id, (source, date) in PAPERS.items():
+        manifest.set(paper_id, ManifestEntry(
+            source=source, sha256="x", size=1, mtime=0.0, date=date,
+            chunk_ids=[f"{paper_id}::chunk-{i:04d}" for i in range(3)],
+        ))
+    manifest.save()
+
+
+def test_paper_index_resolves_filters(tmp_path):
+    _write_manifest(tmp_path / "manifest.json")
+    index = PaperIndex(str(tmp_path / "manifest.json"))
+
+    assert index.chunk_ids(None) is None
+    assert index.papers(SearchFilters(paper_ids=["beta", "nope"])) == ["beta"]
+    assert index.papers(SearchFilters(sources=["alpha.pdf", "gamma.pdf"])) == ["alpha", "gamma"]
+    assert index.papers(SearchFilters(date_from="2022")) == ["beta"]
+    assert index.papers(SearchFilters(date_to="2021-03")) == ["alpha"]
+    assert index.papers(SearchFilters(sources=["alpha.pdf"], date_from="2023")) == []
+    assert len(index.chunk_ids(SearchFilters(paper_ids=["alpha", "beta"]))) == 6
+
+
+def test_vector_search_only_returns_filtered_papers(tmp_path, retrieval_store):
+    _write_manifest(tmp_path / "manifest.json")
+    ids, docs, metas = [], [], []
+    for paper_id, (source, _) in PAPERS.items():
+        for i in range(3):
+            ids.append(f"{paper_id}::chunk-{i:04d}")
+            docs.append(f"{paper_id} text {i}")
+            metas.append({"paper_id": paper_id, "chunk_index": i, "source": source})
+    retrieval_store(docs, ids=ids, metadatas=metas, manifest_path=str(tmp_path / "manifest.json"))
+
+    hits = vector_search("alpha text 1", k=5, mode="vector", filters={"paper_ids": ["beta"]})
+    assert len(hits) == 3
+    assert {h["paper_id"] for h in hits} == {"beta"}
+
+    hits = vector_search("text", k=10, mode="vector", filters={"date_from": "2020", "date_to": "2022"})
+    assert {h["paper_id"] for h in hits} == {"alpha"}
+
+    assert vector_search("text", k=5, mode="vector", filters={"paper_ids": ["missing"]}) == []
@@ -0,0 +1,241 @@
+# tests/test_ingest.py
+
+import functools
+import math
+import os
+
+import chromadb
+import pytest
+
+import src.tools.pdf_ingest as pdf_ingest
+from src.benchmarks.synthetic_pdfs import generate_corpus, make_pdf
+from src.embeddings import FakeEmbeddingFunction
+from src.tools.ingest_manifest import IngestManifest
+from src.tools.page_store import PageTextStore
+from src.utils.bm25_index import BM25Index
+from src.utils.near_dup import NearDuplicateIndex
+from src.utils.retrieval_cache import bump_collection_version
+
+
+@pytest.fixture
+def ingest(tmp_path, monkeypatch):
+    """Run build_or_update_vector_store against a throwaway store; returns the runner."""
+    pdf_dir = tmp_path / "papers"
+    generate_corpus(pdf_dir, n_papers=3, pages_per_paper=3, lines_per_page=20)
+
+    monkeypatch.setattr(pdf_ingest, "PDF_STORAGE", str(pdf_dir))
+    monkeypatch.setattr(pdf_ingest, "CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    monkeypatch.setattr(pdf_ingest, "INGEST_MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(pdf_ingest, "VECTOR_BACKEND", "chroma")
+    monkeypatch.setattr(pdf_ingest, "PageTextStore", functools.partial(PageTextStore, str(tmp_path / "pages")))
+    monkeypatch.setattr(pdf_ingest, "BM25Index", functools.partial(BM25Index, str(tmp_path / "bm25")))
+    monkeypatch.setattr(
+        pdf_ingest, "NearDuplicateIndex",
+        functools.partial(NearDuplicateIndex, str(tmp_path / "near_dup.sqlite3")),
+    )
+    monkeypatch.setattr(
+        pdf_ingest, "bump_collection_version",
+        functools.partial(bump_collection_version, str(tmp_path / "collection_version")),
+    )
+
+    def run(**kwargs):
+        kwargs.setdefault("near_dup_mode", "off")
+        kwargs.setdefault("extract_workers", 1)
+        kwargs.setdefault("embedding_fn", FakeEmbeddingFunction(dim=16))
+        return pdf_ingest.build_or_update_vector_store(**kwargs)
+
+    run.pdf_dir = pdf_dir
+    run.tmp_path = tmp_path
+    return run
+
+
+def _collection(ingest):
+    return chromadb.PersistentClient(path=str(ingest.tmp_path / "chroma")).get_collection("research_papers")
+
+
+def _stored_ids(ingest):
+    return set(_collection(ingest).get()["ids"])
+
+
+def _manifest_ids(ingest):
+    manifest = IngestManifest(str(ingest.tmp_path / "manifest.json"))
+    return {cid for entry in manifest.entries.values() for cid in entry.chunk_ids}
+
+
+def test_unchanged_rerun_adds_nothing(ingest):
+    first = ingest()
+    assert first.papers == 3 and first.chunks > 0
+    assert _stored_ids(ingest) == _manifest_ids(ingest)
+
+    # Touching a file without changing it doesn't count as a change either
+    pdf = ingest.pdf_dir / "synthetic-0001.pdf"
+    os.utime(pdf, (pdf.stat().st_atime, pdf.stat().st_mtime + 10))
+    again = ingest()
+    assert again.papers == 0
+    assert again.chunks == 0
+
+
+def test_shrunk_pdf_loses_trailing_chunks(ingest):
+    ingest()
+    before = {cid for cid in _stored_ids(ingest) if cid.startswith("synthetic-0000::")}
+
+    make_pdf(ingest.pdf_dir / "synthetic-0000.pdf", [["A much shorter version of the paper."]])
+    stats = ingest()
+    assert stats.papers == 1
+    after = {cid for cid in _stored_ids(ingest) if cid.startswith("synthetic-0000::")}
+    assert after == {"synthetic-0000::chunk-0000"}
+    assert len(before) > len(after)
+    assert _stored_ids(ingest) == _manifest_ids(ingest)
+
+
+def test_removed_pdf_chunks_are_deleted(ingest):
+    ingest()
+    (ingest.pdf_dir / "synthetic-0002.pdf").unlink()
+    stats = ingest()
+    assert stats.chunks == 0
+    assert not any(cid.startswith("synthetic-0002::") for cid in _stored_ids(ingest))
+    assert _stored_ids(ingest) == _manifest_ids(ingest)
+    assert "synthetic-0002" not in IngestManifest(str(ingest.tmp_path / "manifest.json")).entries
+
+
+def test_papers_are_committed_as_their_batches_are_written(ingest, monkeypatch):
+    write_batch = pdf_ingest._write_batch
+
+    def crash_on_last_paper(collection, embedding_fn, batch, stats):
+        if any(cid.startswith("synthetic-0002::") for cid, _, _ in batch):
+            raise RuntimeError("embedding API down")
+        write_batch(collection, embedding_fn, batch, stats)
+
+    monkeypatch.setattr(pdf_ingest, "_write_batch", crash_on_last_paper)
+    with pytest.raises(RuntimeError, match="embedding API down"):
+        ingest(batch_size=4)
+
+    # Papers whose chunks were all written survive the crash
+    committed = set(IngestManifest(str(ingest.tmp_path / "manifest.json")).entries)
+    assert "synthetic-0000" in committed
+    assert "synthetic-0002" not in committed
+
+    monkeypatch.setattr(pdf_ingest, "_write_batch", write_batch)
+    stats = ingest(batch_size=4)
+    assert stats.papers == 3 - len(committed)
+    # Fixed-size batches across paper boundaries
+    assert stats.batches == math.ceil(stats.chunks / 4)
+    assert _stored_ids(ingest) == _manifest_ids(ingest)
+
+
+def test_rechunk_reuses_stored_page_text(ingest, monkeypatch):
+    first = ingest()
+    stored = _stored_ids(ingest)
+
+    extracted = []
+    iter_extracted = pdf_ingest.iter_extracted_pdfs
+
+    def spy(pdf_paths, **kwargs):
+        extracted.extend(pdf_paths)
+        return iter_extracted(pdf_paths, **kwargs)
+
+    monkeypatch.setattr(pdf_ingest, "iter_extracted_pdfs", spy)
+    stats = ingest(rechunk=True)
+    assert stats.papers == 3
+    assert stats.chunks == first.chunks
+    assert extracted == []   # every PDF came from the page store
+    assert _stored_ids(ingest) == stored
+
+    # A corrupt store entry is re-extracted for that PDF only
+    for entry in (ingest.tmp_path / "pages").rglob("*.json.gz"):
+        entry.write_bytes(b"not gzip")
+        break
+    assert ingest(rechunk=True).chunks == first.chunks
+    assert len(extracted) == 1
+
+
+# ----- Near-duplicate detection -----
+
+def _shared_corpus(ingest):
+    """Replace the corpus: "preprint" repeats the first two pages of "orig"."""
+    for pdf in ingest.pdf_dir.glob("*.pdf"):
+        pdf.unlink()
+    generate_corpus(ingest.tmp_path / "src", n_papers=2, pages_per_paper=3, lines_per_page=20, seed=7)
+    orig, other = (ingest.tmp_path / "src" / f"synthetic-{i:04d}.pdf" for i in range(2))
+    orig_pages = pdf_ingest.load_pdf_pages(orig, PageTextStore(str(ingest.tmp_path / "scratch")))
+    other_pages = pdf_ingest.load_pdf_pages(other, PageTextStore(str(ingest.tmp_path / "scratch")))
+    make_pdf(ingest.pdf_dir / "orig.pdf", [p.splitlines() for p in orig_pages])
+    make_pdf(ingest.pdf_dir / "preprint.pdf", [p.splitlines() for p in orig_pages[:2] + other_pages[2:]])
+
+
+def _entries(ingest):
+    return IngestManifest(str(ingest.tmp_path / "manifest.json")).entries
+
+
+def _assert_stores_agree(ingest):
+    """Manifest, Chroma and BM25 hold exactly the same chunk ids."""
+    expected = _manifest_ids(ingest)
+    assert _stored_ids(ingest) == expected
+    assert BM25Index(str(ingest.tmp_path / "bm25")).ids() == expected
+
+
+def test_skip_mode_drops_near_duplicates(ingest):
+    _shared_corpus(ingest)
+    stats = ingest(near_dup_mode="skip")
+    assert stats.duplicates > 0
+
+    kept = _entries(ingest)["preprint"].chunk_ids
+    assert "preprint::chunk-0000" not in kept   # its opening pages duplicate "orig"
+    # Skipped chunks leave gaps in the chunk numbering, one per duplicate
+    n_chunks = int(kept[-1].rsplit("-", 1)[1]) + 1
+    assert n_chunks - len(kept) == stats.duplicates
+    assert stats.chunks == len(_manifest_ids(ingest))
+    _assert_stores_agree(ingest)
+
+
+def test_link_mode_reuses_canonical_embeddings(ingest):
+    _shared_corpus(ingest)
+    embedding_fn = FakeEmbeddingFunction(dim=16)
+    stats = ingest(near_dup_mode="link", embedding_fn=embedding_fn)
+    assert stats.duplicates > 0
+    # Linked chunks are stored but never sent to the embedder
+    assert embedding_fn.texts_embedded == stats.chunks - stats.duplicates
+
+    got = _collection(ingest).get(ids=["preprint::chunk-0000"], include=["metadatas", "embeddings"])
+    canonical = got["metadatas"][0]["duplicate_of"]
+    assert canonical.startswith("orig::")
+    stored = _collection(ingest).get(ids=[canonical], include=["embeddings"])
+    assert list(got["embeddings"][0]) == list(stored["embeddings"][0])
+    _assert_stores_agree(ingest)
+
+
+def test_dependents_are_reingested_when_the_canonical_paper_changes(ingest):
+    _shared_corpus(ingest)
+    ingest(near_dup_mode="skip")
+    assert "preprint::chunk-0000" not in _stored_ids(ingest)
+
+    # "orig" is replaced by unrelated text: "preprint" must get its chunks back
+    make_pdf(ingest.pdf_dir / "orig.pdf", [["A completely different paper."]])
+    stats = ingest(near_dup_mode="skip")
+    assert stats.papers == 2
+    assert stats.duplicates == 0
+    assert "preprint::chunk-0000" in _entries(ingest)["preprint"].chunk_ids
+    _assert_stores_agree(ingest)
+
+
+def test_dependents_are_reingested_when_the_canonical_paper_is_removed(ingest):
+    _shared_corpus(ingest)
+    ingest(near_dup_mode="skip")
+
+    (ingest.pdf_dir / "orig.pdf").unlink()
+    stats = ingest(near_dup_mode="skip")
+    assert stats.papers == 1
+    assert set(_entries(ingest)) == {"preprint"}
+    assert "preprint::chunk-0000" in _entries(ingest)["preprint"].chunk_ids
+    assert not any(cid.startswith("orig::") for cid in _stored_ids(ingest))
+    _assert_stores_agree(ingest)
+
+
+def test_wordless_chunks_are_not_duplicates_of_each_other(ingest):
+    for pdf in ingest.pdf_dir.glob("*.pdf"):
+        pdf.unlink()
+    for name in ("a", "b"):
+        make_pdf(ingest.pdf_dir / f"{name}.pdf", [["-- * -- * --"]])
+    stats = ingest(near_dup_mode="skip")
+    assert stats.duplicates == 0
+    assert _stored_ids(ingest) == {"a::chunk-0000", "b::chunk-0000"}
@@ -0,0 +1,38 @@
+# tests/test_ingest_benchmark.py
+
+import argparse
+
+import src.benchmarks.ingest_benchmark as ingest_benchmark
+from src.benchmarks.synthetic_pdfs import generate_corpus
+
+
+def test_modes_ingest_the_same_corpus(tmp_path, monkeypatch):
+    corpus = tmp_path / "corpus"
+    generate_corpus(corpus, n_papers=3, pages_per_paper=2, lines_per_page=20)
+    scratch = tmp_path / "tmp"
+    scratch.mkdir()
+    monkeypatch.setattr(ingest_benchmark.tempfile, "tempdir", str(scratch))
+
+    args = argparse.Namespace(embed_latency=0.0, extract_workers=2)
+    results = {m: ingest_benchmark._run_in_subprocess(m, corpus, args) for m in ingest_benchmark.MODES}
+
+    serial = results["serial"]
+    assert serial["papers"] == 3 and serial["chunks"] > 0
+    assert {(r["papers"], r["pages"], r["chunks"]) for r in results.values()} == {(3, 6, serial["chunks"])}
+    # One request per chunk unbatched, far fewer batched
+    assert serial["embedding_calls"] == serial["chunks"]
+    assert results["batched"]["embedding_calls"] < serial["embedding_calls"]
+    # Each mode's store is removed once its run is over
+    assert list(scratch.iterdir()) == []
+
+
+def test_check_regressions():
+    baseline = [{"mode": "serial", "chunks_per_sec": 100.0}, {"mode": "batched", "chunks_per_sec": 0}]
+    results = [
+        {"mode": "serial", "chunks_per_sec": 70.0},
+        {"mode": "batched", "chunks_per_sec": 10.0},    # no usable baseline
+        {"mode": "parallel", "chunks_per_sec": 10.0},   # not in the baseline
+    ]
+    failures = ingest_benchmark.check_regressions(results, baseline, max_regression=0.2)
+    assert len(failures) == 1 and failures[0].startswith("serial:")
+    assert ingest_benchmark.check_regressions(results, baseline, max_regression=0.5) == []
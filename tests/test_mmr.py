@@ -0,0 +1,54 @@
+# tests/test_mmr.py
+
+import numpy as np
+
+from src.tools.vector_search import vector_search
+from src.utils.mmr import mmr_select
+
+
+def test_lambda_one_is_relevance_order():
+    rng = np.random.default_rng(0)
+    candidates = rng.standard_normal((8, 4))
+    query = rng.standard_normal(4)
+    order = mmr_select(candidates, k=8, lambda_=1.0, query_embedding=query)
+    unit = candidates / np.linalg.norm(candidates, axis=1, keepdims=True)
+    assert order == list(np.argsort(-(unit @ query)))
+
+
+def test_near_duplicates_are_diversified():
+    query = [1.0, 0.0, 0.0]
+    candidates = [[1.0, 0.1, 0.0], [1.0, 0.11, 0.0], [0.7, 0.0, 0.7]]
+    assert mmr_select(candidates, k=2, lambda_=1.0, query_embedding=query) == [0, 1]
+    assert mmr_select(candidates, k=2, lambda_=0.5, query_embedding=query) == [0, 2]
+
+
+def test_vector_search_skips_duplicate_chunks(retrieval_store):
+    retrieval_store(["dense retrieval with dual encoders"] * 3 + [f"unrelated text {i}" for i in range(5)])
+
+    query = "dense retrieval with dual encoders"
+    plain = vector_search(query, k=3, mode="vector", mmr_lambda=1.0)
+    assert [h["text"] for h in plain] == [query] * 3
+
+    diverse = vector_search(query, k=3, mode="vector", mmr_lambda=0.2)
+    assert diverse[0]["text"] == query
+    assert [h["text"] for h in diverse].count(query) == 1
+
+
+def test_vector_mmr_reuses_embeddings_from_the_lookup(retrieval_store):
+    service = retrieval_store([f"passage {i % 3} about retrieval" for i in range(9)])
+    fetched = []
+    get_embeddings = service.get_embeddings
+    service.get_embeddings = lambda ids: fetched.extend(ids) or get_embeddings(ids)
+
+    hits = vector_search("passage 1 about retrieval", k=3, mode="vector", mmr_lambda=0.2)
+    assert len(hits) == 3
+    assert fetched == []   # candidate embeddings came back with the query itself
+
+
+def test_vector_mmr_embeds_the_query_once_with_the_cache_off(retrieval_store):
+    service = retrieval_store([f"passage {i % 3} about retrieval" for i in range(9)], cache_enabled=False)
+    before = service.embedding_fn.texts_embedded
+
+    hits = vector_search("passage 1 about retrieval", k=3, mode="vector", mmr_lambda=0.2)
+    assert len(hits) == 3
+    assert service.embedding_fn.texts_embedded - before == 1
@@ -0,0 +1,40 @@
+# tests/test_near_dup.py
+
+from src.utils.near_dup import NearDuplicateIndex, minhash_signature, signature_similarity
+
+LICENSE = (
+    "This article is licensed under a Creative Commons Attribution 4.0 International "
+    "License, which permits use, sharing, adaptation, distribution and reproduction in "
+    "any medium or format, as long as you give appropriate credit to the original authors."
+)
+
+
+def test_signature_similarity_tracks_text_overlap():
+    a = minhash_signature(LICENSE)
+    b = minhash_signature(LICENSE.replace("4.0", "4.1"))
+    c = minhash_signature("Knowledge graphs store claims and evidence extracted from papers.")
+
+    assert signature_similarity(a, a) == 1.0
+    assert signature_similarity(a, b) > 0.7
+    assert signature_similarity(a, c) < 0.2
+
+
+def test_index_finds_canonical_and_forgets_removed_papers():
+    index = NearDuplicateIndex(path=":memory:", threshold=0.7)
+    index.add("paper1::chunk-0007", "paper1", minhash_signature(LICENSE))
+
+    match = index.find_canonical(minhash_signature(LICENSE.replace("4.0", "4.1")))
+    assert match == ("paper1::chunk-0007", "paper1")
+    assert index.find_canonical(minhash_signature("An unrelated chunk about retrieval.")) is None
+
+    index.add_duplicate("paper2::chunk-0003", "paper2", *match)
+    assert index.dependents_of(["paper1"]) == {"paper2"}
+
+    index.remove_paper("paper1")
+    assert index.find_canonical(minhash_signature(LICENSE)) is None
+
+
+def test_chunks_without_words_get_no_signature():
+    assert minhash_signature("") is None
+    assert minhash_signature(" -- ... (12) ") is not None   # digits are words
+    assert minhash_signature(" -- ... ;; ") is None
@@ -0,0 +1,104 @@
+# tests/test_numpy_index.py
+
+import numpy as np
+import pytest
+
+from src.utils.numpy_index import NumpyVectorIndex, sync_from_collection
+
+
+def _rows(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    return [
+        (f"p::chunk-{i:04d}", f"text {i}", {"paper_id": "p", "chunk_index": i, "source": "p.pdf"}, vectors[i])
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_search_matches_brute_force(tmp_path, dtype):
+    rows = _rows(200, 16)
+    NumpyVectorIndex(str(tmp_path / "idx"), dtype=dtype).update(rows)
+    index = NumpyVectorIndex(str(tmp_path / "idx"), dtype=dtype)
+
+    matrix = np.stack([r[3] for r in rows])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    queries = np.stack([rows[3][3], rows[150][3]])
+
+    results = index.search(queries, k=5)
+    for q, ids, docs, metas, dists in zip(
+        queries, results["ids"], results["documents"], results["metadatas"], results["distances"]
+    ):
+        expected = np.argsort(-(matrix @ (q / np.linalg.norm(q))))[:5]
+        assert ids == [rows[i][0] for i in expected]
+        assert docs[0] == rows[expected[0]][1]
+        assert metas[0]["chunk_index"] == int(expected[0])
+        assert dists == sorted(dists)
+        assert dists[0] == pytest.approx(0.0, abs=1e-2)   # the query's own row
+
+    # Stored (normalized) vectors of the hits, for MMR
+    with_vectors = index.search(queries[:1], k=2, include_embeddings=True)
+    expected = matrix[int(with_vectors["ids"][0][0].split("-")[-1])]
+    assert np.allclose(with_vectors["embeddings"][0][0], expected, atol=1e-2)
+
+
+def test_update_replaces_and_deletes(tmp_path):
+    root = str(tmp_path / "idx")
+    rows = _rows(10, 8)
+    NumpyVectorIndex(root).update(rows)
+
+    index = NumpyVectorIndex(root)
+    moved = ("p::chunk-0000", "new text", {"paper_id": "p", "chunk_index": 0, "source": "p.pdf"}, rows[5][3])
+    index.update([moved], delete_ids=["p::chunk-0005"])
+
+    index = NumpyVectorIndex(root)
+    assert len(index) == 9
+    hit = index.search([rows[5][3]], k=1)
+    assert hit["ids"][0] == ["p::chunk-0000"]
+    assert hit["documents"][0] == ["new text"]
+
+    index.update([], delete_ids=index.ids)
+    assert len(NumpyVectorIndex(root)) == 0
+
+
+class _FakeCollection:
+    """Chroma `get` over in-memory rows; counts calls and the largest block fetched."""
+
+    def __init__(self, rows):
+        self.rows = {r[0]: r for r in rows}
+        self.largest_block = 0
+
+    def get(self, ids, include):
+        self.largest_block = max(self.largest_block, len(ids))
+        found = [self.rows[i] for i in ids if i in self.rows]
+        return {
+            "ids": [r[0] for r in found],
+            "documents": [r[1] for r in found],
+            "metadatas": [r[2] for r in found],
+            "embeddings": [r[3] for r in found],
+        }
+
+
+def test_sync_from_collection_streams_blocks(tmp_path):
+    root = str(tmp_path / "idx")
+    rows = _rows(25, 8)
+    collection = _FakeCollection(rows[:24])   # chunk 24 is expected but missing from Chroma
+    expected = {r[0] for r in rows}
+
+    assert sync_from_collection(NumpyVectorIndex(root), collection, expected, set(), batch_size=4)
+    assert collection.largest_block == 4
+    index = NumpyVectorIndex(root)
+    assert sorted(index.ids) == sorted(r[0] for r in rows[:24])
+    assert index.vectors.shape == (24, 8)
+    assert index.search([rows[7][3]], k=1)["documents"][0] == ["text 7"]
+
+    # Deletes and a rewritten chunk go through the same path
+    collection.rows["p::chunk-0003"] = ("p::chunk-0003", "rewritten", rows[3][2], rows[3][3])
+    expected -= {"p::chunk-0000"}
+    assert sync_from_collection(index, collection, expected, {"p::chunk-0003"}, batch_size=4)
+    index = NumpyVectorIndex(root)
+    assert len(index) == 23
+    assert index.search([rows[3][3]], k=1)["documents"][0] == ["rewritten"]
+    # In sync once the missing chunk is no longer expected
+    expected -= {"p::chunk-0024"}
+    assert not sync_from_collection(index, collection, expected, set(), batch_size=4)
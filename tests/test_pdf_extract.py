@@ -0,0 +1,62 @@
+# tests/test_pdf_extract.py
+
+import time
+
+from src.benchmarks.synthetic_pdfs import generate_corpus, make_pdf
+from src.tools.pdf_extract import extract_page_text, iter_extracted_pdfs
+
+
+class _Page:
+    def __init__(self, text="", delay=0.0, error=None):
+        self.text, self.delay, self.error = text, delay, error
+
+    def extract_text(self):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.text
+
+
+def test_slow_or_broken_pages_fall_back_to_empty_text():
+    assert extract_page_text(_Page("fine"), timeout=1.0) == "fine"
+
+    t0 = time.perf_counter()
+    assert extract_page_text(_Page("never", delay=5.0), timeout=0.1) == ""
+    assert time.perf_counter() - t0 < 2.0
+
+    assert extract_page_text(_Page(error=ValueError("bad xref")), timeout=1.0) == ""
+
+
+class _LenientPage:
+    """Like pypdf's lenient paths: broad `except Exception` around slow work."""
+
+    def extract_text(self):
+        for _ in range(50):
+            try:
+                time.sleep(0.1)
+            except Exception:
+                pass
+        return "never"
+
+
+def test_timeout_escapes_broad_exception_handlers():
+    t0 = time.perf_counter()
+    assert extract_page_text(_LenientPage(), timeout=0.1) == ""
+    assert time.perf_counter() - t0 < 2.0
+
+
+def test_pool_output_keeps_input_order(tmp_path):
+    # Uneven sizes, split into one-page tasks, so workers finish out of order
+    paths = generate_corpus(tmp_path, n_papers=4, pages_per_paper=1, lines_per_page=5)
+    make_pdf(paths[0], [[f"Page {i} of the long paper."] for i in range(6)])
+    empty = tmp_path / "empty.pdf"
+    make_pdf(empty, [])
+    paths.insert(2, empty)
+
+    serial = list(iter_extracted_pdfs(paths, max_workers=1))
+    pooled = list(iter_extracted_pdfs(paths, max_workers=3, pages_per_task=1))
+
+    assert [p for p, _ in pooled] == paths
+    assert pooled == serial
+    assert len(pooled[0][1]) == 6
+    assert pooled[2][1] == []
@@ -0,0 +1,77 @@
+# tests/test_pipeline_async.py
+
+import asyncio
+
+import pytest
+
+import src.pipelines.run_multi_agent_pipeline as pipeline
+from src.models.agent_messages import EvidenceBatch, FinalAnswer, PlannerTask, RetrievedContext
+from src.models.session_state import SessionState
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    """Replace the LLM / retrieval stages with instant fakes; returns the call log."""
+    calls = []
+
+    async def plan(question, history_context=None):
+        calls.append("planner")
+        return [PlannerTask(task_type=t, query=question) for t in ("retrieval", "evidence", "answer")]
+
+    async def retrieve(tasks):
+        calls.append("retrieval")
+        return RetrievedContext(query=tasks[0].query, chunks=[])
+
+    async def evidence(ctx, question):
+        calls.append("evidence")
+        return EvidenceBatch(question=question, items=[])
+
+    async def answer(batch):
+        calls.append("answer")
+        return FinalAnswer(question=batch.question, answer=f"answer to {batch.question}", citations=[])
+
+    monkeypatch.setattr(pipeline, "aplan_question", plan)
+    monkeypatch.setattr(pipeline, "_retrieve", retrieve)
+    monkeypatch.setattr(pipeline, "arun_evidence_agent", evidence)
+    monkeypatch.setattr(pipeline, "arun_answer_agent", answer)
+    return calls
+
+
+def test_sync_facade_runs_all_stages(fake_stages):
+    state = SessionState()
+    final = pipeline.handle_one_turn("what is BM25?", state)
+    assert final.answer == "answer to what is BM25?"
+    assert fake_stages == ["planner", "retrieval", "evidence", "answer"]
+    assert [t.question for t in state.turns] == ["what is BM25?"]
+
+
+def test_concurrent_turns_share_one_loop(fake_stages):
+    async def many():
+        return await asyncio.gather(*(pipeline.ahandle_one_turn(f"q{i}", SessionState()) for i in range(4)))
+
+    answers = asyncio.run(many())
+    assert [a.answer for a in answers] == [f"answer to q{i}" for i in range(4)]
+
+
+def test_stage_timeout_names_the_stage(fake_stages, monkeypatch):
+    async def slow_evidence(ctx, question):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(pipeline, "arun_evidence_agent", slow_evidence)
+    state = SessionState()
+    with pytest.raises(TimeoutError, match="evidence"):
+        asyncio.run(pipeline.ahandle_one_turn("q", state, timeouts={"evidence": 0.05}))
+    assert state.turns == []
+
+
+def test_timeouts_inside_a_stage_are_not_renamed(fake_stages, monkeypatch):
+    async def evidence_with_inner_timeout(ctx, question):
+        raise asyncio.TimeoutError("every evidence group straggled")
+
+    monkeypatch.setattr(pipeline, "arun_evidence_agent", evidence_with_inner_timeout)
+    # No stage limit: the stage's own error comes through as is
+    with pytest.raises(asyncio.TimeoutError, match="straggled"):
+        asyncio.run(pipeline.ahandle_one_turn("q", SessionState(), timeouts={"evidence": 0}))
+    # A limit that didn't expire doesn't claim the stage timed out either
+    with pytest.raises(asyncio.TimeoutError, match="straggled"):
+        asyncio.run(pipeline.ahandle_one_turn("q", SessionState(), timeouts={"evidence": 5}))
@@ -0,0 +1,43 @@
+# tests/test_retrieval_cache.py
+
+from src.tools.vector_search import vector_search
+from src.utils.retrieval_cache import LRUCache, bump_collection_version, read_collection_version
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1   # "b" is now least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_repeated_queries_hit_cache_until_version_bump(retrieval_store):
+    service = retrieval_store(["alpha beta", "gamma delta"], cache_enabled=True)
+    embedding_fn, version_path = service.embedding_fn, service.version_path
+
+    embedding_fn.calls = 0
+    first = vector_search("alpha beta", k=5)
+    # Whitespace differences normalize to the same cached embedding
+    again = vector_search("alpha   beta ", k=5)
+    assert again == first
+    assert embedding_fn.calls == 1
+    assert service.cache_stats()["results"]["hits"] == 1
+
+    # New chunk written by "ingestion" + version bump → fresh results
+    service.collection.add(
+        ids=["q::chunk-0000"],
+        documents=["epsilon"],
+        metadatas=[{"paper_id": "q", "chunk_index": 0, "source": "q.pdf"}],
+    )
+    embedding_fn.calls = 0
+    assert vector_search("alpha beta", k=5) == first   # still cached
+    assert bump_collection_version(version_path) == read_collection_version(version_path) == 1
+    refreshed = vector_search("alpha beta", k=5)
+    assert {h["paper_id"] for h in refreshed} == {"p", "q"}
+    assert embedding_fn.calls == 0   # query embedding still came from the LRU
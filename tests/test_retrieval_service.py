@@ -0,0 +1,124 @@
+# tests/test_retrieval_service.py
+
+import functools
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import src.tools.retrieval_service as retrieval_service
+from src.embeddings import FakeEmbeddingFunction
+from src.utils.retrieval_cache import bump_collection_version
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Another process writing to the store, the way pdf_ingest would
+_INGEST = """
+import sys
+import chromadb
+from src.embeddings import FakeEmbeddingFunction
+collection = chromadb.PersistentClient(path=sys.argv[1]).get_or_create_collection(
+    name="research_papers", embedding_function=FakeEmbeddingFunction(dim=16)
+)
+collection.add(ids=["q::chunk-0000"], documents=["epsilon zeta"],
+               metadatas=[{"paper_id": "q", "chunk_index": 0, "source": "q.pdf"}])
+"""
+
+
+def _open_shared_service(tmp_path, monkeypatch, cache_enabled):
+    factory = functools.partial(
+        retrieval_service.RetrievalService,
+        chroma_path=str(tmp_path / "chroma"),
+        embedding_fn=FakeEmbeddingFunction(dim=16),
+        cache_enabled=cache_enabled,
+        version_path=str(tmp_path / "collection_version"),
+        bm25_path=str(tmp_path / "bm25"),
+    )
+    monkeypatch.setattr(retrieval_service, "RetrievalService", factory)
+    monkeypatch.setattr(retrieval_service, "_service", None)
+
+    # Threads racing to open the process-wide service all get the same one
+    opened = []
+    threads = [threading.Thread(target=lambda: opened.append(retrieval_service.get_retrieval_service()))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(s) for s in opened}) == 1
+    service = opened[0]
+    service.collection.add(
+        ids=["p::chunk-0000", "p::chunk-0001"],
+        documents=["alpha beta", "gamma delta"],
+        metadatas=[{"paper_id": "p", "chunk_index": i, "source": "p.pdf"} for i in range(2)],
+    )
+    return service
+
+
+def _paper_ids(service):
+    return {m["paper_id"] for m in service.query(["alpha beta"], k=5)["metadatas"][0]}
+
+
+def test_new_chunks_visible_after_reload(tmp_path, monkeypatch):
+    service = _open_shared_service(tmp_path, monkeypatch, cache_enabled=True)
+    assert _paper_ids(service) == {"p"}
+
+    subprocess.run([sys.executable, "-c", _INGEST, str(tmp_path / "chroma")], cwd=ROOT, check=True)
+    retrieval_service.reload_retrieval_service()
+    assert retrieval_service.get_retrieval_service() is service
+    assert _paper_ids(service) == {"p", "q"}
+
+
+def test_version_bump_reloads_with_cache_disabled(tmp_path, monkeypatch):
+    service = _open_shared_service(tmp_path, monkeypatch, cache_enabled=False)
+    assert _paper_ids(service) == {"p"}
+
+    subprocess.run([sys.executable, "-c", _INGEST, str(tmp_path / "chroma")], cwd=ROOT, check=True)
+    bump_collection_version(str(tmp_path / "collection_version"))
+    assert _paper_ids(service) == {"p", "q"}
+
+
+def test_reload_during_queries(tmp_path, monkeypatch):
+    service = _open_shared_service(tmp_path, monkeypatch, cache_enabled=False)
+    errors = []
+    stop = threading.Event()
+
+    def query_loop():
+        while not stop.is_set():
+            try:
+                assert _paper_ids(service) == {"p"}
+                service.get_chunks(["p::chunk-0001"])
+            except Exception as e:  # noqa: BLE001 - collected and re-raised below
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=query_loop) for _ in range(4)]
+    for t in threads:
+        t.start()
+    try:
+        for _ in range(5):
+            retrieval_service.reload_retrieval_service()
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+    assert not errors, errors[0]
+    assert _paper_ids(service) == {"p"}
+
+
+def test_queries_are_not_blocked_while_reload_opens_the_store(tmp_path, monkeypatch):
+    service = _open_shared_service(tmp_path, monkeypatch, cache_enabled=False)
+    open_store = service._open
+    answered = []
+
+    def open_while_querying():
+        # A query issued while the new client is being opened still gets served
+        t = threading.Thread(target=lambda: answered.append(_paper_ids(service)))
+        t.start()
+        t.join(timeout=10)
+        return open_store()
+
+    monkeypatch.setattr(service, "_open", open_while_querying)
+    retrieval_service.reload_retrieval_service()
+    assert answered == [{"p"}]
+    assert _paper_ids(service) == {"p"}
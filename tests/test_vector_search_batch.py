@@ -0,0 +1,45 @@
+# tests/test_vector_search_batch.py
+
+import asyncio
+
+import pytest
+
+from src.tools.vector_search import avector_search, avector_search_batch, vector_search, vector_search_batch
+
+
+def test_batch_matches_single_queries_with_one_embedding_call(retrieval_store):
+    embedding_fn = retrieval_store([f"document about topic {i}" for i in range(10)]).embedding_fn
+    queries = ["document about topic 3", "document about topic 7", "something else"]
+
+    embedding_fn.calls = 0
+    batched = vector_search_batch(queries, k=3)
+    assert embedding_fn.calls == 1
+
+    assert len(batched) == len(queries)
+    for q, hits in zip(queries, batched):
+        assert hits == vector_search(q, k=3)
+    # Identical text → identical fake embedding → exact match first
+    assert batched[0][0]["chunk_index"] == 3
+    assert batched[1][0]["chunk_index"] == 7
+
+
+def test_empty_batch():
+    assert vector_search_batch([], k=3) == []
+
+
+def test_async_batch_matches_sync(retrieval_store):
+    retrieval_store([f"document about topic {i}" for i in range(10)])
+    queries = ["document about topic 3", "topic 7", "something else"]
+
+    for mode in ("vector", "hybrid", "auto"):
+        expected = vector_search_batch(queries, k=3, mode=mode)
+        assert asyncio.run(avector_search_batch(queries, k=3, mode=mode)) == expected
+
+
+def test_async_search_times_out(retrieval_store):
+    service = retrieval_store(["some text"])
+    service.embedding_fn.latency = 1.0
+    service.query_embeddings.clear()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(avector_search("an uncached question", k=1, mode="vector", timeout=0.05))